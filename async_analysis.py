@@ -0,0 +1,208 @@
+import asyncio
+import os
+import random
+import time
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError, APITimeoutError
+from chatgpt_analysis import (
+    MODEL, SYSTEM_PROMPT, cv_folder, get_most_recent_pdf, extract_text_from_pdf, fetch_pending_jobs, build_messages,
+    parse_score, share_cluster_analyses
+)
+from db_writer import get_writer, flush_writer
+from llm_cache import get_cache, cache_key
+from metrics import metrics
+
+# Default limits, adjust to your OpenAI usage tier
+CONCURRENCY = 8
+REQUESTS_PER_MINUTE = 500
+TOKENS_PER_MINUTE = 200000
+MAX_RETRIES = 6
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+EXPECTED_OUTPUT_TOKENS = 16  # The score is a single number
+
+
+class TokenBucket:
+    """
+    Async token bucket that refills continuously at `rate_per_minute` up to `capacity`.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        # Requests bigger than the bucket would never fit, cap them at the capacity
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+def estimate_tokens(messages):
+    """
+    Rough token estimate (about 4 characters per token) used for rate limiting.
+    """
+    return sum(len(message["content"]) for message in messages) // 4 + EXPECTED_OUTPUT_TOKENS
+
+
+def is_retryable(error):
+    """
+    Rate limits, server errors and connection problems are worth retrying.
+    """
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def backoff_delay(attempt, error=None):
+    """
+    Exponential backoff with full jitter, honouring a Retry-After header when the server sends one.
+    """
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** attempt))
+
+
+async def create_with_retries(client, messages, request_bucket, token_bucket, model=MODEL, max_retries=MAX_RETRIES):
+    """
+    Sends one chat completion request, waiting for rate-limit capacity and retrying transient errors.
+
+    Returns:
+    - The completion response.
+    """
+    tokens = estimate_tokens(messages)
+    for attempt in range(max_retries + 1):
+        waiting_since = time.monotonic()
+        await request_bucket.acquire(1)
+        await token_bucket.acquire(tokens)
+        metrics.observe("sleep", time.monotonic() - waiting_since, source="rate_limit")
+
+        started = time.monotonic()
+        try:
+            response = await client.chat.completions.create(model=model, messages=messages)
+            metrics.observe("api_request", time.monotonic() - started, outcome="ok")
+            if response.usage:
+                metrics.count("api_tokens", response.usage.prompt_tokens, kind="prompt")
+                metrics.count("api_tokens", response.usage.completion_tokens, kind="completion")
+            return response
+        except Exception as e:
+            metrics.observe("api_request", time.monotonic() - started, outcome="error")
+            metrics.count("api_errors", status=getattr(e, "status_code", type(e).__name__))
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, e)
+            print(f"Retrying in {delay:.1f}s after error: {e}")
+            await asyncio.sleep(delay)
+            metrics.observe("sleep", delay, source="backoff")
+
+
+async def _score_job(client, semaphore, request_bucket, token_bucket, writer, user_cv, job_id, job_description, prompt_suffix):
+    """
+    Scores one job (from the cache if possible) and hands the analysis to the writer.
+
+    Returns:
+    - The ChatGPT message, or None if the job could not be scored.
+    """
+    cache = get_cache()
+    key = cache_key(user_cv, job_description, prompt_suffix, MODEL, SYSTEM_PROMPT)
+    chatgpt_message = cache.get(key)
+    if chatgpt_message is not None:
+        print(f"Job ID {job_id} taken from cache. ChatGPT message: {chatgpt_message}")
+        writer.add_analysis(job_id, chatgpt_message, parse_score(chatgpt_message))
+        metrics.count("jobs_analyzed", source="cache")
+        return chatgpt_message
+
+    async with semaphore:
+        try:
+            response = await create_with_retries(
+                client, build_messages(user_cv, job_description, prompt_suffix), request_bucket, token_bucket
+            )
+            chatgpt_message = response.choices[0].message.content.strip()
+            print(f"Job ID {job_id} processed. ChatGPT message: {chatgpt_message}")
+            cache.put(key, MODEL, chatgpt_message)
+
+            # Written as soon as it arrives so finished work survives a crash
+            writer.add_analysis(job_id, chatgpt_message, parse_score(chatgpt_message))
+            metrics.count("jobs_analyzed", source="api")
+            return chatgpt_message
+        except Exception as e:
+            print(f"Error processing job ID {job_id}: {e}")
+            return None
+
+
+async def analyze_jobs_async(prompt_suffix, concurrency=CONCURRENCY, requests_per_minute=REQUESTS_PER_MINUTE,
+                             tokens_per_minute=TOKENS_PER_MINUTE, base_url=None):
+    """
+    Analyze job positions concurrently with AsyncOpenAI and save the analysis in SQLite.
+
+    Parameters:
+    - prompt_suffix: The final sentence of the prompt that adjusts how ChatGPT evaluates the job position.
+    - concurrency: Maximum number of requests in flight.
+    - requests_per_minute / tokens_per_minute: Rate limits enforced with token buckets.
+    - base_url: Optional OpenAI-compatible endpoint (e.g. a local fake server for testing).
+
+    Returns:
+    - Number of jobs analyzed, including near-duplicates that took over an analysis.
+    """
+    cv_path = get_most_recent_pdf(cv_folder)
+    print(f"Using CV file: {cv_path}")
+    user_cv = extract_text_from_pdf(cv_path)
+
+    jobs = [(job_id, description) for job_id, description in fetch_pending_jobs() if description]
+    if not jobs:
+        print("No jobs to analyze.")
+        return 0
+
+    print(f"Analyzing {len(jobs)} jobs with up to {concurrency} concurrent requests...")
+
+    # Retries are handled here so they respect the rate limiters
+    client = AsyncOpenAI(
+        api_key=os.environ['OPENAI_API_KEY'],
+        base_url=base_url or os.getenv("OPENAI_BASE_URL"),
+        max_retries=0,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    request_bucket = TokenBucket(requests_per_minute)
+    token_bucket = TokenBucket(tokens_per_minute)
+    writer = get_writer()
+
+    try:
+        results = await asyncio.gather(*[
+            _score_job(client, semaphore, request_bucket, token_bucket, writer, user_cv, job_id, job_description, prompt_suffix)
+            for job_id, job_description in jobs
+        ])
+    finally:
+        flush_writer()
+        await client.close()
+        get_cache().evict()
+        get_cache().report()
+
+    analyzed = sum(1 for chatgpt_message in results if chatgpt_message is not None)
+    print(f"ChatGPT analysis completed: {analyzed} of {len(jobs)} jobs saved to the database.")
+    return analyzed + share_cluster_analyses()
+
+
+def analyze_jobs_with_chatgpt_async(prompt_suffix, **kwargs):
+    """
+    Synchronous entry point for analyze_jobs_async.
+    """
+    return asyncio.run(analyze_jobs_async(prompt_suffix, **kwargs))
@@ -0,0 +1,278 @@
+import json
+import os
+import sqlite3
+import time
+from chatgpt_analysis import (
+    client, MODEL, SYSTEM_PROMPT, db_path, cv_folder, get_most_recent_pdf, extract_text_from_pdf,
+    fetch_pending_jobs, build_messages, parse_score, share_cluster_analyses
+)
+from db_writer import get_writer, flush_writer
+from llm_cache import get_cache, cache_key
+
+# Batch settings
+BATCH_FOLDER = "./batches/"
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+POLL_SECONDS = 60
+MAX_ROUNDS = 3   # Failed requests are re-queued into a new batch up to this many times
+MAX_BATCH_REQUESTS = 50000               # Batch API limit on requests per input file
+MAX_BATCH_BYTES = 190 * 1024 * 1024      # Kept below the Batch API's 200 MB input file limit
+FINISHED_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def ensure_batch_table(conn):
+    """
+    Creates the table that remembers submitted batches, so a restarted run resumes polling
+    instead of submitting the same jobs again.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS openai_batches (
+        batch_id TEXT PRIMARY KEY,
+        input_path TEXT,
+        status TEXT,
+        submitted_at REAL,
+        finished_at REAL
+    )
+    """)
+    conn.commit()
+
+
+def write_batch_files(jobs, user_cv, prompt_suffix, path_prefix, max_requests=MAX_BATCH_REQUESTS,
+                      max_bytes=MAX_BATCH_BYTES):
+    """
+    Writes one Batch API request line per (job_id, job_description), using the job ID as custom_id.
+    A new file is started whenever the next line would exceed max_requests lines or max_bytes.
+
+    Returns:
+    - List of the written file paths, <path_prefix>_<part>.jsonl.
+    """
+    paths = []
+    f = None
+    requests = size = 0
+    try:
+        for job_id, job_description in jobs:
+            line = (json.dumps({
+                "custom_id": str(job_id),
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {"model": MODEL, "messages": build_messages(user_cv, job_description, prompt_suffix)},
+            }) + "\n").encode("utf-8")
+
+            if f is None or requests >= max_requests or size + len(line) > max_bytes:
+                if f is not None:
+                    f.close()
+                paths.append(f"{path_prefix}_{len(paths) + 1}.jsonl")
+                f = open(paths[-1], "wb")
+                requests = size = 0
+            f.write(line)
+            requests += 1
+            size += len(line)
+    finally:
+        if f is not None:
+            f.close()
+    return paths
+
+
+def load_batch_descriptions(conn, input_path):
+    """
+    Rebuilds the job_id -> job_description map of a submitted batch from its input file and
+    job_description, so the answers of a batch resumed from an earlier run reach the LLM cache.
+    """
+    try:
+        with open(input_path, encoding="utf-8") as f:
+            job_ids = [json.loads(line)["custom_id"] for line in f if line.strip()]
+    except (OSError, TypeError, ValueError):
+        print(f"Batch input file {input_path} is missing, its answers are not cached.")
+        return {}
+
+    descriptions = {}
+    for start in range(0, len(job_ids), 500):
+        chunk = job_ids[start:start + 500]
+        descriptions.update(conn.execute(
+            f"SELECT job_id, job_description FROM job_description WHERE job_id IN ({','.join('?' * len(chunk))})",
+            chunk,
+        ).fetchall())
+    return descriptions
+
+
+def submit_batch(conn, path):
+    """
+    Uploads the batch file and creates the batch.
+
+    Returns:
+    - The batch ID.
+    """
+    with open(path, "rb") as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id, endpoint=BATCH_ENDPOINT, completion_window=COMPLETION_WINDOW
+    )
+    with conn:
+        conn.execute(
+            "INSERT INTO openai_batches (batch_id, input_path, status, submitted_at) VALUES (?, ?, ?, ?)",
+            (batch.id, path, batch.status, time.time())
+        )
+    print(f"Submitted batch {batch.id} from {path}.")
+    return batch.id
+
+
+def wait_for_batch(conn, batch_id, poll_seconds=POLL_SECONDS):
+    """
+    Polls the batch until it reaches a final status.
+
+    Returns:
+    - The final batch object.
+    """
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        if counts:
+            print(f"Batch {batch_id}: {batch.status} ({counts.completed}/{counts.total} done, {counts.failed} failed)")
+        if batch.status in FINISHED_STATUSES:
+            with conn:
+                conn.execute(
+                    "UPDATE openai_batches SET status = ?, finished_at = ? WHERE batch_id = ?",
+                    (batch.status, time.time(), batch_id)
+                )
+            return batch
+        time.sleep(poll_seconds)
+
+
+def iter_result_lines(file_id):
+    """
+    Streams a result file line by line instead of loading it into memory at once.
+    """
+    if not file_id:
+        return
+    with client.files.with_streaming_response.content(file_id) as response:
+        for line in response.iter_lines():
+            if line.strip():
+                yield json.loads(line)
+
+
+def store_batch_results(batch, descriptions, user_cv, prompt_suffix):
+    """
+    Upserts the successful answers of a finished batch into chatgpt_analysis.
+
+    Returns:
+    - Set of job IDs that were stored.
+    """
+    writer = get_writer()
+    cache = get_cache()
+    done = set()
+
+    for result in iter_result_lines(batch.output_file_id):
+        job_id = result["custom_id"]
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            continue
+        try:
+            chatgpt_message = response["body"]["choices"][0]["message"]["content"].strip()
+        except (KeyError, IndexError, TypeError):
+            continue
+
+        writer.add_analysis(job_id, chatgpt_message, parse_score(chatgpt_message))
+        if job_id in descriptions:
+            cache.put(cache_key(user_cv, descriptions[job_id], prompt_suffix, MODEL, SYSTEM_PROMPT), MODEL, chatgpt_message)
+        done.add(job_id)
+
+    # Failed lines are only reported here, the caller re-queues everything that is not done
+    for result in iter_result_lines(batch.error_file_id):
+        print(f"Batch request for job ID {result.get('custom_id')} failed: {result.get('error')}")
+
+    flush_writer()
+    return done
+
+
+def analyze_jobs_batch(prompt_suffix, poll_seconds=POLL_SECONDS, max_rounds=MAX_ROUNDS, max_batch_requests=MAX_BATCH_REQUESTS):
+    """
+    Analyze pending job positions through the OpenAI Batch API and save the analysis in SQLite.
+
+    Pending jobs are written to JSONL batch files below the Batch API's per-file limits, submitted
+    and polled until the batches finish.
+    Results are streamed back and upserted into chatgpt_analysis. Jobs that failed or are missing
+    from the output are re-queued into new batches, up to max_rounds rounds.
+
+    Parameters:
+    - prompt_suffix: The final sentence of the prompt that adjusts how ChatGPT evaluates the job position.
+    - poll_seconds: Seconds between status checks.
+    - max_rounds: Maximum number of batch rounds submitted for the same jobs.
+    - max_batch_requests: Most requests per batch file, larger backlogs are split into several batches.
+
+    Returns:
+    - Number of jobs analyzed.
+    """
+    cv_path = get_most_recent_pdf(cv_folder)
+    print(f"Using CV file: {cv_path}")
+    user_cv = extract_text_from_pdf(cv_path)
+
+    os.makedirs(BATCH_FOLDER, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    ensure_batch_table(conn)
+
+    writer = get_writer()
+    cache = get_cache()
+    analyzed = 0
+
+    # A batch left running by an earlier run is collected before anything new is submitted
+    for batch_id, input_path in conn.execute(
+        "SELECT batch_id, input_path FROM openai_batches WHERE status NOT IN ('completed', 'failed', 'expired', 'cancelled')"
+    ).fetchall():
+        print(f"Resuming batch {batch_id} from an earlier run...")
+        batch = wait_for_batch(conn, batch_id, poll_seconds)
+        analyzed += len(store_batch_results(batch, load_batch_descriptions(conn, input_path), user_cv, prompt_suffix))
+
+    descriptions = {}
+    for job_id, job_description in fetch_pending_jobs():
+        if not job_description:
+            continue
+        cached = cache.get(cache_key(user_cv, job_description, prompt_suffix, MODEL, SYSTEM_PROMPT))
+        if cached is not None:
+            writer.add_analysis(job_id, cached, parse_score(cached))
+            analyzed += 1
+        else:
+            descriptions[str(job_id)] = job_description
+
+    pending = dict(descriptions)
+    for round_number in range(1, max_rounds + 1):
+        if not pending:
+            break
+
+        paths = write_batch_files(
+            pending.items(), user_cv, prompt_suffix, os.path.join(BATCH_FOLDER, f"batch_{int(time.time())}_{round_number}"),
+            max_requests=max_batch_requests,
+        )
+        print(f"Round {round_number}: submitting {len(pending)} jobs as {len(paths)} batches...")
+
+        # Submit every file before waiting, so the batches run side by side
+        batch_ids = []
+        for path in paths:
+            try:
+                batch_ids.append(submit_batch(conn, path))
+            except Exception as e:
+                print(f"Error submitting batch file {path}: {e}")
+        if not batch_ids:
+            break
+
+        done = set()
+        for batch_id in batch_ids:
+            try:
+                batch = wait_for_batch(conn, batch_id, poll_seconds)
+            except Exception as e:
+                print(f"Error waiting for batch {batch_id}: {e}")
+                continue
+            done |= store_batch_results(batch, descriptions, user_cv, prompt_suffix)
+        analyzed += len(done)
+        pending = {job_id: description for job_id, description in pending.items() if job_id not in done}
+        print(f"Round {round_number}: {len(done)} jobs stored, {len(pending)} re-queued.")
+
+    if pending:
+        print(f"{len(pending)} jobs are still unanalyzed and will be picked up by the next run.")
+
+    flush_writer()
+    analyzed += share_cluster_analyses()
+    conn.close()
+    cache.report()
+
+    print(f"ChatGPT batch analysis completed: {analyzed} jobs saved to the database.")
+    return analyzed
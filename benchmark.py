@@ -0,0 +1,318 @@
+"""
+End-to-end benchmark of the pipeline against local stand-ins: fixture_server.py for LinkedIn and
+fake_openai.py for the OpenAI API. Every stage runs in a fresh temporary working directory and
+is timed together with the spans recorded by the pipeline (see metrics.py).
+
+Reports jobs per minute, sleep and work time per stage, p50/p95 of every span, API tokens and
+peak RSS, and writes them to <output>/<name>.json and <name>.prom so runs can be compared. The
+output folder defaults to linkedin-benchmark/ in the system temporary directory, outside the repository.
+
+Usage:
+    python benchmark.py --name baseline --jobs 100 --output results
+    python benchmark.py --name after --jobs 100 --output results --compare results/baseline.json
+    python benchmark.py --no-browser --openai-latency 0.3 --rate-limit 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from fake_openai import start_fake_openai
+from fixture_server import start_fixture_server
+from metrics import metrics, peak_rss_bytes
+
+RESULTS_FOLDER = os.path.join(tempfile.gettempdir(), "linkedin-benchmark")
+SEARCH_URL = "{base_url}/jobs/search/?geoId=101282230&keywords=Data%20Analyst"
+PROMPT_SUFFIX = "Please score with the user's skills in Python, SQL, finance and fintech in mind."
+CV_TEXT = "Data Analyst with 5 years of Python, SQL, Power BI and reporting experience in fintech and finance."
+CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+
+
+def write_cv_pdf(path, text=CV_TEXT):
+    """
+    Writes a one-page PDF holding the text, as the CV the analysis stage reads.
+    """
+    stream = f"BT /F1 11 Tf 50 750 Td ({text}) Tj ET".encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    document = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(document))
+        document += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(document)
+    document += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    document += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    document += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(document)
+
+
+def chrome_available():
+    return any(shutil.which(binary) for binary in CHROME_BINARIES)
+
+
+def span_count(name, **labels):
+    wanted = {key: str(value) for key, value in labels.items()}
+    return sum(span["count"] for span in metrics.spans()
+               if span["name"] == name and wanted.items() <= span["labels"].items())
+
+
+def run_stage(stages, name, function, count_jobs):
+    """
+    Runs one stage inside a "stage" span and records its wall time, its summed sleep time and
+    the number of jobs it handled (count_jobs(result) after it finished).
+    """
+    sleep_before = metrics.total("sleep")
+    started = time.perf_counter()
+    with metrics.span("stage", stage=name):
+        result = function()
+    seconds = time.perf_counter() - started
+    jobs = count_jobs(result)
+    stage = {
+        "stage": name,
+        "jobs": jobs,
+        "seconds": round(seconds, 3),
+        "jobs_per_minute": round(jobs / seconds * 60, 1) if seconds else None,
+        # Summed over concurrent tasks, so it can exceed the wall time of async stages
+        "sleep_seconds": round(metrics.total("sleep") - sleep_before, 3),
+    }
+    stage["work_seconds"] = round(max(0.0, seconds - stage["sleep_seconds"]), 3)
+    stages.append(stage)
+    print(f"Stage {name}: {jobs} jobs in {seconds:.2f}s.")
+    return result
+
+
+def scrape_over_http(base_url, search_url, max_jobs, delay):
+    """
+    Scrape stage without a browser: logs in with the form, collects the job IDs from the search
+    API and fetches and parses every job page over HTTP, storing the records as the scraper does.
+
+    Returns:
+    - Number of job records stored.
+    """
+    import httpx
+    from page_scraper import JOB_VIEW_URL, save_job_record
+    from http_fetcher import parse_job_page, LayoutNotRecognized, HTTP_TIMEOUT_SECONDS
+    from search_collector import build_search_api_url, parse_search_response, PAGE_SIZE
+    from crawl_frontier import mark_failed
+    from db_writer import flush_writer
+
+    stored = 0
+    with httpx.Client(timeout=HTTP_TIMEOUT_SECONDS, follow_redirects=True) as client:
+        login_started = time.monotonic()
+        client.post(f"{base_url}/login", data={"session_key": "benchmark", "session_password": "benchmark"})
+        metrics.observe("login", time.monotonic() - login_started)
+
+        job_ids = []
+        while len(job_ids) < max_jobs:
+            with metrics.span("http_fetch", page_type="search_api"):
+                response = client.get(build_search_api_url(search_url, len(job_ids)))
+            page_ids, total = parse_search_response(response.text)
+            job_ids.extend(page_ids)
+            if len(page_ids) < PAGE_SIZE or (total is not None and len(job_ids) >= total):
+                break
+
+        for job_id in job_ids[:max_jobs]:
+            started = time.monotonic()
+            try:
+                with metrics.span("http_fetch", page_type="job"):
+                    response = client.get(JOB_VIEW_URL.format(job_id=job_id))
+                if response.status_code != 404:
+                    response.raise_for_status()
+                save_job_record(parse_job_page(response.text, job_id))
+                stored += 1
+            except (LayoutNotRecognized, httpx.HTTPError) as e:
+                print(f"Error processing job ID {job_id}: {e}")
+                mark_failed(job_id, e)
+
+            remaining = delay - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+                metrics.observe("sleep", remaining, source="http")
+    flush_writer()
+    return stored
+
+
+def run_benchmark(args):
+    """
+    Starts the stand-in servers, points the pipeline at them and runs its stages.
+
+    Returns:
+    - (stages, fixture, openai): the stage results and the two servers, for their request counts.
+    """
+    fixture = start_fixture_server(
+        jobs=args.jobs, latency=args.page_latency, cancelled_rate=args.cancelled_rate,
+        deleted_rate=args.deleted_rate, duplicate_rate=args.duplicate_rate,
+    )
+    openai = start_fake_openai(latency=args.openai_latency, rate_limit=args.rate_limit, retry_after=args.retry_after)
+
+    # Set before the pipeline modules are imported, as they read it at import time
+    os.environ["LINKEDIN_BASE_URL"] = fixture.base_url
+    os.environ["OPENAI_BASE_URL"] = openai.base_url
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["LINKEDIN_EMAIL"] = "benchmark@example.com"
+    os.environ["LINKEDIN_PASSWORD"] = "benchmark"
+
+    # The pipeline reads and writes relative paths: linkedin_jobs.db and user_data/
+    os.chdir(args.workdir)
+    os.makedirs("user_data", exist_ok=True)
+    write_cv_pdf(os.path.join("user_data", "cv.pdf"))
+
+    from page_scraper import setup_database
+    from async_analysis import analyze_jobs_async
+
+    search_url = SEARCH_URL.format(base_url=fixture.base_url)
+    browser = not args.no_browser and chrome_available()
+    if not args.no_browser and not browser:
+        print("Chrome was not found, scraping over HTTP instead of with the browser.")
+
+    metrics.reset()
+    stages = []
+    run_stage(stages, "setup", setup_database, lambda result: 0)
+
+    if browser:
+        from page_scraper import init_driver, login_mainpage, scrape_linkedin_jobs
+        from check_cancelled import process_ongoing_jobs
+
+        driver = init_driver(headless=True, network_log=args.collection == "network")
+        try:
+            login_mainpage(driver)
+            run_stage(stages, "scrape", lambda: scrape_linkedin_jobs(
+                search_url, driver=driver, collection=args.collection, use_http=args.use_http,
+            ), lambda result: int(metrics.total("jobs_stored")))
+            # Everything scraped above counts as due, so the recheck visits every ongoing job
+            page_loads = span_count("page_load", page_type="job")
+            run_stage(stages, "recheck", lambda: process_ongoing_jobs(
+                use_http=args.use_http, driver=driver, max_jobs=args.jobs,
+            ), lambda result: span_count("page_load", page_type="job") - page_loads)
+        finally:
+            driver.quit()
+    else:
+        run_stage(stages, "scrape", lambda: scrape_over_http(fixture.base_url, search_url, args.jobs, args.delay),
+                  lambda stored: stored)
+
+    run_stage(stages, "analysis", lambda: asyncio.run(analyze_jobs_async(
+        PROMPT_SUFFIX, concurrency=args.concurrency, requests_per_minute=args.requests_per_minute,
+    )), lambda analyzed: analyzed)
+
+    return stages, fixture, openai
+
+
+def print_report(stages, spans, counters):
+    print("\nStage       jobs   seconds   jobs/min   sleep s   work s")
+    for stage in stages:
+        jobs_per_minute = "-" if stage["jobs_per_minute"] is None else f"{stage['jobs_per_minute']:.1f}"
+        print(f"{stage['stage']:<10} {stage['jobs']:>5} {stage['seconds']:>9.2f} {jobs_per_minute:>10} "
+              f"{stage['sleep_seconds']:>9.2f} {stage['work_seconds']:>8.2f}")
+
+    print("\nSpan                                    count    p50 ms    p95 ms    max ms")
+    for span in spans:
+        if span["name"] == "stage":
+            continue
+        labels = ",".join(f"{key}={value}" for key, value in span["labels"].items())
+        name = f"{span['name']}{{{labels}}}" if labels else span["name"]
+        print(f"{name:<40} {span['count']:>5} {span['p50'] * 1000:>9.1f} {span['p95'] * 1000:>9.1f} "
+              f"{span['max'] * 1000:>9.1f}")
+
+    print("\nCounters")
+    for counter in counters:
+        labels = ",".join(f"{key}={value}" for key, value in counter["labels"].items())
+        print(f"  {counter['name']}{{{labels}}}: {counter['value']}")
+    peak_rss = peak_rss_bytes()
+    print(f"\nPeak RSS: {peak_rss / 2 ** 20:.1f} MiB" if peak_rss is not None else "\nPeak RSS: not available on this platform")
+
+
+def compare(previous_path, stages, spans):
+    """
+    Prints the change in jobs per minute of every stage and in the p95 of every span against an
+    earlier result file.
+    """
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+
+    def change(old, new):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "-"
+
+    print(f"\nCompared with {previous.get('name')} ({previous_path}):")
+    old_stages = {stage["stage"]: stage for stage in previous.get("stages", [])}
+    for stage in stages:
+        old = old_stages.get(stage["stage"])
+        if old and old["jobs_per_minute"] and stage["jobs_per_minute"]:
+            print(f"  {stage['stage']:<10} jobs/min {old['jobs_per_minute']:>8.1f} -> {stage['jobs_per_minute']:>8.1f} "
+                  f"({change(old['jobs_per_minute'], stage['jobs_per_minute'])})")
+
+    old_spans = {(span["name"], json.dumps(span["labels"], sort_keys=True)): span for span in previous.get("spans", [])}
+    for span in spans:
+        old = old_spans.get((span["name"], json.dumps(span["labels"], sort_keys=True)))
+        if old and span["name"] != "stage":
+            labels = ",".join(f"{key}={value}" for key, value in span["labels"].items())
+            print(f"  {span['name']}{{{labels}}} p95 {old['p95'] * 1000:.1f} ms -> {span['p95'] * 1000:.1f} ms "
+                  f"({change(old['p95'], span['p95'])})")
+
+    old_rss, rss = previous.get("peak_rss_bytes"), peak_rss_bytes()
+    if old_rss and rss:
+        print(f"  peak RSS {old_rss / 2 ** 20:.1f} MiB -> {rss / 2 ** 20:.1f} MiB ({change(old_rss, rss)})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline against local LinkedIn and OpenAI stand-ins.")
+    parser.add_argument("--name", default=time.strftime("run-%Y%m%d-%H%M%S"), help="Name of the result files")
+    parser.add_argument("--jobs", type=int, default=50, help="Number of jobs in the search results")
+    parser.add_argument("--no-browser", action="store_true", help="Scrape over HTTP even if Chrome is installed")
+    parser.add_argument("--collection", default="scroll", choices=["scroll", "network", "api"],
+                        help="How the browser collects job IDs (see search_collector.py)")
+    parser.add_argument("--use-http", action="store_true", help="Fetch the job pages over HTTP in the browser stages")
+    parser.add_argument("--delay", type=float, default=0.25, help="Seconds between job pages without a browser")
+    parser.add_argument("--page-latency", type=float, default=0.05, help="Latency of the fixture server")
+    parser.add_argument("--cancelled-rate", type=float, default=0.1)
+    parser.add_argument("--deleted-rate", type=float, default=0.05)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--openai-latency", type=float, default=0.2, help="Latency of the fake OpenAI server")
+    parser.add_argument("--rate-limit", type=float, default=0.05, help="Fraction of API requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=0, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent API requests")
+    parser.add_argument("--requests-per-minute", type=int, default=500)
+    parser.add_argument("--output", default=RESULTS_FOLDER, help=f"Folder for the result files (default: {RESULTS_FOLDER})")
+    parser.add_argument("--compare", help="Earlier result JSON to compare with")
+    parser.add_argument("--workdir", help="Working directory for the database (default: a new temporary one)")
+    args = parser.parse_args()
+
+    output_folder = os.path.abspath(args.output)
+    os.makedirs(output_folder, exist_ok=True)
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    own_workdir = args.workdir is None
+    args.workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="linkedin-benchmark-"))
+
+    try:
+        stages, fixture, openai = run_benchmark(args)
+    finally:
+        os.chdir(output_folder)
+        if own_workdir:
+            shutil.rmtree(args.workdir, ignore_errors=True)
+
+    spans, counters = metrics.spans(), metrics.counters()
+    print_report(stages, spans, counters)
+
+    settings = {key: value for key, value in vars(args).items() if key not in ("name", "output", "compare", "workdir")}
+    json_path = os.path.join(output_folder, f"{args.name}.json")
+    metrics.write_json(
+        json_path, name=args.name, settings=settings, stages=stages,
+        requests={"linkedin": fixture.request_counts, "openai": openai.request_count},
+    )
+    metrics.write_prometheus(os.path.join(output_folder, f"{args.name}.prom"), gauges={
+        "stage_seconds": [({"stage": stage["stage"]}, stage["seconds"]) for stage in stages],
+        "stage_jobs_per_minute": [({"stage": stage["stage"]}, stage["jobs_per_minute"] or 0) for stage in stages],
+    })
+    print(f"Results written to {json_path} and {args.name}.prom.")
+
+    if compare_path:
+        compare(compare_path, stages, spans)
@@ -0,0 +1,152 @@
+import json
+import os
+import time
+from selenium.common.exceptions import WebDriverException
+from webdriver_manager.chrome import ChromeDriverManager
+from page_scraper import LINKEDIN_BASE_URL, init_driver, login_mainpage
+from waits import load_page
+
+# Where the session survives between runs
+PROFILE_DIR = "./browser_profile/"
+COOKIES_PATH = os.path.join(PROFILE_DIR, "cookies.json")
+DRIVER_PATH_CACHE = os.path.join(PROFILE_DIR, "chromedriver_path.json")
+FEED_URL = f"{LINKEDIN_BASE_URL}/feed/"
+SESSION_CHECK_TIMEOUT = 10
+
+
+def get_chromedriver_path(refresh=False):
+    """
+    Returns the chromedriver binary path, asking ChromeDriverManager (a network lookup) only
+    when no cached path exists or refresh is requested.
+    """
+    if not refresh and os.path.exists(DRIVER_PATH_CACHE):
+        with open(DRIVER_PATH_CACHE, encoding="utf-8") as f:
+            driver_path = json.load(f).get("driver_path")
+        if driver_path and os.path.exists(driver_path):
+            return driver_path
+
+    driver_path = ChromeDriverManager().install()
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(DRIVER_PATH_CACHE, "w", encoding="utf-8") as f:
+        json.dump({"driver_path": driver_path, "cached_at": time.time()}, f)
+    return driver_path
+
+
+def save_cookies(driver, path=COOKIES_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(driver.get_cookies(), f)
+
+
+def restore_cookies(driver, path=COOKIES_PATH):
+    """
+    Loads saved cookies into the browser. Cookies can only be set for the domain that is open,
+    so the LinkedIn home page is opened first.
+
+    Returns:
+    - Number of cookies restored.
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        cookies = json.load(f)
+
+    driver.get(LINKEDIN_BASE_URL)
+    now = time.time()
+    restored = 0
+    for cookie in cookies:
+        if cookie.get("expiry") and cookie["expiry"] < now:
+            continue  # Expired, LinkedIn would ignore it anyway
+        if cookie.get("sameSite") not in ("Strict", "Lax", "None"):
+            cookie.pop("sameSite", None)  # Chrome rejects any other value
+        try:
+            driver.add_cookie(cookie)
+            restored += 1
+        except WebDriverException:
+            pass  # Cookies for other domains cannot be set from this page
+    return restored
+
+
+def is_logged_in(driver):
+    """
+    Opens the feed and checks whether the logged-in navigation bar appears.
+    """
+    return load_page(driver, FEED_URL, "logged_in", timeout=SESSION_CHECK_TIMEOUT) is not None
+
+
+def ensure_logged_in(driver, cookies_path=COOKIES_PATH):
+    """
+    Reuses the saved session when it is still valid and logs in through login_mainpage otherwise.
+
+    Raises:
+    - RuntimeError: If the login failed. login_mainpage has already closed the browser then,
+      so no cookies are saved.
+    """
+    if restore_cookies(driver, cookies_path) and is_logged_in(driver):
+        print("Reused the saved LinkedIn session.")
+        return
+
+    if not login_mainpage(driver):
+        raise RuntimeError("LinkedIn login failed, see the error above")
+    save_cookies(driver, cookies_path)
+
+
+class BrowserSession:
+    """
+    One logged-in browser for the whole run, shared by every pipeline stage.
+
+    The Chrome profile and cookies are kept in PROFILE_DIR so a later run can skip the login,
+    and the chromedriver path is cached so starting the browser needs no network lookup.
+
+    Usage:
+        with BrowserSession() as session:
+            process_ongoing_jobs(driver=session.driver)
+            scrape_linkedin_jobs(url, driver=session.driver)
+    """
+
+    def __init__(self, headless=False, profile_dir=PROFILE_DIR, lean=False, network_log=False):
+        self.headless = headless
+        self.lean = lean
+        self.network_log = network_log
+        self.profile_dir = profile_dir
+        self.driver = None
+
+    def start(self):
+        try:
+            self.driver = init_driver(
+                self.headless, os.path.join(self.profile_dir, "chrome"), get_chromedriver_path(), self.lean, self.network_log
+            )
+        except WebDriverException as e:
+            # Chrome was probably updated and the cached chromedriver no longer matches it
+            print(f"Cached chromedriver failed to start ({e.msg}), looking up a new one...")
+            self.driver = init_driver(
+                self.headless, os.path.join(self.profile_dir, "chrome"), get_chromedriver_path(refresh=True), self.lean,
+                self.network_log,
+            )
+
+        try:
+            ensure_logged_in(self.driver)
+        except RuntimeError:
+            self.driver = None  # login_mainpage has already closed the browser
+            raise
+        return self.driver
+
+    def close(self):
+        if self.driver is None:
+            return
+        if getattr(self.driver, "page_metrics", None):
+            self.driver.page_metrics.report()
+        try:
+            save_cookies(self.driver)
+        except WebDriverException:
+            pass  # The browser is already gone, the Chrome profile still has the session
+        finally:
+            self.driver.quit()
+            self.driver = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
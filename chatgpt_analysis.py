@@ -1,8 +1,14 @@
+import hashlib
+import json
 import os
+import re
 import sqlite3
+import time
 from dotenv import load_dotenv
 from openai import OpenAI
 import pdfplumber  # Library for reading PDFs
+from db_writer import get_writer, flush_writer
+from llm_cache import get_cache, cache_key
 
 # Load environment variables from .env file
 load_dotenv()
@@ -15,28 +21,73 @@ client = OpenAI(
 # Define directories
 cv_folder = "./user_data/"
 db_path = "./linkedin_jobs.db"
+cv_cache_path = "./cv_cache.json"
+
+# In-process caches for the CV lookup and extraction
+_recent_pdf_memo = {}  # folder -> ((name, mtime) of its PDFs, most recent PDF)
+_cv_text_memo = {}     # (path, size, mtime) -> extracted text
+
+# Model and system prompt used for scoring
+MODEL = "gpt-4o-mini"
+SYSTEM_PROMPT = "You are a career coach helping a user evaluate job positions based on their CV."
 
 def get_most_recent_pdf(folder_path):
     """
     Finds the most recent PDF file in the specified folder.
 
+    The folder is read with a single os.scandir, and the result is remembered until a PDF is
+    added, removed, renamed or modified.
+
     Parameters:
     - folder_path: Path to the folder containing PDF files.
 
     Returns:
     - Path to the most recent PDF file or None if no files are found.
     """
-    pdf_files = [f for f in os.listdir(folder_path) if f.endswith('.pdf')]
+    with os.scandir(folder_path) as entries:
+        pdf_files = tuple(sorted(
+            (entry.name, entry.stat().st_mtime_ns) for entry in entries if entry.name.endswith('.pdf') and entry.is_file()
+        ))
     if not pdf_files:
         raise FileNotFoundError("No PDF files found in the specified folder.")
-    
-    full_paths = [os.path.join(folder_path, f) for f in pdf_files]
-    return max(full_paths, key=os.path.getmtime)
+
+    cached = _recent_pdf_memo.get(folder_path)
+    if cached and cached[0] == pdf_files:
+        return cached[1]
+
+    most_recent = os.path.join(folder_path, max(pdf_files, key=lambda pdf: pdf[1])[0])
+    _recent_pdf_memo[folder_path] = (pdf_files, most_recent)
+    return most_recent
+
+def _load_cv_cache():
+    try:
+        with open(cv_cache_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _save_cv_cache(cache):
+    # Write to a temporary file first so a crash never leaves a half-written cache
+    tmp_path = cv_cache_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, cv_cache_path)
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 def extract_text_from_pdf(pdf_path):
     """
     Extracts text content from a PDF file.
 
+    Results are cached in memory and on disk (cv_cache.json) keyed by path, size, mtime and
+    content hash, so an unchanged CV is only parsed once. The cache entry also records how
+    long each page took to extract.
+
     Parameters:
     - pdf_path: Path to the PDF file.
 
@@ -45,12 +96,146 @@ def extract_text_from_pdf(pdf_path):
     """
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"PDF file not found at {pdf_path}")
-    
-    text = ""
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
-    return text.strip()
+
+    abs_path = os.path.abspath(pdf_path)
+    stat = os.stat(abs_path)
+    memo_key = (abs_path, stat.st_size, stat.st_mtime_ns)
+    if memo_key in _cv_text_memo:
+        return _cv_text_memo[memo_key]
+
+    disk_cache = _load_cv_cache()
+    entry = disk_cache.get(abs_path)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        _cv_text_memo[memo_key] = entry["text"]
+        return entry["text"]
+
+    # Size or mtime changed: only re-parse if the content really did
+    content_hash = _file_sha256(abs_path)
+    if not (entry and entry["sha256"] == content_hash):
+        text = ""
+        page_timings = []
+        with pdfplumber.open(abs_path) as pdf:
+            for number, page in enumerate(pdf.pages, start=1):
+                start = time.perf_counter()
+                page_text = page.extract_text()
+                page_timings.append({"page": number, "seconds": round(time.perf_counter() - start, 6)})
+                text += page_text + "\n"
+        entry = {"sha256": content_hash, "text": text.strip(), "page_timings": page_timings}
+        print(f"Extracted {len(page_timings)} pages from {pdf_path} in "
+              f"{sum(p['seconds'] for p in page_timings):.2f}s.")
+
+    entry.update({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+    disk_cache[abs_path] = entry
+    _save_cv_cache(disk_cache)
+
+    _cv_text_memo[memo_key] = entry["text"]
+    return entry["text"]
+
+def ensure_analysis_table(conn):
+    """
+    Creates the chatgpt_analysis table if it does not exist yet.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS chatgpt_analysis (
+        job_id TEXT PRIMARY KEY,
+        chatgpt_message TEXT,
+        score INTEGER,
+        FOREIGN KEY (job_id) REFERENCES job_ids (job_id)
+    )
+    """)
+
+    # Databases created before the score column existed
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(chatgpt_analysis)")}
+    if "score" not in columns:
+        conn.execute("ALTER TABLE chatgpt_analysis ADD COLUMN score INTEGER")
+        for job_id, chatgpt_message in conn.execute("SELECT job_id, chatgpt_message FROM chatgpt_analysis").fetchall():
+            conn.execute("UPDATE chatgpt_analysis SET score = ? WHERE job_id = ?", (parse_score(chatgpt_message), job_id))
+    conn.commit()
+
+def parse_score(chatgpt_message):
+    """
+    Extracts the 1-10 score from a ChatGPT answer such as '7' or 'Score: 8/10'.
+
+    Returns:
+    - The score as an integer, or None if no score is found.
+    """
+    match = re.search(r"\b(10|[1-9])\b", chatgpt_message or "")
+    return int(match.group(1)) if match else None
+
+def fetch_pending_jobs():
+    """
+    Returns (job_id, job_description) rows for jobs that have not been analyzed yet, leaving out
+    the jobs the local pre-filter did not select if it ran in this process (see prefilter.py).
+
+    Near-duplicates of analyzed jobs take over their analysis first (skipped when no jobs or
+    analyses were added since that last ran), and of the pending jobs of one near-duplicate
+    cluster only one is returned; share_cluster_analyses copies its analysis to the others once
+    it is stored (see near_duplicates.py).
+    """
+    from prefilter import ensure_prefilter_table, selection_active
+    from near_duplicates import inherit_new_analyses
+
+    conn = sqlite3.connect(db_path)
+    ensure_analysis_table(conn)
+    ensure_prefilter_table(conn)
+    inherit_new_analyses(conn)
+
+    # Fetch job descriptions for IDs not yet in chatgpt_analysis
+    prefilter_clause = """
+      AND NOT EXISTS (SELECT 1 FROM prefilter_scores p WHERE p.job_id = jd.job_id AND p.selected = 0)
+    """ if selection_active() else ""
+    rows = conn.execute(f"""
+    SELECT jd.job_id, jd.job_description, d.cluster_id
+    FROM job_description jd
+    LEFT JOIN dedup_signatures d ON d.job_id = jd.job_id
+    WHERE NOT EXISTS (SELECT 1 FROM chatgpt_analysis a WHERE a.job_id = jd.job_id){prefilter_clause}
+    ORDER BY d.job_id = d.cluster_id DESC, jd.job_id
+    """).fetchall()
+    conn.close()
+
+    # One job per cluster, preferably the cluster's first posting
+    jobs, clusters = [], set()
+    for job_id, job_description, cluster_id in rows:
+        if cluster_id is not None:
+            if cluster_id in clusters:
+                continue
+            clusters.add(cluster_id)
+        jobs.append((job_id, job_description))
+    if len(jobs) < len(rows):
+        print(f"{len(rows) - len(jobs)} near-duplicate jobs will take over the analysis of a job in their cluster.")
+    return jobs
+
+def share_cluster_analyses():
+    """
+    Copies the analyses stored by this run to the near-duplicates fetch_pending_jobs held back.
+    Call once the results are flushed.
+
+    Returns:
+    - Number of analyses copied.
+    """
+    from near_duplicates import inherit_new_analyses
+
+    conn = sqlite3.connect(db_path)
+    try:
+        return inherit_new_analyses(conn)
+    finally:
+        conn.close()
+
+def build_messages(user_cv, job_description, prompt_suffix):
+    """
+    Builds the chat messages used to score one job description against the CV.
+    """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": (
+                f"Here is the user's CV:\n{user_cv}\n\n"
+                f"Here is the job description:\n{job_description}\n\n"
+                f"{prompt_suffix}"  # Dynamic prompt suffix
+            )
+        }
+    ]
 
 def analyze_jobs_with_chatgpt(prompt_suffix):
     """
@@ -70,27 +255,11 @@ def analyze_jobs_with_chatgpt(prompt_suffix):
     # Extract CV content from PDF
     user_cv = extract_text_from_pdf(cv_path)
 
-    # Connect to the SQLite database
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    jobs = fetch_pending_jobs()
 
-    # Ensure the chatgpt_analysis table exists
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS chatgpt_analysis (
-        job_id INTEGER PRIMARY KEY,
-        chatgpt_message TEXT,
-        FOREIGN KEY (job_id) REFERENCES job_ids (job_id)
-    )
-    """)
-    conn.commit()
-
-    # Fetch job descriptions for IDs not yet in chatgpt_analysis
-    cursor.execute("""
-    SELECT job_id, job_description 
-    FROM job_description 
-    WHERE job_id NOT IN (SELECT job_id FROM chatgpt_analysis)
-    """)
-    jobs = cursor.fetchall()
+    # Results go through the shared batched writer
+    writer = get_writer()
+    cache = get_cache()
 
     # Process the rows to evaluate job positions
     for job in jobs:
@@ -103,37 +272,35 @@ def analyze_jobs_with_chatgpt(prompt_suffix):
         print(f"Processing job ID {job_id}...")
 
         try:
+            # Identical inputs were already scored, reuse the stored answer
+            key = cache_key(user_cv, job_description, prompt_suffix, MODEL, SYSTEM_PROMPT)
+            chatgpt_message = cache.get(key)
+            if chatgpt_message is not None:
+                print(f"Job ID {job_id} taken from cache. ChatGPT message: {chatgpt_message}")
+                writer.add_analysis(job_id, chatgpt_message, parse_score(chatgpt_message))
+                continue
+
             # Send the job description and CV to ChatGPT for evaluation
             response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a career coach helping a user evaluate job positions based on their CV."},
-                    {
-                        "role": "user",
-                        "content": (
-                            f"Here is the user's CV:\n{user_cv}\n\n"
-                            f"Here is the job description:\n{job_description}\n\n"
-                            f"{prompt_suffix}"  # Dynamic prompt suffix
-                        )
-                    }
-                ]
+                model=MODEL,
+                messages=build_messages(user_cv, job_description, prompt_suffix)
             )
             
             # Extract ChatGPT's message
             chatgpt_message = response.choices[0].message.content.strip()
             print(f"Job ID {job_id} processed. ChatGPT message: {chatgpt_message}")
+            cache.put(key, MODEL, chatgpt_message)
 
             # Insert the analysis into the database
-            cursor.execute("""
-            INSERT INTO chatgpt_analysis (job_id, chatgpt_message)
-            VALUES (?, ?)
-            """, (job_id, chatgpt_message))
+            writer.add_analysis(job_id, chatgpt_message, parse_score(chatgpt_message))
 
         except Exception as e:
             print(f"Error processing job ID {job_id}: {e}")
 
-    # Commit the changes and close the connection
-    conn.commit()
-    conn.close()
+    # Write out the remaining buffered results and copy them to the held-back near-duplicates
+    flush_writer()
+    share_cluster_analyses()
+    cache.evict()
+    cache.report()
 
     print("ChatGPT analysis completed and saved to the database.")
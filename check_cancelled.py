@@ -1,36 +1,75 @@
-import sqlite3
-from page_scraper import login_mainpage, init_driver, get_job_details
+import time
+from page_scraper import login_mainpage, init_driver
+from scraper_pool import get_job_details_pool
+from crawl_frontier import Frontier
+from revisit_scheduler import RevisitScheduler, MAX_JOBS_PER_RUN
 
-def process_ongoing_jobs():
+def process_ongoing_jobs(workers=1, requests_per_minute=None, use_http=False, driver=None,
+                         max_jobs=MAX_JOBS_PER_RUN, max_minutes=None, headless=False, lean=False):
     """
-    This function goes through all "ongoing" positions and checks if they are cancelled now.
-    """
-    # Connect to the database and fetch all ongoing jobs
-    conn = sqlite3.connect('linkedin_jobs.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT ji.job_id FROM job_ids ji WHERE ji.status = 'ongoing';")
-    ongoing_jobs = cursor.fetchall()
-    conn.close()
+    This function goes through the "ongoing" positions that are due for a recheck and checks if
+    they are cancelled now (see revisit_scheduler.py). Full details are only extracted again for
+    jobs whose content changed.
 
-    job_urls = [job[0] for job in ongoing_jobs]
+    With workers > 1 the positions are checked by a pool of browsers (see scraper_pool.py).
+    With use_http the pages are fetched over HTTP with the browser's cookies (see http_fetcher.py).
+    A logged-in driver can be passed in (see browser_session.py), otherwise a new one is started.
+    The jobs are claimed from the crawl frontier (see crawl_frontier.py), so jobs an interrupted
+    run did not get to are picked up by the next one and failed jobs are retried later.
+    At most max_jobs jobs are rechecked per run, and none are started after max_minutes.
+    headless and lean apply to every browser started here, including the pool's (see lean_browser.py).
+    """
+    # Pick the ongoing jobs that are due for a recheck
+    scheduler = RevisitScheduler()
+    frontier = Frontier()
+    frontier.add(scheduler.due_jobs(max_jobs), "recheck", requeue_failed=True)
+    job_urls = frontier.claim("recheck", max_jobs)
 
     if not job_urls:
-        print("No ongoing jobs found.")
+        frontier.close()
+        print("No ongoing jobs are due for a recheck.")
         return
 
-    print(f"Found {len(job_urls)} ongoing jobs to process.")
+    print(f"Found {len(job_urls)} ongoing jobs to recheck.")
+    scheduler.load(job_urls)
+    deadline = time.monotonic() + max_minutes * 60 if max_minutes else None
+
+    if workers > 1 and not use_http:
+        get_job_details_pool(
+            job_urls, workers=workers, requests_per_minute=requests_per_minute, headless=headless, lean=lean,
+            process_job=scheduler.revisit_job, deadline=deadline,
+        )
+        _finish(scheduler, frontier)
+        return
 
-    # Initialize WebDriver
-    driver = init_driver()
+    # Initialize WebDriver unless a logged-in one was passed in
+    own_driver = driver is None
+    if own_driver:
+        driver = init_driver(headless=headless, lean=lean)
 
     try:
         # Log in to the LinkedIn main page
-        login_mainpage(driver)
+        if own_driver:
+            login_mainpage(driver)
 
-        # Process each ongoing job
-        get_job_details(driver, job_urls)
+        # Recheck each due job
+        if use_http:
+            scheduler.revisit_jobs_http(driver, job_urls, deadline)
+        else:
+            scheduler.revisit_jobs(driver, job_urls, deadline)
 
     except Exception as e:
         print(f"Error processing ongoing jobs: {e}")
     finally:
-        driver.quit()
+        _finish(scheduler, frontier)
+        if own_driver:
+            driver.quit()
+
+def _finish(scheduler, frontier):
+    scheduler.report()
+
+    # Jobs the budget did not reach wait for the next run, released by the frontier that claimed them
+    released = frontier.release("recheck")
+    frontier.close()
+    if released:
+        print(f"{released} jobs were left for the next run.")
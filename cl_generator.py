@@ -1,8 +1,11 @@
+import asyncio
 import os
 import sqlite3
 from dotenv import load_dotenv
-from openai import OpenAI
-from chatgpt_analysis import get_most_recent_pdf, extract_text_from_pdf  # Importing functions
+from openai import OpenAI, AsyncOpenAI
+from chatgpt_analysis import MODEL, get_most_recent_pdf, extract_text_from_pdf, ensure_analysis_table  # Importing functions
+from async_analysis import REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE, TokenBucket, create_with_retries
+from llm_cache import get_cache, cache_key
 from docx import Document  # Library for creating Word documents
 
 # Load environment variables
@@ -16,9 +19,46 @@ cv_folder = "./user_data/"
 db_path = "./linkedin_jobs.db"
 cover_letter_folder = "./cover_letters/"
 
+# Prompts used for cover letters (part of the cache key)
+COVER_LETTER_SYSTEM_PROMPT = "You are an expert cover letter writer."
+COVER_LETTER_PROMPT = "Create a personalized cover letter for this job description:"
+
+# Batch defaults
+TOP_N = 30                # Number of best-scored jobs to write letters for
+CONCURRENCY = 4           # Letters generated at the same time
+
 # Ensure the cover letters folder exists
 os.makedirs(cover_letter_folder, exist_ok=True)
 
+def cover_letter_path(job_id):
+    return os.path.join(cover_letter_folder, f"{job_id}_cl.docx")
+
+def build_cover_letter_messages(user_cv, job_description):
+    return [
+        {"role": "system", "content": COVER_LETTER_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": (
+                f"Using the following CV:\n{user_cv}\n\n"
+                f"{COVER_LETTER_PROMPT}\n{job_description}"
+            )
+        }
+    ]
+
+def save_cover_letter(job_id, cover_letter):
+    """
+    Saves a cover letter as a Word document in the cover letters folder.
+
+    Returns:
+    - Path of the document.
+    """
+    path = cover_letter_path(job_id)
+    document = Document()
+    document.add_heading('Cover Letter', level=1)
+    document.add_paragraph(cover_letter)
+    document.save(path)
+    return path
+
 def generate_cover_letter(job_id):
     """
     Generate a cover letter for a specific job ID and save it as a .docx file.
@@ -50,33 +90,27 @@ def generate_cover_letter(job_id):
         raise ValueError(f"Job ID {job_id} has no job description.")
 
     try:
-        # Generate the cover letter using ChatGPT
-        print(f"Generating cover letter for job ID {job_id}...")
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an expert cover letter writer."},
-                {
-                    "role": "user",
-                    "content": (
-                        f"Using the following CV:\n{user_cv}\n\n"
-                        f"Create a personalized cover letter for this job description:\n{job_description}"
-                    )
-                }
-            ]
-        )
-
-        # Extract ChatGPT's generated cover letter
-        cover_letter = response.choices[0].message.content.strip()
+        cache = get_cache()
+        key = cache_key(user_cv, job_description, COVER_LETTER_PROMPT, MODEL, COVER_LETTER_SYSTEM_PROMPT)
+        cover_letter = cache.get(key)
 
-        # Save the cover letter to a Word document
-        cover_letter_path = os.path.join(cover_letter_folder, f"{job_id}_cl.docx")
-        document = Document()
-        document.add_heading('Cover Letter', level=1)
-        document.add_paragraph(cover_letter)
-        document.save(cover_letter_path)
+        if cover_letter is None:
+            # Generate the cover letter using ChatGPT
+            print(f"Generating cover letter for job ID {job_id}...")
+            response = client.chat.completions.create(
+                model=MODEL,
+                messages=build_cover_letter_messages(user_cv, job_description)
+            )
+
+            # Extract ChatGPT's generated cover letter
+            cover_letter = response.choices[0].message.content.strip()
+            cache.put(key, MODEL, cover_letter)
+        else:
+            print(f"Using cached cover letter for job ID {job_id}.")
 
-        print(f"Cover letter for job ID {job_id} saved to {cover_letter_path}")
+        # Save the cover letter to a Word document
+        path = save_cover_letter(job_id, cover_letter)
+        print(f"Cover letter for job ID {job_id} saved to {path}")
 
     except Exception as e:
         print(f"Error generating cover letter for job ID {job_id}: {e}")
@@ -85,5 +119,155 @@ def generate_cover_letter(job_id):
         # Close the database connection
         conn.close()
 
-#Enter job_id for which you want to generate your cover letter
-generate_cover_letter()
\ No newline at end of file
+def select_jobs(conn, job_ids=None, top_n=TOP_N, min_score=None, status='ongoing'):
+    """
+    Picks the jobs to write cover letters for: the given job IDs, or the top_n jobs with the
+    best ChatGPT score (at least min_score) and the given status. Jobs that already have a cover
+    letter are left out before counting, so top_n letters are picked when that many jobs qualify.
+
+    Parameters:
+    - status: Status in job_ids of the best-scored jobs, e.g. 'ongoing' (None for any status).
+      Given job IDs are used whatever their status.
+
+    Returns:
+    - (jobs, skipped): (job_id, job_description) rows to generate, and the job IDs skipped.
+    """
+    if job_ids:
+        placeholders = ", ".join("?" for _ in job_ids)
+        rows = conn.execute(
+            f"SELECT job_id, job_description FROM job_description WHERE job_id IN ({placeholders})",
+            [str(job_id) for job_id in job_ids],
+        ).fetchall()
+        missing = set(map(str, job_ids)) - {row[0] for row in rows}
+        for job_id in sorted(missing):
+            print(f"Job ID {job_id} not found in the job_description table.")
+        jobs = [(job_id, description) for job_id, description in rows if description]
+        skipped = [job_id for job_id, _ in jobs if os.path.exists(cover_letter_path(job_id))]
+        return [job for job in jobs if job[0] not in skipped], skipped
+
+    ensure_analysis_table(conn)
+    # No LIMIT: rows are read best first until top_n jobs without a letter are found
+    rows = conn.execute("""
+    SELECT jd.job_id, jd.job_description
+    FROM chatgpt_analysis a
+    JOIN job_description jd ON jd.job_id = a.job_id
+    JOIN job_ids ji ON ji.job_id = a.job_id
+    WHERE a.score IS NOT NULL AND (? IS NULL OR a.score >= ?)
+      AND (? IS NULL OR ji.status = ?)
+      AND jd.job_description IS NOT NULL AND jd.job_description != ''
+    ORDER BY a.score DESC, jd.posted_at DESC
+    """, (min_score, min_score, status, status))
+
+    jobs, skipped = [], []
+    for job_id, description in rows:
+        if len(jobs) >= top_n:
+            break
+        if os.path.exists(cover_letter_path(job_id)):
+            skipped.append(job_id)
+        else:
+            jobs.append((job_id, description))
+    return jobs, skipped
+
+async def _write_cover_letter(async_client, semaphore, request_bucket, token_bucket, user_cv, job_id, job_description):
+    cache = get_cache()
+    key = cache_key(user_cv, job_description, COVER_LETTER_PROMPT, MODEL, COVER_LETTER_SYSTEM_PROMPT)
+    cover_letter = cache.get(key)
+
+    try:
+        if cover_letter is None:
+            async with semaphore:
+                response = await create_with_retries(
+                    async_client, build_cover_letter_messages(user_cv, job_description), request_bucket, token_bucket
+                )
+            cover_letter = response.choices[0].message.content.strip()
+            cache.put(key, MODEL, cover_letter)
+        else:
+            print(f"Using cached cover letter for job ID {job_id}.")
+
+        # Written as soon as the letter arrives
+        path = await asyncio.to_thread(save_cover_letter, job_id, cover_letter)
+        print(f"Cover letter for job ID {job_id} saved to {path}")
+        return True
+    except Exception as e:
+        print(f"Error generating cover letter for job ID {job_id}: {e}")
+        return False
+
+async def generate_cover_letters_async(job_ids=None, top_n=TOP_N, min_score=None, status='ongoing', concurrency=CONCURRENCY,
+                                       requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE,
+                                       base_url=None):
+    """
+    Generates cover letters for several jobs at once and saves each one as it arrives.
+
+    The CV is read once and the jobs are selected with one database connection. Requests run
+    with at most `concurrency` in flight, within the rate limits, and transient errors are
+    retried (see async_analysis.py).
+
+    Parameters:
+    - job_ids: Optional list of job IDs; without it the top_n best-scored jobs are used.
+    - top_n: Number of best-scored jobs to pick when no job IDs are given.
+    - min_score: Optional minimum ChatGPT score for the picked jobs.
+    - status: Status of the picked jobs, e.g. 'ongoing' (None for any status).
+    - concurrency: Maximum number of requests in flight.
+    - requests_per_minute / tokens_per_minute: Rate limits enforced with token buckets.
+    - base_url: Optional OpenAI-compatible endpoint (e.g. a local fake server for testing).
+
+    Returns:
+    - Number of cover letters written.
+    """
+    cv_path = get_most_recent_pdf(cv_folder)
+    print(f"Using CV file: {cv_path}")
+    user_cv = extract_text_from_pdf(cv_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        jobs, skipped = select_jobs(conn, job_ids, top_n, min_score, status)
+    finally:
+        conn.close()
+
+    if skipped:
+        print(f"Skipping {len(skipped)} jobs that already have a cover letter.")
+    if not jobs:
+        print("No cover letters to generate.")
+        return 0
+
+    print(f"Generating {len(jobs)} cover letters with up to {concurrency} concurrent requests...")
+    async_client = AsyncOpenAI(
+        api_key=os.environ['OPENAI_API_KEY'],
+        base_url=base_url or os.getenv("OPENAI_BASE_URL"),
+        max_retries=0,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    request_bucket = TokenBucket(requests_per_minute)
+    token_bucket = TokenBucket(tokens_per_minute)
+
+    try:
+        results = await asyncio.gather(*[
+            _write_cover_letter(async_client, semaphore, request_bucket, token_bucket, user_cv, job_id, job_description)
+            for job_id, job_description in jobs
+        ])
+    finally:
+        await async_client.close()
+
+    written = sum(results)
+    print(f"Cover letters completed: {written} of {len(jobs)} saved to {cover_letter_folder}")
+    return written
+
+def generate_cover_letters(job_ids=None, top_n=TOP_N, **kwargs):
+    """
+    Synchronous entry point for generate_cover_letters_async.
+    """
+    return asyncio.run(generate_cover_letters_async(job_ids, top_n, **kwargs))
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate cover letters for the best-scored jobs or the given job IDs.")
+    parser.add_argument("job_ids", nargs="*", help="Job IDs to write cover letters for")
+    parser.add_argument("--top", type=int, default=TOP_N, help="Number of best-scored jobs when no job IDs are given")
+    parser.add_argument("--min-score", type=int, help="Only jobs with at least this ChatGPT score")
+    parser.add_argument("--status", default="ongoing", help="Only jobs with this status (empty for any status)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Requests in flight at once")
+    args = parser.parse_args()
+
+    generate_cover_letters(args.job_ids or None, args.top, min_score=args.min_score, status=args.status or None,
+                          concurrency=args.concurrency)
@@ -0,0 +1,260 @@
+import json
+import sqlite3
+import threading
+import time
+from db_writer import get_writer, flush_writer
+
+DB_PATH = 'linkedin_jobs.db'
+
+# Retry settings for jobs that could not be scraped
+MAX_ATTEMPTS = 4
+BACKOFF_SECONDS = 300         # Wait after the first failure, doubled for every further one
+MAX_BACKOFF_SECONDS = 6 * 3600
+PAGE_RESUME_HOURS = 12        # Collected search pages older than this are searched again instead of replayed
+
+# Databases whose interrupted jobs were already made pending again by this process
+_resumed_databases = set()
+
+
+def ensure_frontier_tables(conn):
+    """
+    crawl_frontier holds every job ID a run has to visit, with its state
+    (pending / in_progress / done / failed), the number of attempts and the last error.
+    crawl_pages holds the search result pages of an unfinished collection, so a restarted run
+    can replay them instead of loading them again.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS crawl_frontier (
+            job_id TEXT PRIMARY KEY,
+            queue TEXT,
+            state TEXT,
+            attempts INTEGER DEFAULT 0,
+            last_error TEXT,
+            next_attempt_at REAL,
+            added_at REAL,
+            updated_at REAL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_crawl_frontier_queue ON crawl_frontier (queue, state, next_attempt_at)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS crawl_pages (
+            search_key TEXT,
+            page_start INTEGER,
+            job_ids TEXT,
+            total INTEGER,
+            collected_at REAL,
+            PRIMARY KEY (search_key, page_start)
+        )
+    ''')
+    conn.commit()
+
+
+def mark_done(job_id):
+    """
+    Marks a job as done. Goes through the shared writer so the state is committed in the same
+    transaction as the job's status and details.
+    """
+    get_writer().add_frontier_done(job_id, time.time())
+
+
+def mark_failed(job_id, error):
+    """
+    Schedules a failed job for another attempt with exponential backoff, or marks it failed
+    once MAX_ATTEMPTS attempts have been used.
+    """
+    get_writer().add_frontier_failure(job_id, str(error)[:500], time.time(), MAX_ATTEMPTS, BACKOFF_SECONDS, MAX_BACKOFF_SECONDS)
+
+
+class SearchPages:
+    """
+    The result pages already collected for one search, keyed by their start offset.
+    """
+
+    def __init__(self, frontier, search_key):
+        self.frontier = frontier
+        self.search_key = search_key
+
+    def get(self, start):
+        """
+        Returns:
+        - (job_ids, total) of a page collected by an unfinished run, or None.
+        """
+        row = self.frontier.conn.execute(
+            "SELECT job_ids, total FROM crawl_pages WHERE search_key = ? AND page_start = ? AND collected_at >= ?",
+            (self.search_key, start, time.time() - PAGE_RESUME_HOURS * 3600),
+        ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def put(self, start, job_ids, total=None):
+        with self.frontier.lock:
+            self.frontier.conn.execute(
+                "INSERT OR REPLACE INTO crawl_pages (search_key, page_start, job_ids, total, collected_at) VALUES (?, ?, ?, ?, ?)",
+                (self.search_key, start, json.dumps(job_ids), total, time.time()),
+            )
+            self.frontier.conn.commit()
+
+    def clear(self):
+        """
+        Forgets the pages once the collection has finished, so the next run searches again.
+        """
+        with self.frontier.lock:
+            self.frontier.conn.execute("DELETE FROM crawl_pages WHERE search_key = ?", (self.search_key,))
+            self.frontier.conn.commit()
+
+
+class Frontier:
+    """
+    Durable work queue for the scraping stages.
+
+    Job IDs are added to a queue ("new" for search results, "recheck" for ongoing jobs) and
+    claimed by a run, which moves them to in_progress. Jobs are marked done or failed as they are
+    stored (see mark_done and mark_failed), failed jobs come back after a backoff. Jobs left
+    in_progress by a killed run are pending again when the next process first opens the frontier;
+    later instances in the same process leave the jobs claimed by earlier ones alone.
+
+    Usage:
+        with Frontier() as frontier:
+            frontier.add(job_ids, "new")
+            get_job_details(driver, frontier.claim("new"))
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.lock = threading.Lock()
+        self._claimed = {}  # queue -> job IDs claimed through this instance
+        ensure_frontier_tables(self.conn)
+
+        if db_path in _resumed_databases:
+            return
+        _resumed_databases.add(db_path)
+        resumed = self.conn.execute(
+            "UPDATE crawl_frontier SET state = 'pending', last_error = 'interrupted' WHERE state = 'in_progress'"
+        ).rowcount
+        self.conn.commit()
+        if resumed:
+            print(f"Resuming {resumed} jobs left unfinished by the previous run.")
+
+    def add(self, job_ids, queue, requeue_failed=False):
+        """
+        Adds job IDs as pending. Jobs that are already pending or in progress are left as they
+        are, done jobs are queued again, failed jobs stay failed until retry_failed is called
+        (or requeue_failed is set, for queues that come back on their own schedule).
+
+        Returns:
+        - Number of jobs that became pending.
+        """
+        now = time.time()
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.executemany('''
+                INSERT INTO crawl_frontier (job_id, queue, state, attempts, next_attempt_at, added_at, updated_at)
+                VALUES (?, ?, 'pending', 0, ?, ?, ?)
+                ON CONFLICT(job_id) DO UPDATE SET
+                    queue = excluded.queue,
+                    state = 'pending',
+                    attempts = 0,
+                    last_error = NULL,
+                    next_attempt_at = excluded.next_attempt_at,
+                    updated_at = excluded.updated_at
+                WHERE crawl_frontier.state = 'done' OR (? AND crawl_frontier.state = 'failed')
+            ''', [(job_id, queue, now, now, now, requeue_failed) for job_id in dict.fromkeys(job_ids)])
+            self.conn.commit()
+            return self.conn.total_changes - before
+
+    def claim(self, queue, limit=None):
+        """
+        Moves the pending jobs of a queue whose retry time has come to in_progress.
+
+        Returns:
+        - List of claimed job IDs, oldest first.
+        """
+        now = time.time()
+        with self.lock:
+            job_ids = [row[0] for row in self.conn.execute(
+                "SELECT job_id FROM crawl_frontier WHERE queue = ? AND state = 'pending' AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at, added_at LIMIT ?",
+                (queue, now, -1 if limit is None else limit),
+            )]
+            self.conn.executemany(
+                "UPDATE crawl_frontier SET state = 'in_progress', attempts = attempts + 1, updated_at = ? WHERE job_id = ?",
+                [(now, job_id) for job_id in job_ids],
+            )
+            self.conn.commit()
+            self._claimed.setdefault(queue, set()).update(job_ids)
+        return job_ids
+
+    def release(self, queue):
+        """
+        Puts the jobs of a queue that this frontier claimed but that were not processed (e.g. when
+        a run's budget ran out) back to pending, taking back the attempt claim() counted.
+
+        Returns:
+        - Number of jobs released.
+        """
+        flush_writer()  # Jobs processed so far must be marked done first
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "UPDATE crawl_frontier SET state = 'pending', attempts = MAX(attempts - 1, 0), updated_at = ? "
+                "WHERE job_id = ? AND queue = ? AND state = 'in_progress'",
+                [(time.time(), job_id, queue) for job_id in self._claimed.pop(queue, ())],
+            )
+            self.conn.commit()
+            return self.conn.total_changes - before
+
+    def retry_failed(self, queue=None):
+        """
+        Gives jobs that used up their attempts a fresh set of attempts.
+        """
+        with self.lock:
+            count = self.conn.execute(
+                "UPDATE crawl_frontier SET state = 'pending', attempts = 0, next_attempt_at = ? "
+                "WHERE state = 'failed' AND (? IS NULL OR queue = ?)",
+                (time.time(), queue, queue),
+            ).rowcount
+            self.conn.commit()
+        return count
+
+    def search_pages(self, search_key):
+        return SearchPages(self, search_key)
+
+    def counts(self):
+        """
+        Returns:
+        - {queue: {state: count}}
+        """
+        counts = {}
+        for queue, state, count in self.conn.execute(
+            "SELECT queue, state, COUNT(*) FROM crawl_frontier GROUP BY queue, state"
+        ):
+            counts.setdefault(queue, {})[state] = count
+        return counts
+
+    def report(self):
+        for queue, states in sorted(self.counts().items()):
+            print(f"Frontier '{queue}': " + ", ".join(f"{count} {state}" for state, count in sorted(states.items())))
+        failed = self.conn.execute(
+            "SELECT job_id, attempts, last_error FROM crawl_frontier WHERE state = 'failed' ORDER BY updated_at DESC LIMIT 5"
+        ).fetchall()
+        for job_id, attempts, last_error in failed:
+            print(f"  Job ID {job_id} failed after {attempts} attempts: {last_error}")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Shows the frontier, or gives failed jobs new attempts with --retry-failed
+    with Frontier() as frontier:
+        if "--retry-failed" in sys.argv:
+            print(f"{frontier.retry_failed()} failed jobs are pending again.")
+        frontier.report()
@@ -0,0 +1,255 @@
+import atexit
+import sqlite3
+import threading
+import time
+from metrics import metrics
+from migrations import parse_applicants, parse_posted_date
+
+# Default database and flush settings
+DB_PATH = 'linkedin_jobs.db'
+FLUSH_ROWS = 50          # Flush once this many rows are buffered
+FLUSH_SECONDS = 5.0      # ...or once this many seconds have passed since the last flush
+SYNCHRONOUS = 'NORMAL'   # OFF / NORMAL / FULL - NORMAL is safe with WAL and avoids an fsync per commit
+
+UPSERT_STATUS_SQL = '''
+    INSERT INTO job_ids (job_id, status, timestamp_added, timestamp_updated, job_url)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(job_id) DO UPDATE SET
+        status = excluded.status,
+        timestamp_updated = excluded.timestamp_updated,
+        job_url = excluded.job_url
+'''
+
+UPSERT_DETAILS_SQL = '''
+    INSERT INTO job_description (
+        job_id, company_name, title_name, job_description, location, posted_date, number_applicants, work_model,
+        applicants_count, posted_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(job_id) DO UPDATE SET
+        company_name = excluded.company_name,
+        title_name = excluded.title_name,
+        job_description = excluded.job_description,
+        location = excluded.location,
+        posted_date = excluded.posted_date,
+        number_applicants = excluded.number_applicants,
+        work_model = excluded.work_model,
+        applicants_count = excluded.applicants_count,
+        posted_at = excluded.posted_at
+'''
+
+UPSERT_ANALYSIS_SQL = '''
+    INSERT INTO chatgpt_analysis (job_id, chatgpt_message, score)
+    VALUES (?, ?, ?)
+    ON CONFLICT(job_id) DO UPDATE SET
+        chatgpt_message = excluded.chatgpt_message,
+        score = excluded.score
+'''
+
+UPSERT_REVISIT_SQL = '''
+    INSERT INTO job_revisits (job_id, last_checked_at, next_check_at, content_hash, unchanged_checks)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(job_id) DO UPDATE SET
+        last_checked_at = excluded.last_checked_at,
+        next_check_at = excluded.next_check_at,
+        content_hash = excluded.content_hash,
+        unchanged_checks = excluded.unchanged_checks
+'''
+
+# Crawl frontier results, committed together with the job rows they belong to (see crawl_frontier.py)
+FRONTIER_DONE_SQL = '''
+    UPDATE crawl_frontier SET state = 'done', last_error = NULL, updated_at = ? WHERE job_id = ?
+'''
+
+FRONTIER_FAILED_SQL = '''
+    UPDATE crawl_frontier SET
+        state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+        last_error = ?,
+        next_attempt_at = ? + MIN(?, ? * (1 << MAX(attempts - 1, 0))),
+        updated_at = ?
+    WHERE job_id = ?
+'''
+
+
+class DBWriter:
+    """
+    A single long-lived SQLite writer that buffers rows and flushes them in batches.
+
+    Status rows, job detail rows, ChatGPT analysis rows, revisit checks and crawl frontier results
+    are kept in memory and written with one `executemany` per table inside a single transaction, either when
+    `flush_rows` rows are buffered or when `flush_seconds` have passed. Buffered rows are
+    also flushed when the writer is closed and at interpreter exit.
+    """
+
+    def __init__(self, db_path=DB_PATH, flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS, synchronous=SYNCHRONOUS):
+        self.db_path = db_path
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(f'PRAGMA synchronous={synchronous}')
+
+        self._lock = threading.RLock()
+        self._status_rows = []
+        self._detail_rows = []
+        self._analysis_rows = []
+        self._revisit_rows = []
+        self._frontier_done_rows = []
+        self._frontier_failed_rows = []
+        self._last_flush = time.monotonic()
+        self._closed = False
+        self._dedup_ready = False
+
+        # Background timer so rows never wait longer than flush_seconds
+        self._stop_event = threading.Event()
+        self._timer = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._timer.start()
+
+        atexit.register(self.close)
+
+    def _pending(self):
+        return (len(self._status_rows) + len(self._detail_rows) + len(self._analysis_rows) + len(self._revisit_rows)
+                + len(self._frontier_done_rows) + len(self._frontier_failed_rows))
+
+    def _maybe_flush(self):
+        if self._pending() >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_seconds:
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # flush() has logged it and kept the rows, only an explicit flush() or close() raises
+                pass
+
+    def _flush_periodically(self):
+        while not self._stop_event.wait(self.flush_seconds):
+            with self._lock:
+                if self._pending() and time.monotonic() - self._last_flush >= self.flush_seconds:
+                    try:
+                        self.flush()
+                    except sqlite3.Error:
+                        pass  # flush() has logged it and kept the rows, retry on the next tick
+
+    def add_status(self, job_id, status, job_url, current_time):
+        with self._lock:
+            self._status_rows.append((job_id, status, current_time, current_time, job_url))
+            self._maybe_flush()
+
+    def add_details(self, job_id, company_name, title_name, job_description, location, posted_date, num_applicants, work_model):
+        with self._lock:
+            # Numeric copies of the applicant count and posting date (see migrations.py)
+            self._detail_rows.append((
+                job_id, company_name, title_name, job_description, location, posted_date, num_applicants, work_model,
+                parse_applicants(num_applicants), parse_posted_date(posted_date, time.time())
+            ))
+            self._maybe_flush()
+
+    def add_analysis(self, job_id, chatgpt_message, score=None):
+        with self._lock:
+            self._analysis_rows.append((job_id, chatgpt_message, score))
+            self._maybe_flush()
+
+    def add_revisit(self, job_id, checked_at, next_check_at, content_hash, unchanged_checks):
+        with self._lock:
+            self._revisit_rows.append((job_id, checked_at, next_check_at, content_hash, unchanged_checks))
+            self._maybe_flush()
+
+    def add_frontier_done(self, job_id, updated_at):
+        with self._lock:
+            self._frontier_done_rows.append((updated_at, job_id))
+            self._maybe_flush()
+
+    def add_frontier_failure(self, job_id, error, updated_at, max_attempts, backoff_seconds, max_backoff_seconds):
+        with self._lock:
+            self._frontier_failed_rows.append(
+                (max_attempts, error, updated_at, max_backoff_seconds, backoff_seconds, updated_at, job_id)
+            )
+            self._maybe_flush()
+
+    def flush(self):
+        """
+        Writes all buffered rows in one transaction.
+
+        Status rows go first so that job_description rows always reference an existing job_ids row,
+        and frontier results go last so a job is only marked done together with its data.
+        """
+        with self._lock:
+            if self._closed or not self._pending():
+                self._last_flush = time.monotonic()
+                return
+
+            status_rows, detail_rows, analysis_rows = self._status_rows, self._detail_rows, self._analysis_rows
+            rows = self._pending()
+            try:
+                with metrics.span("db_commit"), self.conn:
+                    if status_rows:
+                        self.conn.executemany(UPSERT_STATUS_SQL, status_rows)
+                    if detail_rows:
+                        self.conn.executemany(UPSERT_DETAILS_SQL, detail_rows)
+                        self._index_descriptions(detail_rows)
+                    if analysis_rows:
+                        self.conn.executemany(UPSERT_ANALYSIS_SQL, analysis_rows)
+                    if self._revisit_rows:
+                        self.conn.executemany(UPSERT_REVISIT_SQL, self._revisit_rows)
+                    if self._frontier_done_rows:
+                        self.conn.executemany(FRONTIER_DONE_SQL, self._frontier_done_rows)
+                    if self._frontier_failed_rows:
+                        self.conn.executemany(FRONTIER_FAILED_SQL, self._frontier_failed_rows)
+            except sqlite3.Error as e:
+                # Keep the rows buffered so the next flush can retry them
+                print(f"Error flushing rows to the database: {e}")
+                raise
+
+            self._status_rows, self._detail_rows, self._analysis_rows, self._revisit_rows = [], [], [], []
+            self._frontier_done_rows, self._frontier_failed_rows = [], []
+            self._last_flush = time.monotonic()
+            metrics.count("db_rows", rows)
+
+    def _index_descriptions(self, detail_rows):
+        """
+        Adds the new descriptions to the near-duplicate index (see near_duplicates.py) in the
+        same transaction.
+        """
+        from near_duplicates import ensure_dedup_tables, index_descriptions
+
+        if not self._dedup_ready:
+            ensure_dedup_tables(self.conn)
+            self._dedup_ready = True
+        index_descriptions(self.conn, [(row[0], row[3]) for row in detail_rows])
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._stop_event.set()
+            try:
+                self.flush()
+            finally:
+                self._closed = True
+                self.conn.close()
+                atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """
+    Returns the process-wide DBWriter, creating it on first use.
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None or _writer._closed:
+            _writer = DBWriter()
+        return _writer
+
+def flush_writer():
+    """
+    Flushes the shared writer if one has been created.
+    """
+    if _writer is not None and not _writer._closed:
+        _writer.flush()
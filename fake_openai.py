@@ -0,0 +1,311 @@
+"""
+A small OpenAI-compatible HTTP server for testing the analysis code without calling the real API.
+
+Serves chat completions plus the file and batch endpoints used by batch_analysis.py.
+
+Usage:
+    python fake_openai.py --port 8001 --latency 0.2 --rate-limit 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=test python main.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    server_version = "FakeOpenAI/1.0"
+
+    def log_message(self, format, *args):
+        pass  # Keep test output quiet
+
+    def _send_json(self, status, payload, headers=None):
+        self._send_bytes(status, json.dumps(payload).encode(), "application/json", headers)
+
+    def _send_bytes(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length)
+
+    def _read_json(self):
+        return json.loads(self._read_body() or b"{}")
+
+    def _path(self):
+        # Accept both /v1/... and /... so the base URL may or may not include /v1
+        return re.sub(r"^/v1", "", self.path.split("?")[0]).rstrip("/")
+
+    def do_POST(self):
+        path = self._path()
+        if path == "/chat/completions":
+            self._chat_completions()
+        elif path == "/files":
+            self._upload_file()
+        elif path == "/batches":
+            self._create_batch()
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_GET(self):
+        path = self._path()
+        file_content = re.fullmatch(r"/files/([^/]+)/content", path)
+        batch = re.fullmatch(r"/batches/([^/]+)", path)
+        if file_content:
+            self._file_content(file_content.group(1))
+        elif batch:
+            self._retrieve_batch(batch.group(1))
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def _chat_completions(self):
+        request = self._read_json()
+        self.server.count_request()
+        self.server.enter_request()
+        try:
+            time.sleep(self.server.settings["latency"])
+            failure = self.server.roll_failure()
+        finally:
+            self.server.leave_request()
+
+        if failure:
+            status, payload = failure
+            headers = {"Retry-After": str(self.server.settings["retry_after"])} if status == 429 else None
+            self._send_json(status, payload, headers)
+            return
+        self._send_json(200, self.server.completion(request))
+
+    def _upload_file(self):
+        # Parse the multipart/form-data upload with the email parser
+        message = BytesParser(policy=HTTP).parsebytes(
+            b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + self._read_body()
+        )
+        fields = {}
+        filename = "upload.jsonl"
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if name == "file":
+                filename = part.get_filename() or filename
+            fields[name] = part.get_payload(decode=True)
+
+        file_object = self.server.store_file(fields.get("file", b""), filename, (fields.get("purpose") or b"batch").decode())
+        self._send_json(200, file_object)
+
+    def _file_content(self, file_id):
+        content = self.server.files.get(file_id)
+        if content is None:
+            self._send_json(404, {"error": {"message": f"No such file {file_id}"}})
+            return
+        self._send_bytes(200, content["data"], "application/octet-stream")
+
+    def _create_batch(self):
+        request = self._read_json()
+        if request.get("input_file_id") not in self.server.files:
+            self._send_json(400, {"error": {"message": "Unknown input_file_id"}})
+            return
+        self._send_json(200, self.server.create_batch(request))
+
+    def _retrieve_batch(self, batch_id):
+        batch = self.server.retrieve_batch(batch_id)
+        if batch is None:
+            self._send_json(404, {"error": {"message": f"No such batch {batch_id}"}})
+            return
+        self._send_json(200, batch)
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, rate_limit=0.0, server_error=0.0, retry_after=0, reply="7",
+                 batch_latency=0.0):
+        super().__init__(address, FakeOpenAIHandler)
+        self.settings = {
+            "latency": latency,
+            "rate_limit": rate_limit,
+            "server_error": server_error,
+            "retry_after": retry_after,
+            "reply": reply,
+            "batch_latency": batch_latency,
+        }
+        self.request_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0   # Most chat requests handled at the same time, to check client concurrency
+        self.files = {}
+        self.batches = {}
+        self._lock = threading.Lock()
+
+    def count_request(self):
+        with self._lock:
+            self.request_count += 1
+
+    def enter_request(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave_request(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def roll_failure(self):
+        """
+        Returns (status, payload) for an injected 429 or 500 at the configured rates, or None.
+        """
+        roll = random.random()
+        if roll < self.settings["rate_limit"]:
+            return 429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}}
+        if roll < self.settings["rate_limit"] + self.settings["server_error"]:
+            return 500, {"error": {"message": "Internal server error", "type": "server_error"}}
+        return None
+
+    def completion(self, request):
+        """
+        Builds a chat completion. Structured-output requests get a JSON answer that fills every
+        required integer field with the configured reply.
+        """
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in request.get("messages", [])) // 4
+        content = self.settings["reply"]
+
+        schema = (request.get("response_format") or {}).get("json_schema", {}).get("schema")
+        if schema:
+            job_ids = schema["properties"]["scores"].get("required", [])
+            content = json.dumps({"scores": {job_id: int(self.settings["reply"]) for job_id in job_ids}})
+
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": 1,
+                "total_tokens": prompt_tokens + 1,
+            },
+        }
+
+    def store_file(self, data, filename, purpose):
+        file_object = {
+            "id": f"file-{uuid.uuid4().hex}",
+            "object": "file",
+            "bytes": len(data),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+        with self._lock:
+            self.files[file_object["id"]] = dict(file_object, data=data)
+        return file_object
+
+    def create_batch(self, request):
+        batch = {
+            "id": f"batch_{uuid.uuid4().hex}",
+            "object": "batch",
+            "endpoint": request.get("endpoint", "/v1/chat/completions"),
+            "errors": None,
+            "input_file_id": request["input_file_id"],
+            "completion_window": request.get("completion_window", "24h"),
+            "status": "in_progress",
+            "output_file_id": None,
+            "error_file_id": None,
+            "created_at": int(time.time()),
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        with self._lock:
+            self.batches[batch["id"]] = dict(batch, started=time.monotonic())
+        return batch
+
+    def retrieve_batch(self, batch_id):
+        with self._lock:
+            batch = self.batches.get(batch_id)
+            if batch is None:
+                return None
+            if batch["status"] == "in_progress" and time.monotonic() - batch["started"] >= self.settings["batch_latency"]:
+                self._run_batch(batch)
+            return {key: value for key, value in batch.items() if key != "started"}
+
+    def _run_batch(self, batch):
+        """
+        Answers every request line of the input file, sending injected failures to the error file.
+        """
+        output_lines, error_lines = [], []
+        for line in self.files[batch["input_file_id"]]["data"].decode().splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            failure = self.roll_failure()
+            result = {"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": request["custom_id"]}
+            if failure:
+                status, payload = failure
+                error_lines.append(dict(result, response={"status_code": status, "body": payload},
+                                        error={"code": str(status), "message": payload["error"]["message"]}))
+            else:
+                output_lines.append(dict(result, response={"status_code": 200, "body": self.completion(request["body"])},
+                                         error=None))
+
+        def to_file(lines, suffix):
+            if not lines:
+                return None
+            data = "".join(json.dumps(line) + "\n" for line in lines).encode()
+            file_id = f"file-{uuid.uuid4().hex}"
+            self.files[file_id] = {"id": file_id, "data": data, "filename": f"{batch['id']}_{suffix}.jsonl"}
+            return file_id
+
+        batch.update({
+            "status": "completed",
+            "output_file_id": to_file(output_lines, "output"),
+            "error_file_id": to_file(error_lines, "error"),
+            "completed_at": int(time.time()),
+            "request_counts": {
+                "total": len(output_lines) + len(error_lines),
+                "completed": len(output_lines),
+                "failed": len(error_lines),
+            },
+        })
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_fake_openai(port=0, **settings):
+    """
+    Starts the fake server in a background thread and returns it. Use server.base_url as the OpenAI base URL.
+    """
+    server = FakeOpenAIServer(("127.0.0.1", port), **settings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI-compatible server.")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--server-error", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--batch-latency", type=float, default=0.0, help="Seconds before a batch completes")
+    parser.add_argument("--reply", default="7", help="Message content returned for every completion")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(("127.0.0.1", args.port), latency=args.latency, rate_limit=args.rate_limit,
+                              server_error=args.server_error, reply=args.reply, batch_latency=args.batch_latency)
+    print(f"Fake OpenAI server listening on {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,259 @@
+"""
+A small LinkedIn-like HTTP server for running the scraper locally, e.g. for benchmarks.
+
+Serves a login form, the feed, search result pages (HTML and the voyager search API) and job
+pages built from the saved pages in fixtures/jobs/: ongoing jobs with generated titles and
+descriptions, and cancelled and deleted jobs at configurable rates.
+
+Usage:
+    python fixture_server.py --port 8002 --jobs 200 --latency 0.05
+    LINKEDIN_BASE_URL=http://127.0.0.1:8002 LINKEDIN_EMAIL=x LINKEDIN_PASSWORD=x python main.py
+"""
+import argparse
+import html
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+FIXTURE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "jobs")
+FIRST_JOB_ID = 4200000000
+PAGE_SIZE = 25
+
+# Vocabulary of the generated postings
+TITLES = ["Data Analyst", "Senior Data Analyst", "Financial Analyst", "Risk Analyst", "BI Developer",
+          "Data Engineer", "Product Analyst", "Quantitative Analyst", "Nurse", "Sales Manager"]
+COMPANIES = ["Acme Fintech", "Beta Bank", "Gamma Insurance", "Delta Payments", "Epsilon Health", "Zeta Retail"]
+LOCATIONS = ["Berlin, Germany", "Munich, Germany", "Hamburg, Germany", "Remote"]
+SKILLS = ["Python", "SQL", "Excel", "Power BI", "Tableau", "finance", "fintech", "statistics", "dbt", "Spark",
+          "patient care", "negotiation", "reporting", "forecasting", "stakeholder management"]
+FILLER = ("you will work with our team on projects across the company and help us grow while learning "
+          "new tools in a friendly environment with flexible hours and a modern office").split()
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>LinkedIn Login</title></head>
+<body><form method="post" action="/login">
+<input id="username" name="session_key" type="text">
+<input id="password" name="session_password" type="password">
+<button type="submit">Sign in</button>
+</form></body></html>"""
+
+FEED_PAGE = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>Feed | LinkedIn</title></head>
+<body><header id="global-nav" class="global-nav">LinkedIn</header><main id="main">Feed</main></body></html>"""
+
+SEARCH_PAGE = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>Jobs | LinkedIn</title></head>
+<body><main id="main"><div>
+<div class="jobs-search-box">Filters</div>
+<div><div><div class="jobs-search-results-list" style="height: 400px; overflow-y: auto;">
+{cards}
+</div></div></div>
+</div></main>
+<script>fetch("/voyager/api/voyagerJobsDashJobCards?count={count}&start={start}");</script>
+</body></html>"""
+
+SEARCH_CARD = '<div style="height: 120px;"><a href="/jobs/view/{job_id}/?refId=fixture">{title}</a></div>'
+
+
+def _read_fixture(job_id):
+    with open(os.path.join(FIXTURE_FOLDER, f"{job_id}.html"), encoding="utf-8") as f:
+        return f.read()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    server_version = "FixtureLinkedIn/1.0"
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output quiet
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or []):
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _logged_in(self):
+        return "li_at=" in (self.headers.get("Cookie") or "")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        path = url.path.rstrip("/") or "/"
+        self.server.count_request(path)
+        time.sleep(self.server.settings["latency"])
+
+        job = re.fullmatch(r"/jobs/view/(\d+)", path)
+        if path == "/login":
+            self._send(200, LOGIN_PAGE)
+        elif path in ("/", "/feed"):
+            self._send(200, FEED_PAGE if self._logged_in() else LOGIN_PAGE)
+        elif path == "/jobs/search":
+            self._send(200, self.server.search_page(int(query.get("start", ["0"])[0])))
+        elif path == "/voyager/api/voyagerJobsDashJobCards":
+            start, count = int(query.get("start", ["0"])[0]), int(query.get("count", [str(PAGE_SIZE)])[0])
+            self._send(200, json.dumps(self.server.search_response(start, count)), "application/json")
+        elif job:
+            page = self.server.job_page(int(job.group(1)))
+            self._send(200 if page else 404, page or _read_fixture(4100000003))
+        else:
+            self._send(404, "Not found")
+
+    def do_POST(self):
+        path = urlparse(self.path).path.rstrip("/")
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.count_request(path)
+        if path == "/login":
+            # Any credentials are accepted
+            self._send(302, "", headers=[
+                ("Location", "/feed/"),
+                ("Set-Cookie", "li_at=fixture-session; Path=/"),
+                ("Set-Cookie", 'JSESSIONID="ajax:0000000000"; Path=/'),
+            ])
+        else:
+            self._send(404, "Not found")
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, jobs=100, latency=0.0, cancelled_rate=0.1, deleted_rate=0.05, duplicate_rate=0.1,
+                 seed=0):
+        super().__init__(address, FixtureHandler)
+        self.settings = {
+            "jobs": jobs,
+            "latency": latency,
+            "cancelled_rate": cancelled_rate,
+            "deleted_rate": deleted_rate,
+            "duplicate_rate": duplicate_rate,
+            "seed": seed,
+        }
+        self.request_counts = {}
+        self._lock = threading.Lock()
+        self._ongoing_template = _read_fixture(4100000001)
+        self._cancelled_template = _read_fixture(4100000002)
+        self._deleted_template = _read_fixture(4100000003)
+
+    def count_request(self, path):
+        kind = re.sub(r"/\d+", "/{id}", path)
+        with self._lock:
+            self.request_counts[kind] = self.request_counts.get(kind, 0) + 1
+
+    @property
+    def job_ids(self):
+        return [FIRST_JOB_ID + n for n in range(self.settings["jobs"])]
+
+    def _rng(self, job_id):
+        return random.Random(f"{self.settings['seed']}-{job_id}")
+
+    def status(self, job_id):
+        roll = self._rng(job_id).random()
+        if roll < self.settings["cancelled_rate"]:
+            return "cancelled"
+        if roll < self.settings["cancelled_rate"] + self.settings["deleted_rate"]:
+            return "deleted"
+        return "ongoing"
+
+    def posting(self, job_id):
+        """
+        The generated content of an ongoing job. A share of the jobs repost the content of the
+        job before them, as LinkedIn reposts do.
+        """
+        rng = self._rng(job_id)
+        rng.random()  # Same draw as status()
+        if job_id > FIRST_JOB_ID and rng.random() < self.settings["duplicate_rate"]:
+            source = self.posting(job_id - 1)
+            return {**source, "location": rng.choice(LOCATIONS)}
+
+        title = rng.choice(TITLES)
+        skills = rng.sample(SKILLS, 4)
+        paragraphs = [
+            f"We are looking for a {title} with experience in {skills[0]} and {skills[1]}.",
+            f"Responsibilities:<br>Build {skills[2]} models<br>Own {skills[3]} for the team",
+            " ".join(rng.choice(FILLER) for _ in range(rng.randint(60, 200))).capitalize() + ".",
+        ]
+        return {
+            "title": title,
+            "company": rng.choice(COMPANIES),
+            "location": rng.choice(LOCATIONS),
+            "posted": f"{rng.randint(1, 6)} {rng.choice(['hours', 'days', 'weeks'])} ago",
+            "applicants": f"{rng.randint(1, 300)} applicants",
+            "paragraphs": paragraphs,
+        }
+
+    def job_page(self, job_id):
+        """
+        Returns:
+        - The HTML of a job page, or None for job IDs the server does not have.
+        """
+        if not FIRST_JOB_ID <= job_id < FIRST_JOB_ID + self.settings["jobs"]:
+            return None
+        status = self.status(job_id)
+        if status == "cancelled":
+            return self._cancelled_template.replace("4100000002", str(job_id))
+        if status == "deleted":
+            return self._deleted_template
+
+        posting = self.posting(job_id)
+        description = "\n".join(f'      <p dir="ltr">{paragraph}</p>' for paragraph in posting["paragraphs"])
+        page = re.sub(r'      <p dir="ltr">.*</p>', "", self._ongoing_template, count=1, flags=re.S)
+        for old, new in (("Senior Data Analyst", posting["title"]), ("Acme Fintech", posting["company"]),
+                         ("Berlin, Germany", posting["location"]), ("2 weeks ago", posting["posted"]),
+                         ("Over 100 applicants", posting["applicants"]), ("4100000001", str(job_id))):
+            page = page.replace(old, html.escape(new))
+        return page.replace("About the job</h2>", "About the job</h2>\n" + description)
+
+    def search_page(self, start):
+        job_ids = self.job_ids[start:start + PAGE_SIZE]
+        cards = "\n".join(SEARCH_CARD.format(job_id=job_id, title=f"Job {job_id}") for job_id in job_ids)
+        return SEARCH_PAGE.format(cards=cards, count=PAGE_SIZE, start=start)
+
+    def search_response(self, start, count):
+        job_ids = self.job_ids[start:start + count]
+        return {
+            "data": {
+                "paging": {"count": count, "start": start, "total": self.settings["jobs"], "links": []},
+                "elements": [
+                    {"jobCardUnionUrn": f"urn:li:fsd_jobPostingCard:({job_id},JOBS_SEARCH)"} for job_id in job_ids
+                ],
+            }
+        }
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_fixture_server(port=0, **settings):
+    """
+    Starts the fixture server in a background thread and returns it. Use server.base_url as LINKEDIN_BASE_URL.
+    """
+    server = FixtureServer(("127.0.0.1", port), **settings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a LinkedIn-like fixture server.")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--jobs", type=int, default=100, help="Number of jobs in the search results")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--cancelled-rate", type=float, default=0.1, help="Fraction of jobs that are cancelled")
+    parser.add_argument("--deleted-rate", type=float, default=0.05, help="Fraction of jobs that are deleted")
+    parser.add_argument("--duplicate-rate", type=float, default=0.1, help="Fraction of jobs that repost the previous one")
+    args = parser.parse_args()
+
+    server = FixtureServer(("127.0.0.1", args.port), jobs=args.jobs, latency=args.latency,
+                           cancelled_rate=args.cancelled_rate, deleted_rate=args.deleted_rate,
+                           duplicate_rate=args.duplicate_rate)
+    print(f"Fixture LinkedIn server listening on {server.base_url}")
+    server.serve_forever()
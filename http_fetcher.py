@@ -0,0 +1,267 @@
+import asyncio
+import json
+import os
+import random
+import re
+import time
+import httpx
+from lxml import html as lxml_html
+from page_scraper import JOB_VIEW_URL, scrape_job_page, save_job_record, extract_job_record
+from db_writer import flush_writer
+from crawl_frontier import mark_failed
+from metrics import metrics
+
+# HTTP fetch settings
+HTTP_TIMEOUT_SECONDS = 20
+MIN_DELAY_SECONDS = 1.0   # Politeness delay between requests
+MAX_CONNECTIONS = 4
+FIXTURE_FOLDER = "./fixtures/jobs/"
+
+
+class LayoutNotRecognized(Exception):
+    """
+    Raised when a fetched job page does not contain any of the elements the parser knows.
+    """
+
+
+def _has_class(*classes):
+    # XPath equivalent of a CSS compound class selector
+    return " and ".join(f"contains(concat(' ', normalize-space(@class), ' '), ' {c} ')" for c in classes)
+
+
+XPATH_CANCELLED = f"//span[{_has_class('artdeco-inline-feedback__message')}]"
+XPATH_DELETED = f"//p[{_has_class('jobs-box__body', 'jobs-no-job__error-msg')}]"
+XPATH_COMPANY = f"//*[{_has_class('job-details-jobs-unified-top-card__company-name')}]"
+XPATH_TITLE = f"//h1[{_has_class('t-24', 't-bold', 'inline')}]"
+XPATH_PARAGRAPHS = "//p[@dir='ltr']"
+XPATH_ADDITIONAL_INFO = f"//div[{_has_class('t-black--light', 'mt2')} and @dir='ltr']"
+XPATH_WORK_MODEL = f"//span[{_has_class('ui-label', 'ui-label--accent-3', 'text-body-small')}]"
+
+
+def inner_text(element):
+    """
+    Approximates the browser's innerText: <br> becomes a line break and runs of whitespace collapse to one space.
+    """
+    parts = []
+    for node in element.iter():
+        if node.tag == "br":
+            parts.append("\n")
+        if node is not element and node.tag in ("p", "div", "li") and parts:
+            parts.append("\n")
+        if node.text:
+            parts.append(node.text)
+        if node is not element and node.tail:
+            parts.append(node.tail)
+    text = re.sub(r"[^\S\n]+", " ", "".join(parts))
+    return re.sub(r" *\n *", "\n", text).strip()
+
+
+def parse_job_page(page_html, job_id):
+    """
+    Parses a job page fetched over HTTP into the same record extract_job_record returns.
+
+    Raises:
+    - LayoutNotRecognized: If the page has neither the status markers nor the job top card.
+    """
+    tree = lxml_html.fromstring(page_html)
+    record = {"job_id": job_id, "status": "ongoing"}
+
+    cancel_elements = tree.xpath(XPATH_CANCELLED)
+    if cancel_elements:
+        record["status"] = "cancelled" if "No longer accepting applications" in inner_text(cancel_elements[0]) else None
+        return record
+
+    deleted_elements = tree.xpath(XPATH_DELETED)
+    if deleted_elements:
+        record["status"] = "deleted" if "The job you were looking for was not found." in inner_text(deleted_elements[0]) else None
+        return record
+
+    company_elements = tree.xpath(XPATH_COMPANY)
+    title_elements = tree.xpath(XPATH_TITLE)
+    if not company_elements or not title_elements:
+        raise LayoutNotRecognized(f"Job ID {job_id}: top card not found in the fetched page")
+
+    record["company_name"] = inner_text(company_elements[0]).split("\n")[0].strip()
+    record["title_name"] = inner_text(title_elements[0]).strip()
+
+    paragraphs = [inner_text(p) for p in tree.xpath(XPATH_PARAGRAPHS)]
+    record["job_description"] = " ".join(text for text in paragraphs if text)
+
+    additional_info_elements = tree.xpath(XPATH_ADDITIONAL_INFO)
+    if additional_info_elements:
+        additional_info = inner_text(additional_info_elements[0])
+        location, posted_date, num_applicants = (additional_info.split(" · ") + ["Not Found"] * 3)[:3]
+    else:
+        location, posted_date, num_applicants = "Not Found", "Not Found", "Not Found"
+    record.update({"location": location, "posted_date": posted_date, "num_applicants": num_applicants})
+
+    labels = [inner_text(label) for label in tree.xpath(XPATH_WORK_MODEL)]
+    record["work_model"] = " · ".join(label for label in labels if label)
+
+    return record
+
+
+def _session_settings(driver):
+    """
+    Copies the logged-in browser's cookies and user agent for use by an HTTP client.
+    """
+    cookies = httpx.Cookies()
+    for cookie in driver.get_cookies():
+        cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+    headers = {
+        "User-Agent": driver.execute_script("return navigator.userAgent"),
+        "Accept": "text/html,application/xhtml+xml",
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+    return cookies, headers
+
+
+def http_client_from_driver(driver):
+    """
+    Creates a pooled keep-alive HTTP client that shares the Selenium session's login cookies.
+    """
+    cookies, headers = _session_settings(driver)
+    return httpx.Client(
+        cookies=cookies, headers=headers, timeout=HTTP_TIMEOUT_SECONDS, follow_redirects=True,
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+    )
+
+
+def fetch_job_details_http(driver, job_urls, min_delay=MIN_DELAY_SECONDS, on_record=None):
+    """
+    Fetches and stores job details over HTTP, using the browser only for pages the parser
+    does not recognize.
+
+    Parameters:
+    - driver: A logged-in WebDriver (see login_mainpage), used for its cookies and as fallback.
+    - job_urls: List of job IDs to process.
+    - min_delay: Minimum seconds between requests.
+    - on_record: Optional callable that receives every stored record (see streaming_pipeline.py).
+
+    Returns:
+    - Number of jobs that needed the browser fallback.
+    """
+    fallbacks = 0
+    with http_client_from_driver(driver) as client:
+        for job_id in job_urls:
+            start = time.monotonic()
+            record = None
+            try:
+                with metrics.span("http_fetch", page_type="job"):
+                    response = client.get(JOB_VIEW_URL.format(job_id=job_id))
+                response.raise_for_status()
+                record = parse_job_page(response.text, job_id)
+                save_job_record(record)
+            except (LayoutNotRecognized, httpx.HTTPError) as e:
+                print(f"Falling back to the browser for job ID {job_id}: {e}")
+                record = scrape_job_page(driver, job_id)
+                fallbacks += 1
+            except Exception as e:
+                print(f"Error processing job ID {job_id}: {e}")
+                mark_failed(job_id, e)
+
+            if on_record and record:
+                on_record(record)
+
+            # Keep at least min_delay (plus jitter) between requests
+            elapsed = time.monotonic() - start
+            delay = max(0.0, min_delay + random.uniform(0, min_delay / 2) - elapsed)
+            time.sleep(delay)
+            metrics.observe("sleep", delay, source="http")
+
+    flush_writer()
+    print(f"Fetched {len(job_urls)} jobs over HTTP, {fallbacks} needed the browser.")
+    return fallbacks
+
+
+async def _fetch_async(client, semaphore, job_id, min_delay):
+    async with semaphore:
+        try:
+            with metrics.span("http_fetch", page_type="job"):
+                response = await client.get(JOB_VIEW_URL.format(job_id=job_id))
+            response.raise_for_status()
+            save_job_record(parse_job_page(response.text, job_id))
+            return None
+        except (LayoutNotRecognized, httpx.HTTPError) as e:
+            print(f"Job ID {job_id} will use the browser: {e}")
+            return job_id
+        except Exception as e:
+            print(f"Error processing job ID {job_id}: {e}")
+            mark_failed(job_id, e)
+            return None
+        finally:
+            delay = min_delay + random.uniform(0, min_delay / 2)
+            await asyncio.sleep(delay)
+            metrics.observe("sleep", delay, source="http")
+
+
+async def fetch_job_details_http_async(driver, job_urls, concurrency=MAX_CONNECTIONS, min_delay=MIN_DELAY_SECONDS):
+    """
+    Async variant of fetch_job_details_http with up to `concurrency` requests in flight.
+    Pages the parser does not recognize are scraped with the browser afterwards.
+
+    Returns:
+    - Number of jobs that needed the browser fallback.
+    """
+    cookies, headers = _session_settings(driver)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(
+        cookies=cookies, headers=headers, timeout=HTTP_TIMEOUT_SECONDS, follow_redirects=True,
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    ) as client:
+        results = await asyncio.gather(*[_fetch_async(client, semaphore, job_id, min_delay) for job_id in job_urls])
+
+    fallback_ids = [job_id for job_id in results if job_id is not None]
+    for job_id in fallback_ids:
+        scrape_job_page(driver, job_id)
+
+    flush_writer()
+    print(f"Fetched {len(job_urls)} jobs over HTTP, {len(fallback_ids)} needed the browser.")
+    return len(fallback_ids)
+
+
+def compare_with_fixtures(driver=None, fixture_folder=FIXTURE_FOLDER):
+    """
+    Checks the HTTP parser (and the browser extractor, if a driver is given) against the saved
+    job pages in the fixture folder and their expected records.
+
+    Returns:
+    - List of (job_id, path, expected, actual) mismatches; empty when both paths agree.
+    """
+    with open(os.path.join(fixture_folder, "expected.json"), encoding="utf-8") as f:
+        expected = json.load(f)
+
+    mismatches = []
+    for job_id, expected_record in expected.items():
+        path = os.path.abspath(os.path.join(fixture_folder, f"{job_id}.html"))
+        with open(path, encoding="utf-8") as f:
+            http_record = parse_job_page(f.read(), job_id)
+        if http_record != expected_record:
+            mismatches.append((job_id, "http", expected_record, http_record))
+
+        if driver is not None:
+            driver.get(f"file://{path}")
+            browser_record = extract_job_record(driver, job_id)
+            if browser_record != expected_record:
+                mismatches.append((job_id, "browser", expected_record, browser_record))
+
+    for job_id, path, expected_record, actual in mismatches:
+        print(f"Job ID {job_id} ({path}) differs:\n  expected {expected_record}\n  got      {actual}")
+    print(f"Checked {len(expected)} fixtures, {len(mismatches)} mismatches.")
+    return mismatches
+
+
+if __name__ == "__main__":
+    import argparse
+    from page_scraper import init_driver
+
+    parser = argparse.ArgumentParser(description="Compare the HTTP and browser job page parsers on the fixture pages.")
+    parser.add_argument("--browser", action="store_true", help="Also run the browser extractor in headless Chrome")
+    args = parser.parse_args()
+
+    driver = init_driver(headless=True) if args.browser else None
+    try:
+        raise SystemExit(1 if compare_with_fixtures(driver) else 0)
+    finally:
+        if driver:
+            driver.quit()
@@ -0,0 +1,137 @@
+import sqlite3
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+
+DB_PATH = 'linkedin_jobs.db'
+LOOKUP_CHUNK = 500            # Stays below SQLite's limit on bound parameters
+WINDOW_MARGIN_HOURS = 24      # Overlap with the previous run, postings can show up in search late
+TIMESTAMP_FORMAT = '%Y%m%d%H%M'
+
+
+def ensure_watermark_table(conn):
+    """
+    One row per search: the newest job ID seen and when the search last completed.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS search_watermarks (
+            search_key TEXT PRIMARY KEY,
+            newest_job_id TEXT,
+            newest_seen_at TEXT,
+            last_run_at TEXT
+        )
+    ''')
+    conn.commit()
+
+
+def load_watermark(conn, search_key):
+    """
+    Returns:
+    - (newest_job_id, newest_seen_at, last_run_at) or None if the search has not run incrementally yet.
+    """
+    ensure_watermark_table(conn)
+    return conn.execute(
+        "SELECT newest_job_id, newest_seen_at, last_run_at FROM search_watermarks WHERE search_key = ?",
+        (search_key,),
+    ).fetchone()
+
+
+def save_watermark(conn, search_key, job_ids):
+    """
+    Moves the watermark to the newest of the collected job IDs (LinkedIn job IDs grow over time)
+    and records the run time. The newest ID is kept if nothing newer was collected.
+    """
+    current_time = datetime.now().strftime(TIMESTAMP_FORMAT)
+    previous = load_watermark(conn, search_key)
+    newest_job_id, newest_seen_at = previous[:2] if previous else (None, None)
+
+    newest = max(job_ids, key=int) if job_ids else None
+    if newest and (newest_job_id is None or int(newest) > int(newest_job_id)):
+        newest_job_id, newest_seen_at = newest, current_time
+
+    conn.execute(
+        "INSERT OR REPLACE INTO search_watermarks (search_key, newest_job_id, newest_seen_at, last_run_at) VALUES (?, ?, ?, ?)",
+        (search_key, newest_job_id, newest_seen_at, current_time),
+    )
+    conn.commit()
+
+
+def known_job_ids(conn, job_ids):
+    """
+    Looks the given IDs up in job_ids through its primary key index, instead of loading the
+    whole table.
+
+    Returns:
+    - Set of the IDs that are already stored.
+    """
+    job_ids = list(dict.fromkeys(job_ids))
+    known = set()
+    for start in range(0, len(job_ids), LOOKUP_CHUNK):
+        chunk = job_ids[start:start + LOOKUP_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        known.update(row[0] for row in conn.execute(f"SELECT job_id FROM job_ids WHERE job_id IN ({placeholders})", chunk))
+    return known
+
+
+def incremental_search_url(job_search_url_template, watermark):
+    """
+    Sorts the search by date (newest first) and, once a previous run is recorded, limits it to
+    postings from the time since that run plus a margin (LinkedIn's f_TPR filter, in seconds).
+    """
+    parsed_url = urlparse(job_search_url_template)
+    params = {key: values[0] for key, values in parse_qs(parsed_url.query).items()}
+    params["sortBy"] = "DD"
+
+    if watermark and watermark[2]:
+        last_run = datetime.strptime(watermark[2], TIMESTAMP_FORMAT)
+        window = datetime.now() - last_run + timedelta(hours=WINDOW_MARGIN_HOURS)
+        params["f_TPR"] = f"r{int(window.total_seconds())}"
+
+    return urlunparse(parsed_url._replace(query=urlencode(params)))
+
+
+class IncrementalCrawl:
+    """
+    State of one incremental run of a search: builds the date-sorted search URL, tells the
+    collectors when a results page holds nothing new, and moves the watermark at the end.
+
+    Usage:
+        with IncrementalCrawl(job_search_url_template) as crawl:
+            collect_job_ids_by_scrolling(driver, crawl.search_url, job_urls, stop_early=crawl.page_is_known)
+            ...
+            crawl.finish(job_urls)
+    """
+
+    def __init__(self, job_search_url_template, db_path=DB_PATH):
+        self.search_key = job_search_url_template
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.watermark = load_watermark(self.conn, self.search_key)
+        self.search_url = incremental_search_url(job_search_url_template, self.watermark)
+        self.pages_checked = 0
+
+        if self.watermark:
+            print(f"Incremental crawl: newest known job {self.watermark[0]}, last run at {self.watermark[2]}.")
+
+    def page_is_known(self, page_ids):
+        """
+        True when every job on a results page is already stored, so older pages can be skipped.
+        """
+        self.pages_checked += 1
+        if not page_ids:
+            return False
+        unique_ids = set(page_ids)
+        if len(known_job_ids(self.conn, unique_ids)) < len(unique_ids):
+            return False
+        print(f"Results page {self.pages_checked} holds only known jobs, stopping the search early.")
+        return True
+
+    def finish(self, job_ids):
+        save_watermark(self.conn, self.search_key, job_ids)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,178 @@
+import re
+import sqlite3
+import time
+
+DB_PATH = 'linkedin_jobs.db'
+
+# BM25 weights of the indexed columns: a match in the title counts more than one in the description
+TITLE_WEIGHT = 5.0
+COMPANY_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+SNIPPET_WORDS = 12
+
+# Characters that make a query FTS5 syntax (phrases, prefixes, column filters, grouping)
+FTS_SYNTAX = re.compile(r'["*():^]|\b(AND|OR|NOT|NEAR)\b')
+
+
+def ensure_search_index(conn):
+    """
+    job_search is an FTS5 index over the title, company and description of every job, keyed by
+    the numeric job ID as rowid. Triggers on job_description keep it in sync with every write,
+    including the upserts of the DB writer.
+    """
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS job_search USING fts5(
+            title_name, company_name, job_description,
+            tokenize = "unicode61 remove_diacritics 2 tokenchars '+#'"
+        )
+    ''')
+    conn.execute(
+        "INSERT INTO job_search (job_search, rank) VALUES ('rank', ?)",
+        (f"bm25({TITLE_WEIGHT}, {COMPANY_WEIGHT}, {DESCRIPTION_WEIGHT})",),
+    )
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS job_search_insert AFTER INSERT ON job_description BEGIN
+            DELETE FROM job_search WHERE rowid = CAST(new.job_id AS INTEGER);
+            INSERT INTO job_search (rowid, title_name, company_name, job_description)
+            VALUES (CAST(new.job_id AS INTEGER), new.title_name, new.company_name, new.job_description);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS job_search_update
+        AFTER UPDATE OF title_name, company_name, job_description ON job_description BEGIN
+            DELETE FROM job_search WHERE rowid = CAST(old.job_id AS INTEGER);
+            INSERT INTO job_search (rowid, title_name, company_name, job_description)
+            VALUES (CAST(new.job_id AS INTEGER), new.title_name, new.company_name, new.job_description);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS job_search_delete AFTER DELETE ON job_description BEGIN
+            DELETE FROM job_search WHERE rowid = CAST(old.job_id AS INTEGER);
+        END
+    ''')
+
+
+def rebuild_search_index(conn, full=False):
+    """
+    Brings the index up to date with job_description. The incremental rebuild only adds the jobs
+    missing from the index and drops entries whose job is gone, then merges some of the small
+    index segments. A full rebuild indexes every job again and optimizes the whole index.
+
+    Returns:
+    - (added, removed) numbers of index entries.
+    """
+    ensure_search_index(conn)
+    if full:
+        removed = conn.execute("SELECT COUNT(*) FROM job_search").fetchone()[0]
+        conn.execute("DELETE FROM job_search")
+    else:
+        removed = conn.execute('''
+            DELETE FROM job_search WHERE rowid NOT IN (SELECT CAST(job_id AS INTEGER) FROM job_description)
+        ''').rowcount
+    added = conn.execute('''
+        INSERT INTO job_search (rowid, title_name, company_name, job_description)
+        SELECT CAST(jd.job_id AS INTEGER), jd.title_name, jd.company_name, jd.job_description
+        FROM job_description jd
+        WHERE NOT EXISTS (SELECT 1 FROM job_search s WHERE s.rowid = CAST(jd.job_id AS INTEGER))
+    ''').rowcount
+    if full:
+        conn.execute("INSERT INTO job_search (job_search) VALUES ('optimize')")
+    else:
+        # A bounded merge of the small segments left by the triggers instead of a full optimize
+        conn.execute("INSERT INTO job_search (job_search, rank) VALUES ('merge', 500)")
+    return added, removed
+
+
+def match_expression(query):
+    """
+    Turns plain words ('SQL fintech') into an FTS5 query that requires all of them. Queries that
+    already use FTS5 syntax ('"data engineer" OR fintech', 'python*') are passed through.
+    """
+    if FTS_SYNTAX.search(query):
+        # Words like c++ and c# are only valid FTS5 syntax inside quotes
+        return re.sub(r'(?<![\w"])(\w+[+#]+)', r'"\1"', query)
+    return " ".join('"' + word.replace('"', '') + '"' for word in query.split())
+
+
+def search_jobs(query, limit=20, min_score=None, status=None, conn=None):
+    """
+    Finds jobs whose title, company or description match the query, best BM25 match first.
+
+    Parameters:
+    - query: Words that must all appear, or an FTS5 query.
+    - limit: Maximum number of results.
+    - min_score: Only jobs whose ChatGPT score is at least this (None to include unscored jobs).
+    - status: Only jobs with this status in job_ids, e.g. 'ongoing'.
+    - conn: Optional open connection to the database.
+
+    Returns:
+    - List of dicts with job_id, title_name, company_name, status, score (ChatGPT), rank (BM25,
+      lower is better) and a snippet of the description. Empty for a blank query.
+    """
+    from chatgpt_analysis import ensure_analysis_table
+
+    if not query.strip():
+        # An empty MATCH expression is an FTS5 syntax error
+        return []
+
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect(DB_PATH)
+    try:
+        ensure_analysis_table(conn)
+        rows = conn.execute(f'''
+            SELECT jd.job_id, jd.title_name, jd.company_name, ji.status, a.score, job_search.rank,
+                   snippet(job_search, 2, '[', ']', '...', {SNIPPET_WORDS})
+            FROM job_search
+            JOIN job_description jd ON jd.job_id = CAST(job_search.rowid AS TEXT)
+            LEFT JOIN job_ids ji ON ji.job_id = jd.job_id
+            LEFT JOIN chatgpt_analysis a ON a.job_id = jd.job_id
+            WHERE job_search MATCH ?
+              AND (? IS NULL OR a.score >= ?)
+              AND (? IS NULL OR ji.status = ?)
+            ORDER BY job_search.rank
+            LIMIT ?
+        ''', (match_expression(query), min_score, min_score, status, status, limit)).fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+
+    columns = ("job_id", "title_name", "company_name", "status", "score", "rank", "snippet")
+    return [dict(zip(columns, row)) for row in rows]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Search the scraped job postings, best match first.")
+    parser.add_argument("query", nargs="*", help="Words that must all appear, or an FTS5 query")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum number of results")
+    parser.add_argument("--min-score", type=int, help="Only jobs with at least this ChatGPT score")
+    parser.add_argument("--status", help="Only jobs with this status, e.g. ongoing")
+    parser.add_argument("--rebuild", action="store_true", help="Add missing jobs to the index before searching")
+    parser.add_argument("--full", action="store_true", help="With --rebuild, index every job again")
+    args = parser.parse_args()
+
+    from chatgpt_analysis import ensure_analysis_table
+
+    conn = sqlite3.connect(DB_PATH)
+    ensure_analysis_table(conn)
+    if args.rebuild:
+        started = time.perf_counter()
+        with conn:
+            added, removed = rebuild_search_index(conn, full=args.full)
+        print(f"Search index rebuilt in {time.perf_counter() - started:.2f}s: {added} added, {removed} removed.")
+
+    query = " ".join(args.query).strip()
+    if query:
+        started = time.perf_counter()
+        results = search_jobs(query, args.limit, args.min_score, args.status, conn)
+        elapsed = (time.perf_counter() - started) * 1000
+        for result in results:
+            score = "-" if result["score"] is None else result["score"]
+            print(f"{result['job_id']}  score {score}  {result['title_name']} at {result['company_name']} ({result['status']})")
+            print(f"    {result['snippet']}")
+        print(f"{len(results)} results in {elapsed:.1f} ms.")
+    elif not args.rebuild:
+        parser.print_usage()
+    conn.close()
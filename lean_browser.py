@@ -0,0 +1,158 @@
+import glob
+import os
+import statistics
+import threading
+from selenium.common.exceptions import WebDriverException
+
+# Resource types we never read: images, fonts, media and trackers
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.mp3", "*.m3u8",
+    "*media.licdn.com*",
+    "*doubleclick.net*", "*google-analytics.com*", "*googletagmanager.com*", "*googlesyndication.com*",
+    "*facebook.net*", "*bing.com*", "*ads.linkedin.com*", "*px.ads.linkedin.com*", "*snap.licdn.com*",
+    "*demdex.net*", "*omtrdc.net*",
+]
+
+RENDERER_HEAP_MB = 256  # Cap on the V8 heap of each renderer
+
+LEAN_CHROME_ARGUMENTS = [
+    "--headless=new",
+    "--disable-gpu",
+    "--blink-settings=imagesEnabled=false",
+    "--mute-audio",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--renderer-process-limit=2",
+    f"--js-flags=--max-old-space-size={RENDERER_HEAP_MB}",
+    "--window-size=1280,2000",
+]
+
+# Reads load time and bytes transferred of the current page from the Performance API
+PAGE_METRICS_SCRIPT = """
+const navigation = performance.getEntriesByType("navigation")[0];
+const resources = performance.getEntriesByType("resource");
+const resourceBytes = resources.reduce((total, entry) => total + (entry.transferSize || 0), 0);
+return {
+    url: location.href,
+    load_ms: navigation ? Math.round(navigation.domContentLoadedEventEnd - navigation.startTime) : null,
+    document_bytes: navigation ? navigation.transferSize : 0,
+    resource_bytes: resourceBytes,
+    resource_count: resources.length,
+    js_heap_bytes: performance.memory ? performance.memory.usedJSHeapSize : null,
+};
+"""
+
+
+def apply_lean_options(chrome_options):
+    """
+    Turns Chrome options into the lean profile: headless, no images, capped renderer memory and
+    an 'eager' page-load strategy that returns once the DOM is ready instead of after every resource.
+    """
+    for argument in LEAN_CHROME_ARGUMENTS:
+        chrome_options.add_argument(argument)
+    chrome_options.page_load_strategy = "eager"
+    chrome_options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.media_stream": 2,
+    })
+
+
+def block_heavy_resources(driver, patterns=BLOCKED_URL_PATTERNS):
+    """
+    Blocks the heavy resource types and third-party hosts through the DevTools protocol.
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    driver.execute_cdp_cmd("Performance.enable", {})
+
+
+class PageMetricsLog:
+    """
+    Collects load time and bytes transferred for every page a driver loads.
+    """
+
+    def __init__(self):
+        self.pages = []
+        self._lock = threading.Lock()
+
+    def record(self, driver, page_type):
+        try:
+            metrics = driver.execute_script(PAGE_METRICS_SCRIPT)
+        except WebDriverException:
+            return None
+        metrics["page_type"] = page_type
+        metrics["total_bytes"] = (metrics["document_bytes"] or 0) + (metrics["resource_bytes"] or 0)
+        with self._lock:
+            self.pages.append(metrics)
+        return metrics
+
+    def summary(self):
+        with self._lock:
+            pages = list(self.pages)
+        if not pages:
+            return {"pages": 0}
+        load_times = [page["load_ms"] for page in pages if page["load_ms"] is not None]
+        return {
+            "pages": len(pages),
+            "avg_load_ms": round(statistics.mean(load_times)) if load_times else None,
+            "avg_kb": round(statistics.mean(page["total_bytes"] for page in pages) / 1024, 1),
+            "total_mb": round(sum(page["total_bytes"] for page in pages) / 1024 / 1024, 2),
+        }
+
+    def report(self):
+        summary = self.summary()
+        if summary["pages"]:
+            print(f"Loaded {summary['pages']} pages: {summary['avg_load_ms']} ms and {summary['avg_kb']} KB "
+                  f"per page on average, {summary['total_mb']} MB in total.")
+
+
+def renderer_memory_mb(driver):
+    """
+    Returns the JS heap currently used by the page's renderer, from the DevTools Performance domain.
+    """
+    try:
+        metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+    except WebDriverException:
+        return None
+    values = {metric["name"]: metric["value"] for metric in metrics}
+    return round(values.get("JSHeapUsedSize", 0) / 1024 / 1024, 1)
+
+
+def compare_profiles(urls):
+    """
+    Loads the same pages with the normal and the lean profile and prints load time, bytes and
+    renderer memory for each, to measure what the lean profile saves.
+    """
+    from page_scraper import init_driver  # Imported here to avoid a circular import
+
+    results = {}
+    for lean in (False, True):
+        driver = init_driver(headless=True, lean=lean)
+        try:
+            if not lean:
+                driver.execute_cdp_cmd("Performance.enable", {})
+            log = PageMetricsLog()
+            memory = []
+            for url in urls:
+                driver.get(url)
+                log.record(driver, "fixture")
+                memory.append(renderer_memory_mb(driver) or 0)
+            results["lean" if lean else "normal"] = dict(log.summary(), avg_heap_mb=round(statistics.mean(memory), 1))
+        finally:
+            driver.quit()
+
+    for profile, summary in results.items():
+        print(f"{profile:>6}: {summary}")
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Defaults to the saved job pages; any URLs or HTML files can be passed instead
+    targets = sys.argv[1:] or sorted(glob.glob("./fixtures/jobs/*.html"))
+    compare_profiles([t if "://" in t else f"file://{os.path.abspath(t)}" for t in targets])
@@ -0,0 +1,132 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+# Default cache settings
+CACHE_DB_PATH = 'linkedin_jobs.db'
+MAX_ENTRIES = 50000   # Least recently used entries beyond this are evicted
+MAX_AGE_DAYS = 90     # Entries older than this are evicted
+
+
+def cache_key(user_cv, job_description, prompt_suffix, model, system_prompt):
+    """
+    Content-addressed key for one LLM request: the same inputs always give the same key,
+    whatever job ID they belong to.
+    """
+    digest = hashlib.sha256()
+    for part in (model, system_prompt, prompt_suffix, user_cv, job_description):
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\x1f")  # Separator so parts cannot run into each other
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent cache of LLM responses stored in the llm_cache table, with hit/miss counters
+    and size/age based eviction.
+    """
+
+    def __init__(self, db_path=CACHE_DB_PATH, max_entries=MAX_ENTRIES, max_age_days=MAX_AGE_DAYS):
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT,
+                created_at REAL,
+                last_used_at REAL,
+                hit_count INTEGER DEFAULT 0
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used_at)')
+        self.conn.commit()
+
+    def get(self, key):
+        """
+        Returns the cached response for the key, or None on a miss.
+        """
+        with self._lock:
+            row = self.conn.execute('SELECT response FROM llm_cache WHERE cache_key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            with self.conn:
+                self.conn.execute(
+                    'UPDATE llm_cache SET last_used_at = ?, hit_count = hit_count + 1 WHERE cache_key = ?',
+                    (time.time(), key)
+                )
+            return row[0]
+
+    def put(self, key, model, response):
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute('''
+                INSERT INTO llm_cache (cache_key, model, response, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    response = excluded.response,
+                    last_used_at = excluded.last_used_at
+            ''', (key, model, response, now, now))
+
+    def evict(self):
+        """
+        Removes entries older than max_age_days, then the least recently used entries above max_entries.
+
+        Returns:
+        - Number of entries removed.
+        """
+        with self._lock, self.conn:
+            removed = self.conn.execute(
+                'DELETE FROM llm_cache WHERE created_at < ?', (time.time() - self.max_age_days * 86400,)
+            ).rowcount
+            removed += self.conn.execute('''
+                DELETE FROM llm_cache WHERE cache_key IN (
+                    SELECT cache_key FROM llm_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,)).rowcount
+        return removed
+
+    def stats(self):
+        total = self.hits + self.misses
+        with self._lock:
+            size = self.conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": size,
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%} hit rate), {stats['entries']} entries stored.")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """
+    Returns the process-wide ResponseCache, creating it on first use.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -1,7 +1,15 @@
+import signal
+import sys
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 from check_cancelled import process_ongoing_jobs
 from page_scraper import setup_database, scrape_linkedin_jobs
+from browser_session import BrowserSession
 from chatgpt_analysis import analyze_jobs_with_chatgpt
+from async_analysis import analyze_jobs_with_chatgpt_async
+from packed_analysis import analyze_jobs_packed
+from batch_analysis import analyze_jobs_batch
+from prefilter import prefilter_pending_jobs
+from streaming_pipeline import run_streaming_pipeline_sync
 
 # Input your LindkedIn job search URL and specify what you want ChatGPT to analyze
 LINKEDIN_SEARCH_URL = 'https://www.linkedin.com/jobs/search/?currentJobId=4083475215&f_E=3%2C4%2C5&f_JT=F%2CO&geoId=104738515&keywords=Senior%20Analyst&origin=JOB_SEARCH_PAGE_JOB_FILTER&refresh=true&sortBy=R'
@@ -12,6 +20,50 @@ PROMPT_SUFFIX = (
         "The ideal industry for him would be finance or fintech as he is good in finance."
     )
 
+# Number of browsers used to scrape job pages and the overall page-load budget they share
+SCRAPER_WORKERS = 1
+SCRAPER_REQUESTS_PER_MINUTE = 30
+
+# Budget for rechecking ongoing jobs per run: at most this many jobs, and none started after this many minutes
+# (None for no time limit). Jobs that stay unchanged are rechecked less and less often (see revisit_scheduler.py).
+REVISIT_MAX_JOBS = 200
+REVISIT_MAX_MINUTES = None
+
+# Run Chrome headless without images, fonts, media and trackers (see lean_browser.py).
+# Leave it off for the first login if LinkedIn asks for a security check that has to be solved by hand.
+SCRAPER_LEAN_BROWSER = False
+
+# Fetch job pages over plain HTTP with the browser's login cookies (the browser is only used as a fallback)
+SCRAPER_USE_HTTP = False
+
+# How job IDs are collected from the search results (see search_collector.py):
+# - "scroll": scroll every results page in the browser
+# - "network": read the search API responses the results pages load from Chrome's network log
+# - "api": call the search API directly with the browser's login cookies
+SEARCH_COLLECTION = "scroll"
+
+# Sort the search by date and stop at the first results page that holds only known jobs; later runs only
+# search the postings since the previous run (see incremental_crawl.py)
+SEARCH_INCREMENTAL = False
+
+# How jobs are sent to ChatGPT:
+# - "sync": one request at a time
+# - "async": ANALYSIS_CONCURRENCY requests in flight at once
+# - "packed": several job descriptions per request after a single copy of the CV
+# - "batch": submit all pending jobs through the OpenAI Batch API and wait for the results (cheapest for large backlogs)
+ANALYSIS_MODE = "async"
+ANALYSIS_CONCURRENCY = 8
+
+# Pre-score the pending jobs locally against the CV (BM25, see prefilter.py) and only send the relevant ones to
+# ChatGPT: jobs scoring above PREFILTER_MIN_SCORE and, if set, only the PREFILTER_TOP_N best of them
+PREFILTER = False
+PREFILTER_MIN_SCORE = 0.0
+PREFILTER_TOP_N = None
+
+# Score new jobs with ChatGPT while the browser is still scraping, instead of after it (see streaming_pipeline.py).
+# The scoring works like ANALYSIS_MODE "async", which is used in place of ANALYSIS_MODE.
+STREAMING_PIPELINE = False
+
 # Define the CV directory
 CV_FOLDER = "./user_data"
 
@@ -52,16 +104,56 @@ def format_job_search_url(raw_url):
     return formatted_url
 
 if __name__ == "__main__":
+    # Turn SIGTERM into a normal exit so buffered database rows are flushed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+
     print("Connecting to the database...")
     setup_database()
 
-    print("Checking if the existing positions in the database are still ongoing")
-    process_ongoing_jobs()
+    # One browser and one login for both scraping stages, reused across runs while the session is valid
+    with BrowserSession(lean=SCRAPER_LEAN_BROWSER, network_log=SEARCH_COLLECTION == "network") as session:
+        print("Checking if the existing positions in the database are still ongoing")
+        process_ongoing_jobs(
+            workers=SCRAPER_WORKERS,
+            requests_per_minute=SCRAPER_REQUESTS_PER_MINUTE,
+            use_http=SCRAPER_USE_HTTP,
+            driver=session.driver,
+            max_jobs=REVISIT_MAX_JOBS,
+            max_minutes=REVISIT_MAX_MINUTES,
+            lean=SCRAPER_LEAN_BROWSER,
+        )
+
+        scrape_settings = dict(
+            workers=SCRAPER_WORKERS,
+            requests_per_minute=SCRAPER_REQUESTS_PER_MINUTE,
+            use_http=SCRAPER_USE_HTTP,
+            driver=session.driver,
+            collection=SEARCH_COLLECTION,
+            incremental=SEARCH_INCREMENTAL,
+            lean=SCRAPER_LEAN_BROWSER,
+        )
+        if STREAMING_PIPELINE:
+            print("Scraping and analyzing the new positions")
+            run_streaming_pipeline_sync(
+                format_job_search_url(LINKEDIN_SEARCH_URL), PROMPT_SUFFIX, concurrency=ANALYSIS_CONCURRENCY, **scrape_settings
+            )
+        else:
+            print("Starting scrapping the new positions")
+            scrape_linkedin_jobs(format_job_search_url(LINKEDIN_SEARCH_URL), **scrape_settings)
 
-    print("Starting scrapping the new positions")
-    scrape_linkedin_jobs(format_job_search_url(LINKEDIN_SEARCH_URL))
+    if not STREAMING_PIPELINE:
+        if PREFILTER:
+            print("Pre-scoring the pending positions")
+            prefilter_pending_jobs(PROMPT_SUFFIX, min_score=PREFILTER_MIN_SCORE, top_n=PREFILTER_TOP_N)
 
-    print("Analyzing")
-    analyze_jobs_with_chatgpt(PROMPT_SUFFIX)
+        print("Analyzing")
+        if ANALYSIS_MODE == "async":
+            analyze_jobs_with_chatgpt_async(PROMPT_SUFFIX, concurrency=ANALYSIS_CONCURRENCY)
+        elif ANALYSIS_MODE == "packed":
+            analyze_jobs_packed(PROMPT_SUFFIX)
+        elif ANALYSIS_MODE == "batch":
+            analyze_jobs_batch(PROMPT_SUFFIX)
+        else:
+            analyze_jobs_with_chatgpt(PROMPT_SUFFIX)
 
     print("Done")
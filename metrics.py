@@ -0,0 +1,177 @@
+import json
+import math
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+PROMETHEUS_PREFIX = "linkedin"
+QUANTILES = (0.5, 0.95)
+
+
+def percentile(values, q):
+    """
+    Nearest-rank percentile of a list of numbers (q between 0 and 1).
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def peak_rss_bytes():
+    """
+    Peak resident set size of this process so far, or None where the resource module is not
+    available (Windows).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Bytes on macOS, kilobytes on Linux
+
+
+class Metrics:
+    """
+    Collects timing spans and counters from every stage of the pipeline.
+
+    Spans are durations of one operation (a page load, an API request, a DB commit), kept per
+    name and labels so percentiles can be reported. Counters add up amounts such as stored jobs
+    or API tokens. Recording is a list append under a lock, so it stays on in normal runs.
+
+    Usage:
+        with metrics.span("page_load", page_type="job"):
+            driver.get(url)
+        metrics.count("api_tokens", response.usage.prompt_tokens, kind="prompt")
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans = {}      # (name, labels) -> list of seconds
+        self._counters = {}   # (name, labels) -> total
+        self.started = time.time()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    @contextmanager
+    def span(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._spans.setdefault(key, []).append(seconds)
+
+    def count(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._spans, self._counters = {}, {}
+            self.started = time.time()
+
+    def spans(self):
+        """
+        Returns:
+        - List of dicts with name, labels, count, total, p50, p95 and max seconds of every span.
+        """
+        with self._lock:
+            items = [(key, list(values)) for key, values in self._spans.items()]
+        return [
+            {
+                "name": name, "labels": dict(labels), "count": len(values), "total": sum(values),
+                "p50": percentile(values, 0.5), "p95": percentile(values, 0.95), "max": max(values),
+            }
+            for (name, labels), values in sorted(items)
+        ]
+
+    def counters(self):
+        """
+        Returns:
+        - List of dicts with name, labels and value of every counter.
+        """
+        with self._lock:
+            items = sorted(self._counters.items())
+        return [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in items]
+
+    def total(self, name, **labels):
+        """
+        Sums the spans (seconds) or counters with this name whose labels include the given ones.
+        """
+        wanted = set((key, str(value)) for key, value in labels.items())
+        with self._lock:
+            spans = sum(sum(values) for (n, l), values in self._spans.items() if n == name and wanted <= set(l))
+            counters = sum(value for (n, l), value in self._counters.items() if n == name and wanted <= set(l))
+        return spans + counters
+
+    def write_json(self, path, **extra):
+        """
+        Writes the spans, counters, peak RSS and any extra fields as one JSON document.
+        """
+        document = {
+            "started_at": self.started,
+            "finished_at": time.time(),
+            "peak_rss_bytes": peak_rss_bytes(),
+            **extra,
+            "spans": self.spans(),
+            "counters": self.counters(),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+
+    def write_prometheus(self, path, gauges=None):
+        """
+        Writes the metrics in the Prometheus text format (e.g. for node_exporter's textfile
+        collector): spans as summaries, counters as counters, and gauges given as
+        {name: value} or {name: [(labels, value), ...]}.
+        """
+        def label_text(labels):
+            return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}" if labels else ""
+
+        lines = [
+            f"# HELP {PROMETHEUS_PREFIX}_span_seconds Duration of instrumented operations.",
+            f"# TYPE {PROMETHEUS_PREFIX}_span_seconds summary",
+        ]
+        with self._lock:
+            span_items = [(key, list(values)) for key, values in sorted(self._spans.items())]
+            counter_items = sorted(self._counters.items())
+        for (name, labels), values in span_items:
+            labels = {"span": name, **dict(labels)}
+            for q in QUANTILES:
+                lines.append(f"{PROMETHEUS_PREFIX}_span_seconds{label_text({**labels, 'quantile': q})} {percentile(values, q):.6f}")
+            lines.append(f"{PROMETHEUS_PREFIX}_span_seconds_sum{label_text(labels)} {sum(values):.6f}")
+            lines.append(f"{PROMETHEUS_PREFIX}_span_seconds_count{label_text(labels)} {len(values)}")
+
+        lines += [
+            f"# HELP {PROMETHEUS_PREFIX}_events_total Counted events and amounts.",
+            f"# TYPE {PROMETHEUS_PREFIX}_events_total counter",
+        ]
+        for (name, labels), value in counter_items:
+            lines.append(f"{PROMETHEUS_PREFIX}_events_total{label_text({'counter': name, **dict(labels)})} {value}")
+
+        gauges = {"peak_rss_bytes": peak_rss_bytes(), **(gauges or {})}
+        for name, value in gauges.items():
+            if value is None:
+                continue
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} gauge")
+            for labels, sample in (value if isinstance(value, list) else [({}, value)]):
+                lines.append(f"{PROMETHEUS_PREFIX}_{name}{label_text(labels)} {sample}")
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+# Shared by every stage
+metrics = Metrics()
@@ -0,0 +1,202 @@
+import re
+import sqlite3
+import time
+from datetime import datetime
+from job_search import ensure_search_index, rebuild_search_index
+
+DB_PATH = 'linkedin_jobs.db'
+
+TIMESTAMP_FORMAT = '%Y%m%d%H%M'   # Format of job_ids.timestamp_added / timestamp_updated
+
+# Seconds per unit of LinkedIn's relative posting dates ("3 days ago", "Reposted 2 weeks ago")
+POSTED_UNITS = {
+    "second": 1, "minute": 60, "hour": 3600, "day": 86400, "week": 7 * 86400, "month": 30 * 86400, "year": 365 * 86400,
+}
+POSTED_PATTERN = re.compile(r"(\d+)\s+(second|minute|hour|day|week|month|year)s?\s+ago")
+APPLICANTS_PATTERN = re.compile(r"\d[\d,.]*")
+
+
+def parse_applicants(text):
+    """
+    Turns LinkedIn's applicant text ('Over 100 applicants', '1,234 applicants') into a number.
+
+    Returns:
+    - The applicant count, or None if the text holds no number.
+    """
+    match = APPLICANTS_PATTERN.search(text or "")
+    return int(re.sub(r"[,.]", "", match.group())) if match else None
+
+
+def parse_posted_date(text, scraped_at):
+    """
+    Turns a relative posting date ('2 weeks ago') into a Unix time, counted back from the time
+    the page was scraped.
+
+    Returns:
+    - The approximate posting time, or None if the text is not a relative date.
+    """
+    match = POSTED_PATTERN.search((text or "").lower())
+    if not match or scraped_at is None:
+        return None
+    return scraped_at - int(match.group(1)) * POSTED_UNITS[match.group(2)]
+
+
+def _columns(conn, table):
+    return {row[1]: row[2].upper() for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _text_analysis_keys(conn):
+    """
+    Stores chatgpt_analysis.job_id as TEXT like job_ids and job_description, so the pending-work
+    anti-joins compare keys of the same type through the primary key index.
+    """
+    columns = _columns(conn, "chatgpt_analysis")
+    if not columns or columns.get("job_id") == "TEXT":
+        return
+    from chatgpt_analysis import parse_score  # Imported here, chatgpt_analysis imports this module through db_writer
+
+    conn.execute("ALTER TABLE chatgpt_analysis RENAME TO chatgpt_analysis_old")
+    conn.execute('''
+        CREATE TABLE chatgpt_analysis (
+            job_id TEXT PRIMARY KEY,
+            chatgpt_message TEXT,
+            score INTEGER,
+            FOREIGN KEY (job_id) REFERENCES job_ids (job_id)
+        )
+    ''')
+    score = "score" if "score" in columns else "NULL"
+    conn.execute(f'''
+        INSERT OR REPLACE INTO chatgpt_analysis (job_id, chatgpt_message, score)
+        SELECT CAST(job_id AS TEXT), chatgpt_message, {score} FROM chatgpt_analysis_old
+    ''')
+    conn.execute("DROP TABLE chatgpt_analysis_old")
+    _backfill_scores(conn, parse_score)
+
+
+def _backfill_scores(conn, parse_score):
+    """
+    Fills the scores missing next to a stored ChatGPT message. ensure_analysis_table only does
+    this when it adds the score column, which the rebuilt table already has.
+    """
+    rows = conn.execute(
+        "SELECT job_id, chatgpt_message FROM chatgpt_analysis WHERE score IS NULL AND chatgpt_message IS NOT NULL"
+    ).fetchall()
+    conn.executemany(
+        "UPDATE chatgpt_analysis SET score = ? WHERE job_id = ?",
+        [(parse_score(chatgpt_message), job_id) for job_id, chatgpt_message in rows],
+    )
+
+
+def _missing_scores(conn):
+    """
+    Scores the analyses that version 1 copied without one (databases from before the score column).
+    """
+    if "score" not in _columns(conn, "chatgpt_analysis"):
+        return
+    if not conn.execute("SELECT 1 FROM chatgpt_analysis WHERE score IS NULL LIMIT 1").fetchone():
+        return
+    from chatgpt_analysis import parse_score  # Imported here, chatgpt_analysis imports this module through db_writer
+
+    _backfill_scores(conn, parse_score)
+
+
+def _status_indexes(conn):
+    """
+    Indexes the job status (process_ongoing_jobs) and the timestamps used for ordering.
+    """
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_job_ids_status ON job_ids (status, timestamp_added)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_job_ids_updated ON job_ids (timestamp_updated)')
+
+
+def _numeric_job_fields(conn):
+    """
+    Adds applicants_count and posted_at (Unix time) next to the scraped text and fills them
+    for the rows stored so far.
+
+    Earlier versions scraped the details of ongoing jobs again on every run, so their relative
+    posting date was read at timestamp_updated. Jobs that are no longer ongoing were last read at
+    an unknown time, so they only get a posted_at if they were never updated.
+    """
+    columns = _columns(conn, "job_description")
+    if "applicants_count" not in columns:
+        conn.execute("ALTER TABLE job_description ADD COLUMN applicants_count INTEGER")
+    if "posted_at" not in columns:
+        conn.execute("ALTER TABLE job_description ADD COLUMN posted_at REAL")
+
+    rows = conn.execute('''
+        SELECT jd.job_id, jd.number_applicants, jd.posted_date,
+               CASE
+                   WHEN ji.status = 'ongoing' THEN COALESCE(ji.timestamp_updated, ji.timestamp_added)
+                   WHEN ji.timestamp_updated IS NULL OR ji.timestamp_updated = ji.timestamp_added THEN ji.timestamp_added
+               END
+        FROM job_description jd LEFT JOIN job_ids ji ON ji.job_id = jd.job_id
+    ''').fetchall()
+    updates = []
+    scraped_times = {}  # Many jobs share the same timestamp
+    for job_id, number_applicants, posted_date, scraped_at in rows:
+        if scraped_at not in scraped_times:
+            try:
+                scraped_times[scraped_at] = datetime.strptime(scraped_at, TIMESTAMP_FORMAT).timestamp()
+            except (TypeError, ValueError):
+                scraped_times[scraped_at] = None
+        updates.append((
+            parse_applicants(number_applicants), parse_posted_date(posted_date, scraped_times[scraped_at]), job_id
+        ))
+    conn.executemany("UPDATE job_description SET applicants_count = ?, posted_at = ? WHERE job_id = ?", updates)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_job_description_posted_at ON job_description (posted_at)')
+
+
+def _search_index(conn):
+    """
+    Creates the FTS5 index over the job postings with its sync triggers and fills it with the
+    jobs stored so far (see job_search.py).
+    """
+    ensure_search_index(conn)
+    rebuild_search_index(conn)
+
+
+# (version, description, function); the database's PRAGMA user_version is the last version applied.
+# New migrations are appended with the next version number and never changed once released.
+MIGRATIONS = [
+    (1, "store chatgpt_analysis job IDs as TEXT", _text_analysis_keys),
+    (2, "index job status and timestamps", _status_indexes),
+    (3, "add numeric applicant counts and posting times", _numeric_job_fields),
+    (4, "add the full-text search index", _search_index),
+    (5, "score analyses copied without a score", _missing_scores),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(conn):
+    """
+    Applies the migrations the database has not had yet, each in its own transaction together
+    with the new user_version. Expects the base tables (see setup_database) to exist.
+
+    Returns:
+    - The schema version of the database.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, description, apply in MIGRATIONS:
+        if number <= version:
+            continue
+        started = time.perf_counter()
+        # Explicit transaction, as sqlite3 would run the schema changes outside an implicit one
+        conn.execute("BEGIN")
+        try:
+            apply(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Database migrated to version {number}: {description} ({time.perf_counter() - started:.2f}s).")
+        version = number
+    return version
+
+
+if __name__ == "__main__":
+    # Shows the schema version, applying pending migrations
+    conn = sqlite3.connect(DB_PATH)
+    print(f"Schema version {migrate(conn)} (latest {SCHEMA_VERSION}).")
+    conn.close()
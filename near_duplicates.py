@@ -0,0 +1,326 @@
+import hashlib
+import re
+import sqlite3
+import time
+import zlib
+import numpy as np
+
+DB_PATH = 'linkedin_jobs.db'
+
+# MinHash / LSH settings
+NUM_HASHES = 128              # Signature length
+BANDS = 16                    # LSH bands of NUM_HASHES / BANDS rows; pairs above ~0.7 similarity share a band
+SHINGLE_WORDS = 5             # Words per shingle
+SIMILARITY_THRESHOLD = 0.8    # Estimated Jaccard similarity above which two descriptions are the same posting
+SEED = 20240101               # Fixed so signatures stay comparable across runs
+
+PRIME = (1 << 32) + 15        # Smallest prime above the 32-bit shingle hashes
+_rng = np.random.default_rng(SEED)
+_HASH_A = _rng.integers(1, PRIME, NUM_HASHES, dtype=np.uint64)
+_HASH_B = _rng.integers(0, PRIME, NUM_HASHES, dtype=np.uint64)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def ensure_dedup_tables(conn):
+    """
+    dedup_signatures holds the MinHash signature of every job description, the cluster it belongs
+    to (the job ID of the first posting of the cluster) and, for jobs whose analysis was copied
+    from a duplicate, the job it was copied from. dedup_bands is the LSH index: one row per band
+    of every signature. dedup_watermarks holds the last rowids of job_description,
+    dedup_signatures and chatgpt_analysis already looked at, so unchanged tables are not scanned again.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS dedup_signatures (
+            job_id TEXT PRIMARY KEY,
+            signature BLOB,
+            cluster_id TEXT,
+            similarity REAL,
+            analysis_from TEXT,
+            indexed_at REAL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_dedup_signatures_cluster ON dedup_signatures (cluster_id)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS dedup_bands (
+            band INTEGER,
+            bucket INTEGER,
+            job_id TEXT,
+            PRIMARY KEY (band, bucket, job_id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS dedup_watermarks (
+            name TEXT PRIMARY KEY,
+            last_rowid INTEGER
+        )
+    ''')
+    conn.commit()
+
+
+def minhash_signature(text):
+    """
+    MinHash signature of the word shingles of a description.
+
+    Returns:
+    - Array of NUM_HASHES values, or None for an empty description.
+    """
+    words = WORD_PATTERN.findall((text or "").lower())
+    if not words:
+        return None
+    size = min(SHINGLE_WORDS, len(words))
+    shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+    return ((np.outer(_HASH_A, hashes) + _HASH_B[:, None]) % PRIME).min(axis=1)
+
+
+def band_buckets(signature):
+    """
+    Returns:
+    - One bucket key per band; descriptions sharing a bucket in any band are candidate duplicates.
+    """
+    return [
+        int.from_bytes(hashlib.blake2b(band.tobytes(), digest_size=8).digest(), "big", signed=True)
+        for band in np.split(signature, BANDS)
+    ]
+
+
+def _load_signature(blob):
+    return np.frombuffer(blob, dtype=np.uint64)
+
+
+def find_duplicate(conn, signature, exclude=None):
+    """
+    Looks up the most similar indexed description through the LSH buckets.
+
+    Returns:
+    - (job_id, cluster_id, similarity) of the best candidate above SIMILARITY_THRESHOLD, or None.
+    """
+    candidates = set()
+    for band, bucket in enumerate(band_buckets(signature)):
+        candidates.update(row[0] for row in conn.execute(
+            "SELECT job_id FROM dedup_bands WHERE band = ? AND bucket = ?", (band, bucket)
+        ))
+    candidates.discard(exclude)
+
+    best = None
+    for job_id in candidates:
+        row = conn.execute("SELECT signature, cluster_id FROM dedup_signatures WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            continue
+        similarity = float(np.mean(_load_signature(row[0]) == signature))
+        if similarity >= SIMILARITY_THRESHOLD and (best is None or similarity > best[2]):
+            best = (job_id, row[1], similarity)
+    return best
+
+
+class RunIndex:
+    """
+    In-memory LSH index of the descriptions seen by a running pipeline. The DB writer only adds
+    descriptions to dedup_signatures when it flushes, so reposts scraped close together are
+    matched here instead.
+    """
+
+    def __init__(self):
+        self._buckets = {}      # (band, bucket) -> job IDs
+        self._signatures = {}   # job ID -> signature
+
+    def add(self, job_id, signature):
+        self._signatures[job_id] = signature
+        for band, bucket in enumerate(band_buckets(signature)):
+            self._buckets.setdefault((band, bucket), []).append(job_id)
+
+    def find(self, signature):
+        """
+        Returns:
+        - (job_id, similarity) of the most similar description above SIMILARITY_THRESHOLD, or None.
+        """
+        best = None
+        for band, bucket in enumerate(band_buckets(signature)):
+            for job_id in self._buckets.get((band, bucket), ()):
+                similarity = float(np.mean(self._signatures[job_id] == signature))
+                if similarity >= SIMILARITY_THRESHOLD and (best is None or similarity > best[1]):
+                    best = (job_id, similarity)
+        return best
+
+
+def index_descriptions(conn, rows):
+    """
+    Adds (job_id, job_description) rows to the index and assigns each job to the cluster of its
+    closest duplicate, or to a new cluster of its own. Runs inside the caller's transaction, so
+    the DB writer indexes descriptions in the same commit that stores them.
+    """
+    now = time.time()
+    for job_id, job_description in rows:
+        signature = minhash_signature(job_description)
+        if signature is None:
+            continue
+
+        previous = conn.execute("SELECT signature FROM dedup_signatures WHERE job_id = ?", (job_id,)).fetchone()
+        if previous is not None:
+            if np.array_equal(_load_signature(previous[0]), signature):
+                continue
+            # The description changed, so the job may belong to another cluster now
+            conn.execute("DELETE FROM dedup_bands WHERE job_id = ?", (job_id,))
+
+        duplicate = find_duplicate(conn, signature, exclude=job_id)
+        cluster_id, similarity = (duplicate[1], duplicate[2]) if duplicate else (job_id, None)
+        conn.execute(
+            "INSERT OR REPLACE INTO dedup_signatures (job_id, signature, cluster_id, similarity, analysis_from, indexed_at) "
+            "VALUES (?, ?, ?, ?, NULL, ?)",
+            (job_id, signature.tobytes(), cluster_id, similarity, now),
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO dedup_bands (band, bucket, job_id) VALUES (?, ?, ?)",
+            [(band, bucket, job_id) for band, bucket in enumerate(band_buckets(signature))],
+        )
+
+
+def _watermark(conn, name):
+    row = conn.execute("SELECT last_rowid FROM dedup_watermarks WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def _set_watermark(conn, name, last_rowid):
+    conn.execute("INSERT OR REPLACE INTO dedup_watermarks (name, last_rowid) VALUES (?, ?)", (name, last_rowid))
+
+
+def _last_rowid(conn, table):
+    return conn.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] or 0
+
+
+def index_missing(conn):
+    """
+    Indexes the descriptions stored before the index existed (or while it was skipped). Only
+    rows added since the last call are scanned: the DB writer indexes every description it
+    stores, including changed ones, in the same transaction.
+
+    Returns:
+    - Number of descriptions indexed.
+    """
+    ensure_dedup_tables(conn)
+    since, last = _watermark(conn, "job_description"), _last_rowid(conn, "job_description")
+    if last == since:
+        return 0
+    rows = conn.execute('''
+        SELECT jd.job_id, jd.job_description FROM job_description jd
+        WHERE jd.rowid > ? AND jd.rowid <= ? AND jd.job_description IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM dedup_signatures d WHERE d.job_id = jd.job_id)
+    ''', (since, last)).fetchall()
+    with conn:
+        index_descriptions(conn, rows)
+        _set_watermark(conn, "job_description", last)
+    return len(rows)
+
+
+def scored_duplicate(conn, job_description, job_id=None):
+    """
+    Finds an already analyzed near-duplicate of a description (other than job_id itself).
+
+    Returns:
+    - (job_id, chatgpt_message, score) of the duplicate, or None.
+    """
+    signature = minhash_signature(job_description)
+    if signature is None:
+        return None
+    duplicate = find_duplicate(conn, signature, exclude=job_id)
+    if duplicate is None:
+        return None
+    row = conn.execute('''
+        SELECT a.job_id, a.chatgpt_message, a.score
+        FROM dedup_signatures d JOIN chatgpt_analysis a ON a.job_id = d.job_id
+        WHERE d.cluster_id = ?
+        ORDER BY d.job_id = d.cluster_id DESC LIMIT 1
+    ''', (duplicate[1],)).fetchone()
+    return tuple(row) if row else None
+
+
+def inherit_analyses(conn):
+    """
+    Copies the analysis of an analyzed job to the jobs of its cluster that have none, so
+    near-duplicate postings do not cost another API call. The cluster's first posting is used
+    when it was analyzed, otherwise any analyzed member.
+
+    Returns:
+    - Number of analyses copied.
+    """
+    index_missing(conn)
+    rows = conn.execute('''
+        SELECT pending.job_id, source.job_id, a.chatgpt_message, a.score
+        FROM dedup_signatures pending
+        JOIN dedup_signatures source ON source.cluster_id = pending.cluster_id AND source.job_id != pending.job_id
+        JOIN chatgpt_analysis a ON a.job_id = source.job_id
+        WHERE NOT EXISTS (SELECT 1 FROM chatgpt_analysis pending_analysis WHERE pending_analysis.job_id = pending.job_id)
+        ORDER BY pending.job_id, source.job_id = source.cluster_id DESC
+    ''').fetchall()
+
+    inherited = {}
+    for job_id, source_id, chatgpt_message, score in rows:
+        inherited.setdefault(job_id, (source_id, chatgpt_message, score))
+
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO chatgpt_analysis (job_id, chatgpt_message, score) VALUES (?, ?, ?)",
+            [(job_id, chatgpt_message, score) for job_id, (_, chatgpt_message, score) in inherited.items()],
+        )
+        conn.executemany(
+            "UPDATE dedup_signatures SET analysis_from = ? WHERE job_id = ?",
+            [(source_id, job_id) for job_id, (source_id, _, _) in inherited.items()],
+        )
+    if inherited:
+        print(f"{len(inherited)} near-duplicate jobs took over the analysis of an already analyzed posting.")
+    return len(inherited)
+
+
+def inherit_new_analyses(conn):
+    """
+    Runs inherit_analyses only when descriptions were indexed or analyses stored since it last
+    ran, so looking up pending work on a large database costs two MAX(rowid) lookups when
+    nothing changed.
+
+    Returns:
+    - Number of analyses copied.
+    """
+    index_missing(conn)
+    # Read before copying: rows the writer commits meanwhile are looked at next time
+    marks = {table: _last_rowid(conn, table) for table in ("dedup_signatures", "chatgpt_analysis")}
+    if all(_watermark(conn, table) == last for table, last in marks.items()):
+        return 0
+
+    copied = inherit_analyses(conn)
+    with conn:
+        for table, last in marks.items():
+            _set_watermark(conn, table, last)
+    return copied
+
+
+def report(conn, limit=20):
+    """
+    Prints the largest clusters of near-duplicate postings.
+    """
+    clusters = conn.execute('''
+        SELECT d.cluster_id, COUNT(*), SUM(d.analysis_from IS NOT NULL), MIN(jd.title_name), MIN(jd.company_name)
+        FROM dedup_signatures d LEFT JOIN job_description jd ON jd.job_id = d.cluster_id
+        GROUP BY d.cluster_id HAVING COUNT(*) > 1
+        ORDER BY COUNT(*) DESC LIMIT ?
+    ''', (limit,)).fetchall()
+    total = conn.execute("SELECT COUNT(*), COUNT(DISTINCT cluster_id) FROM dedup_signatures").fetchone()
+    print(f"{total[0]} descriptions indexed in {total[1]} clusters.")
+    for cluster_id, size, inherited, title, company in clusters:
+        print(f"  Cluster {cluster_id}: {size} postings ({inherited} inherited analyses) - {title} at {company}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Indexes descriptions missing from the index and shows the clusters; --rebuild starts the index over
+    conn = sqlite3.connect(DB_PATH)
+    ensure_dedup_tables(conn)
+    if "--rebuild" in sys.argv:
+        with conn:
+            conn.execute("DELETE FROM dedup_bands")
+            conn.execute("DELETE FROM dedup_signatures")
+            conn.execute("DELETE FROM dedup_watermarks")
+    print(f"Indexed {index_missing(conn)} descriptions.")
+    report(conn)
+    conn.close()
@@ -0,0 +1,210 @@
+import json
+from chatgpt_analysis import (
+    client, MODEL, SYSTEM_PROMPT, cv_folder, get_most_recent_pdf, extract_text_from_pdf, fetch_pending_jobs,
+    build_messages, parse_score, share_cluster_analyses
+)
+from db_writer import get_writer, flush_writer
+from llm_cache import get_cache, cache_key
+
+# Packing settings
+PACK_TOKEN_BUDGET = 12000  # Estimated tokens of job descriptions per request (the CV is sent once on top)
+MAX_PACK_SIZE = 20         # Upper bound on jobs per request, keeps the JSON answer short and reliable
+
+PACKED_SYSTEM_PROMPT = (
+    "You are a career coach helping a user evaluate several job positions based on their CV. "
+    "Score every job separately and answer only with the requested JSON."
+)
+
+
+def estimate_tokens(text):
+    """
+    Rough token estimate (about 4 characters per token).
+    """
+    return len(text or "") // 4
+
+
+def build_packs(jobs, token_budget=PACK_TOKEN_BUDGET, max_pack_size=MAX_PACK_SIZE):
+    """
+    Groups (job_id, job_description) rows into packs whose descriptions fit the token budget.
+
+    A single description larger than the budget gets a pack of its own.
+    """
+    packs = []
+    current, current_tokens = [], 0
+    for job_id, job_description in jobs:
+        tokens = estimate_tokens(job_description)
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_pack_size):
+            packs.append(current)
+            current, current_tokens = [], 0
+        current.append((str(job_id), job_description))
+        current_tokens += tokens
+    if current:
+        packs.append(current)
+    return packs
+
+
+def build_packed_messages(user_cv, pack, prompt_suffix):
+    """
+    Builds one request that sends the CV once followed by every job description in the pack.
+    """
+    jobs_text = "\n\n".join(
+        f"### Job ID {job_id}\n{job_description}" for job_id, job_description in pack
+    )
+    return [
+        {"role": "system", "content": PACKED_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": (
+                f"Here is the user's CV:\n{user_cv}\n\n"
+                f"Here are {len(pack)} job descriptions:\n\n{jobs_text}\n\n"
+                f"{prompt_suffix}\n\n"
+                "Answer with a JSON object whose 'scores' field maps every job ID above to its integer score."
+            )
+        }
+    ]
+
+
+def build_response_format(pack):
+    """
+    Structured-output schema that requires exactly one integer score per job ID in the pack.
+    """
+    job_ids = [job_id for job_id, _ in pack]
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "job_scores",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "scores": {
+                        "type": "object",
+                        "properties": {job_id: {"type": "integer"} for job_id in job_ids},
+                        "required": job_ids,
+                        "additionalProperties": False,
+                    }
+                },
+                "required": ["scores"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def parse_packed_scores(content, pack):
+    """
+    Parses the JSON answer for a pack.
+
+    Returns:
+    - Dict of job_id -> score for the IDs that came back with a valid 1-10 score.
+    """
+    try:
+        scores = json.loads(content).get("scores", {})
+    except (json.JSONDecodeError, AttributeError):
+        return {}
+
+    valid = {}
+    for job_id, _ in pack:
+        score = scores.get(job_id)
+        if isinstance(score, int) and 1 <= score <= 10:
+            valid[job_id] = score
+    return valid
+
+
+def _score_individually(writer, cache, user_cv, job_id, job_description, prompt_suffix):
+    """
+    Fallback for jobs missing from a packed answer: the regular one-job request.
+    """
+    key = cache_key(user_cv, job_description, prompt_suffix, MODEL, SYSTEM_PROMPT)
+    chatgpt_message = cache.get(key)
+    if chatgpt_message is not None:
+        writer.add_analysis(job_id, chatgpt_message, parse_score(chatgpt_message))
+        return
+
+    response = client.chat.completions.create(
+        model=MODEL,
+        messages=build_messages(user_cv, job_description, prompt_suffix)
+    )
+    chatgpt_message = response.choices[0].message.content.strip()
+    cache.put(key, MODEL, chatgpt_message)
+    writer.add_analysis(job_id, chatgpt_message, parse_score(chatgpt_message))
+    print(f"Job ID {job_id} processed individually. ChatGPT message: {chatgpt_message}")
+
+
+def analyze_jobs_packed(prompt_suffix, token_budget=PACK_TOKEN_BUDGET, max_pack_size=MAX_PACK_SIZE):
+    """
+    Analyze job positions with several job descriptions per request and save the scores in SQLite.
+
+    The CV is sent once per pack instead of once per job. Scores are requested as structured
+    JSON, validated per job ID and stored in chatgpt_analysis.score. Jobs missing from an
+    answer are retried one by one with the regular prompt.
+
+    Parameters:
+    - prompt_suffix: The final sentence of the prompt that adjusts how ChatGPT evaluates the job position.
+    - token_budget: Estimated description tokens per request.
+    - max_pack_size: Maximum number of jobs per request.
+
+    Returns:
+    - Number of jobs analyzed.
+    """
+    cv_path = get_most_recent_pdf(cv_folder)
+    print(f"Using CV file: {cv_path}")
+    user_cv = extract_text_from_pdf(cv_path)
+
+    writer = get_writer()
+    cache = get_cache()
+    analyzed = 0
+
+    # Answers cached from earlier packed runs are reused per job
+    jobs = []
+    for job_id, job_description in fetch_pending_jobs():
+        if not job_description:
+            print(f"Skipping job ID {job_id}: No job description provided.")
+            continue
+        cached = cache.get(cache_key(user_cv, job_description, prompt_suffix, MODEL, PACKED_SYSTEM_PROMPT))
+        if cached is not None:
+            writer.add_analysis(job_id, cached, int(cached))
+            analyzed += 1
+        else:
+            jobs.append((job_id, job_description))
+
+    packs = build_packs(jobs, token_budget, max_pack_size)
+    print(f"Analyzing {len(jobs)} jobs in {len(packs)} packed requests...")
+
+    for pack in packs:
+        missing = pack
+        try:
+            response = client.chat.completions.create(
+                model=MODEL,
+                messages=build_packed_messages(user_cv, pack, prompt_suffix),
+                response_format=build_response_format(pack)
+            )
+            scores = parse_packed_scores(response.choices[0].message.content, pack)
+
+            for job_id, job_description in pack:
+                if job_id in scores:
+                    score = scores[job_id]
+                    cache.put(cache_key(user_cv, job_description, prompt_suffix, MODEL, PACKED_SYSTEM_PROMPT),
+                              MODEL, str(score))
+                    writer.add_analysis(job_id, str(score), score)
+                    analyzed += 1
+            missing = [(job_id, job_description) for job_id, job_description in pack if job_id not in scores]
+            print(f"Packed request scored {len(scores)} of {len(pack)} jobs.")
+        except Exception as e:
+            print(f"Error processing packed request for job IDs {[job_id for job_id, _ in pack]}: {e}")
+
+        # Retry whatever did not come back with a valid score
+        for job_id, job_description in missing:
+            try:
+                _score_individually(writer, cache, user_cv, job_id, job_description, prompt_suffix)
+                analyzed += 1
+            except Exception as e:
+                print(f"Error processing job ID {job_id}: {e}")
+
+    flush_writer()
+    analyzed += share_cluster_analyses()
+    cache.evict()
+    cache.report()
+
+    print(f"ChatGPT analysis completed: {analyzed} jobs saved to the database.")
+    return analyzed
@@ -1,16 +1,28 @@
 import sqlite3
-import time
-import random
 import os
+import time
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 from dotenv import load_dotenv
+from db_writer import get_writer, flush_writer
+from lean_browser import apply_lean_options, block_heavy_resources, PageMetricsLog
+from crawl_frontier import Frontier, ensure_frontier_tables, mark_done, mark_failed
+from near_duplicates import ensure_dedup_tables
+from migrations import migrate
+from incremental_crawl import IncrementalCrawl, known_job_ids
+from metrics import metrics
+from waits import LOGIN_TIMEOUT, load_page, wait_for_page, wait_for_more_cards
+
+# Base URL can be pointed at a local fixture server for testing
+LINKEDIN_BASE_URL = os.getenv("LINKEDIN_BASE_URL", "https://www.linkedin.com").rstrip("/")
+LOGIN_URL = f"{LINKEDIN_BASE_URL}/login"
+JOB_VIEW_URL = LINKEDIN_BASE_URL + "/jobs/view/{job_id}/"
 
 # Setup database and tables
 def setup_database():
@@ -43,61 +55,55 @@ def setup_database():
         )
     ''')
 
+    # Create the crawl frontier tables (see crawl_frontier.py)
+    ensure_frontier_tables(conn)
+
+    # Create the near-duplicate index (see near_duplicates.py)
+    ensure_dedup_tables(conn)
+
     conn.commit()
+
+    # Bring older databases up to the current schema (see migrations.py)
+    migrate(conn)
     conn.close()
 
 # Function to update job status
 def update_job_status(job_id, status, job_url):
-    conn = sqlite3.connect('linkedin_jobs.db')
-    cursor = conn.cursor()
     current_time = datetime.now().strftime('%Y%m%d%H%M')
 
-    cursor.execute('SELECT * FROM job_ids WHERE job_id = ?', (job_id,))
-    result = cursor.fetchone()
-
-    if result:
-        # Update existing job_id status
-        cursor.execute('''
-            UPDATE job_ids
-            SET status = ?, timestamp_updated = ?, job_url = ?
-            WHERE job_id = ?
-        ''', (status, current_time, job_url, job_id))
-        print(f"Job ID {job_id} updated to status: {status}.")
-    else:
-        # Insert new job_id with initial status
-        cursor.execute('''
-            INSERT INTO job_ids (job_id, status, timestamp_added, timestamp_updated, job_url)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (job_id, status, current_time, current_time, job_url))
-        print(f"Job ID {job_id} added with status: {status}.")
-
-    conn.commit()
-    conn.close()
+    # Buffered in the shared writer and upserted in batches
+    get_writer().add_status(job_id, status, job_url, current_time)
+    print(f"Job ID {job_id} saved with status: {status}.")
 
 # Function to insert job details into job_description table
 def insert_job_details(job_id, company_name, title_name, job_description, location, posted_date, num_applicants, work_model):
-    conn = sqlite3.connect('linkedin_jobs.db')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        INSERT OR REPLACE INTO job_description (
-            job_id, company_name, title_name, job_description, location, posted_date, number_applicants, work_model
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (job_id, company_name, title_name, job_description, location, posted_date, num_applicants, work_model))
-
-    conn.commit()
-    conn.close()
+    get_writer().add_details(job_id, company_name, title_name, job_description, location, posted_date, num_applicants, work_model)
 
 # Function to initaliase Selenium
-def init_driver():
+def init_driver(headless=False, user_data_dir=None, driver_path=None, lean=False, network_log=False):
     chrome_options = Options()
+    if network_log:
+        # Lets search_collector read API responses from the performance log
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    if lean:
+        # Headless, no images/fonts/media/trackers, eager page loads (see lean_browser.py)
+        apply_lean_options(chrome_options)
+    elif headless:
+        chrome_options.add_argument("--headless=new")
+    if user_data_dir:
+        # Persistent Chrome profile, keeps the LinkedIn session between runs
+        chrome_options.add_argument(f"--user-data-dir={os.path.abspath(user_data_dir)}")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--start-maximized")
     chrome_options.add_argument("--disable-extensions")
     chrome_options.add_argument("--disable-popup-blocking")
 
-    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    driver = webdriver.Chrome(service=Service(driver_path or ChromeDriverManager().install()), options=chrome_options)
+    if lean:
+        block_heavy_resources(driver)
+        driver.page_metrics = PageMetricsLog()  # Filled by waits.load_page
+    return driver
 
 def shorten_job_url(raw_url):
     return raw_url.split("?")[0].split('/')[-2]  # Extracts job_id
@@ -112,148 +118,310 @@ def login_mainpage(driver):
     if not linkedin_username or not linkedin_password:
         raise ValueError("LinkedIn email or password not found in .env file")
 
+    login_started = time.monotonic()
     try:
-        driver.get("https://www.linkedin.com/login")
-        time.sleep(5 + random.uniform(1, 2))
+        # Wait for the login form instead of a fixed sleep
+        email_field = load_page(driver, LOGIN_URL, "login")
+        if email_field is None:
+            raise TimeoutException("login form did not load")
 
-        email_field = driver.find_element(By.ID, "username")
         password_field = driver.find_element(By.ID, "password")
         email_field.send_keys(linkedin_username)
         password_field.send_keys(linkedin_password)
         password_field.send_keys(Keys.RETURN)
-        time.sleep(10 + random.uniform(1, 3))
+
+        # Logged in once the global navigation bar shows up
+        if wait_for_page(driver, "logged_in", timeout=LOGIN_TIMEOUT) is None:
+            raise TimeoutException("still not logged in, check the credentials or the security checkpoint")
         print("Logged in successfully.")
+        metrics.observe("login", time.monotonic() - login_started)
+        return True
     except Exception as e:
         print(f"Error logging in: {e}")
+        metrics.count("login_failures")
         driver.quit()
+        return False
+
+# Reads everything extract_job_record needs in one WebDriver round trip
+EXTRACT_JOB_SCRIPT = """
+const query = (selector) => document.querySelector(selector);
+const innerText = (element) => element ? element.innerText : null;
+const texts = (selector) => Array.from(document.querySelectorAll(selector))
+    .map((element) => element.innerText.trim())
+    .filter((text) => text);
+
+const cancelled = query("span.artdeco-inline-feedback__message");
+if (cancelled) {
+    return {marker: "cancelled", marker_text: innerText(cancelled)};
+}
+const deleted = query("p.jobs-box__body.jobs-no-job__error-msg");
+if (deleted) {
+    return {marker: "deleted", marker_text: innerText(deleted)};
+}
+
+const additionalInfo = query("div.t-black--light.mt2[dir='ltr']");
+return {
+    marker: null,
+    company: innerText(query(".job-details-jobs-unified-top-card__company-name")),
+    title: innerText(query("h1.t-24.t-bold.inline")),
+    paragraphs: texts("p[dir='ltr']"),
+    additional_info: additionalInfo ? additionalInfo.innerText.trim() : null,
+    labels: texts("span.ui-label.ui-label--accent-3.text-body-small"),
+};
+"""
+
+# Text that confirms each status marker
+MARKER_TEXTS = {
+    "cancelled": "No longer accepting applications",
+    "deleted": "The job you were looking for was not found.",
+}
+
+def extract_job_record(driver, job_id):
+    """
+    Reads the job page currently open in the driver with a single execute_script call.
+
+    Returns:
+    - Dict with the job_id, its status ("ongoing", "cancelled", "deleted" or None when a
+      feedback message is shown that is not a known marker) and, for ongoing jobs, the fields
+      stored by insert_job_details.
+
+    Raises:
+    - NoSuchElementException: If an ongoing job page has no company name or title.
+    """
+    page = driver.execute_script(EXTRACT_JOB_SCRIPT)
+    record = {"job_id": job_id, "status": "ongoing"}  # Default status
+
+    # Check for the cancelled or deleted job
+    if page["marker"]:
+        record["status"] = page["marker"] if MARKER_TEXTS[page["marker"]] in (page["marker_text"] or "") else None
+        return record
+
+    # Extract company_name and title_name
+    if page["company"] is None:
+        raise NoSuchElementException("Unable to locate the company name element")
+    if page["title"] is None:
+        raise NoSuchElementException("Unable to locate the job title element")
+    record["company_name"] = page["company"].split("\n")[0].strip()
+    record["title_name"] = page["title"].strip()
+
+    # Extract job_description
+    record["job_description"] = " ".join(page["paragraphs"])
+
+    # Extract location, posted_date, num_applicants
+    if page["additional_info"] is not None:
+        location, posted_date, num_applicants = (page["additional_info"].split(" · ") + ["Not Found"] * 3)[:3]
+    else:
+        # If the element is not found, fill the variables with "Not Found"
+        location, posted_date, num_applicants = "Not Found", "Not Found", "Not Found"
+    record.update({"location": location, "posted_date": posted_date, "num_applicants": num_applicants})
+
+    # Extract work_model
+    record["work_model"] = " · ".join(page["labels"])
+
+    return record
+
+def save_job_record(record):
+    """
+    Stores a record returned by extract_job_record (or the HTTP fetcher): the status, and the
+    job details for ongoing jobs.
+    """
+    job_id, status = record["job_id"], record["status"]
+    metrics.count("jobs_stored", status=status or "unrecognized")
+    if status is None:
+        mark_failed(job_id, "job page not recognized")
         return
 
-def get_job_details(driver, job_urls):
-    for job_id in job_urls:
+    update_job_status(job_id, status, JOB_VIEW_URL.format(job_id=job_id))
+    if status == "ongoing":
+        insert_job_details(
+            job_id, record["company_name"], record["title_name"], record["job_description"], record["location"],
+            record["posted_date"], record["num_applicants"], record["work_model"]
+        )
+    mark_done(job_id)
 
-            # Navigate to the job page
-            job_url = f"https://www.linkedin.com/jobs/view/{job_id}/"
-            driver.get(job_url)
-            time.sleep(2 + random.uniform(0.5, 1))
-
-            job_status = "ongoing"  # Default status
-
-            try:
-                cancel_element = None  # Initialize with a default value
-                cancel_element_text = None  # Initialize with a default value
-
-                # Check for the cancelled job
-                try:
-                    cancel_element = driver.find_element(By.CSS_SELECTOR, "span.artdeco-inline-feedback__message")
-                    cancel_element_text = cancel_element.text
-                    if "No longer accepting applications" in cancel_element_text:
-                        job_status = "cancelled"
-                        update_job_status(job_id, job_status, f"https://www.linkedin.com/jobs/view/{job_id}/")
-                except NoSuchElementException:
-                    pass  # Ignore if not found
-
-                # Check for the deleted job
-                if not cancel_element_text:
-                    try:
-                        cancel_element = driver.find_element(By.CSS_SELECTOR, "p.jobs-box__body.jobs-no-job__error-msg")
-                        cancel_element_text = cancel_element.text
-                        if "The job you were looking for was not found." in cancel_element_text:
-                            job_status = "deleted"
-                            update_job_status(job_id, job_status, f"https://www.linkedin.com/jobs/view/{job_id}/")
-                    except NoSuchElementException:
-                    
-                        update_job_status(job_id, job_status, f"https://www.linkedin.com/jobs/view/{job_id}/")
-
-                        # Extract company_name
-                        company_element = driver.find_element(By.CLASS_NAME, "job-details-jobs-unified-top-card__company-name")
-                        company_text = company_element.text
-                        company_name = company_text.split("\n")[0].strip()
-
-                        # Extract title_name
-                        job_title_element = driver.find_element(By.CSS_SELECTOR, "h1.t-24.t-bold.inline")
-                        title_name = job_title_element.text.strip()
-                        
-                        # Extract job_description
-                        paragraphs = driver.find_elements(By.CSS_SELECTOR, "p[dir='ltr']")
-                        job_description = " ".join(
-                            [p.get_attribute('innerText').strip() for p in paragraphs if p.get_attribute('innerText').strip()]
-                        )
-
-                        # Extract location, posted_date, num_applicants
-                        try:
-                            additional_info_element = driver.find_element(By.CSS_SELECTOR, "div.t-black--light.mt2[dir='ltr']")
-                            additional_info = additional_info_element.get_attribute("innerText").strip()
-                            location, posted_date, num_applicants = (additional_info.split(" · ") + ["Not Found"] * 3)[:3]
-                        except NoSuchElementException:
-                            # If the element is not found, fill the variables with "Not Found"
-                            location, posted_date, num_applicants = "Not Found", "Not Found", "Not Found"
-
-                        # Extract work_model
-                        ui_label_elements = driver.find_elements(By.CSS_SELECTOR, "span.ui-label.ui-label--accent-3.text-body-small")
-                        work_model = " · ".join([label.text.strip() for label in ui_label_elements if label.text.strip()])
-
-                        # Insert job details into the database
-                        insert_job_details(job_id, company_name, title_name, job_description, location, posted_date, num_applicants, work_model)
-
-            except Exception as e:
-                print(f"Error processing job ID {job_id}: {e}")
-
-def scrape_linkedin_jobs(job_search_url_template):
-    #Login to the main page
-    driver = init_driver()
+def scrape_job_page(driver, job_id):
+    """
+    Opens a single job page, updates its status and stores its details if the job is still ongoing.
 
-    try:
-        # Log in to LinkedIn
-        login_mainpage(driver)
-        page_number = 0
-        job_urls = []
+    Returns:
+    - The stored record (see extract_job_record), or None if the page could not be read.
+    """
+    # Navigate to the job page and wait for the top card or a cancelled/deleted marker
+    load_page(driver, JOB_VIEW_URL.format(job_id=job_id), "job")
 
-        while True:
-            current_url = f"{job_search_url_template}&start={page_number * 25}"
-            driver.get(current_url)
-            time.sleep(4 + random.uniform(1, 2))
-
-            job_list = driver.find_element(By.XPATH, "//*[@id='main']/div/div[2]/div[1]/div")
-            last_scroll_top = -1
-            while True:
-                driver.execute_script("arguments[0].scrollTop += 500", job_list)
-                time.sleep(random.uniform(0.5, 1.5))
-                current_scroll_top = driver.execute_script("return arguments[0].scrollTop", job_list)
-                if current_scroll_top == last_scroll_top:
-                    break
-                last_scroll_top = current_scroll_top
-
-            job_cards = job_list.find_elements(By.CSS_SELECTOR, "a[href*='/jobs/view/']")
-    
-            page_job_urls = [shorten_job_url(job.get_attribute('href')) for job in job_cards]
+    try:
+        record = extract_job_record(driver, job_id)
+        save_job_record(record)
+        return record
+    except Exception as e:
+        print(f"Error processing job ID {job_id}: {e}")
+        mark_failed(job_id, e)
+        return None
+
+def iter_job_details(driver, job_urls):
+    """
+    Scrapes the job pages one by one and yields each record as soon as it has been handed to
+    the writer.
+    """
+    for job_id in job_urls:
+        record = scrape_job_page(driver, job_id)
+        if record is not None:
+            yield record
+
+def get_job_details(driver, job_urls, on_record=None):
+    """
+    Scrapes and stores the job pages. on_record, if given, is called with every stored record
+    (see streaming_pipeline.py).
+    """
+    for record in iter_job_details(driver, job_urls):
+        if on_record:
+            on_record(record)
+
+    # Write out whatever is still buffered for this batch of jobs
+    flush_writer()
+
+def collect_job_ids_by_scrolling(driver, job_search_url_template, job_urls, stop_early=None, pages=None):
+    """
+    Pages through the search results, scrolling each results list until every card is rendered,
+    and appends the job IDs to job_urls. stop_early is called with each page's job IDs and ends
+    the paging when it returns True (see incremental_crawl.py). Pages found in pages (see
+    crawl_frontier.SearchPages) were collected by an interrupted run and are not loaded again.
+    """
+    page_number = 0
+
+    while True:
+        collected_page = pages.get(page_number * 25) if pages else None
+        if collected_page:
+            page_job_urls = collected_page[0]
             job_urls.extend(page_job_urls)
-
-            if len(page_job_urls) < 25:
+            if len(page_job_urls) < 25 or (stop_early and stop_early(page_job_urls)):
                 break
             page_number += 1
+            continue
+
+        current_url = f"{job_search_url_template}&start={page_number * 25}"
+        load_page(driver, current_url, "search")
+
+        job_list = driver.find_element(By.XPATH, "//*[@id='main']/div/div[2]/div[1]/div")
+        last_scroll_top = -1
+        card_count = 0
+        while True:
+            driver.execute_script("arguments[0].scrollTop += 500", job_list)
+            # Continue as soon as new cards render rather than after a fixed sleep
+            card_count = wait_for_more_cards(driver, job_list, card_count)
+            current_scroll_top = driver.execute_script("return arguments[0].scrollTop", job_list)
+            if current_scroll_top == last_scroll_top:
+                break
+            last_scroll_top = current_scroll_top
+
+        job_cards = job_list.find_elements(By.CSS_SELECTOR, "a[href*='/jobs/view/']")
+
+        page_job_urls = [shorten_job_url(job.get_attribute('href')) for job in job_cards]
+        job_urls.extend(page_job_urls)
+        if pages:
+            pages.put(page_number * 25, page_job_urls)
+
+        if len(page_job_urls) < 25 or (stop_early and stop_early(page_job_urls)):
+            break
+        page_number += 1
+
+def scrape_linkedin_jobs(job_search_url_template, workers=1, requests_per_minute=None, use_http=False, driver=None,
+                         collection="scroll", incremental=False, on_record=None, headless=False, lean=False):
+    """
+    Collects job IDs from the search results and scrapes the details of the new ones.
+
+    With workers > 1 the details are scraped by a pool of browsers (see scraper_pool.py).
+    With use_http the details are fetched over HTTP with the browser's cookies (see http_fetcher.py).
+    A logged-in driver can be passed in (see browser_session.py), otherwise a new one is started.
+    collection picks how job IDs are found: "scroll" (scroll the results list), "network" (read the
+    search API responses from the browser's network log) or "api" (call the search API directly),
+    see search_collector.py.
+    With incremental the search is sorted by date and stops at the first page of known jobs,
+    see incremental_crawl.py.
+    Collected pages and job IDs are kept in the crawl frontier (see crawl_frontier.py), so an
+    interrupted run is resumed by the next one and failed jobs are retried later.
+    on_record, if given, is called with every stored job record (see streaming_pipeline.py).
+    headless and lean apply to every browser started here, including the pool's (see lean_browser.py).
+    """
+    own_driver = driver is None
+    job_urls = []
+    frontier = Frontier()
+    pages = frontier.search_pages(job_search_url_template)
+    crawl = IncrementalCrawl(job_search_url_template) if incremental else None
+    search_url = crawl.search_url if crawl else job_search_url_template
+    stop_early = crawl.page_is_known if crawl else None
+    collection_complete = False
+
+    #Login to the main page
+    if own_driver:
+        driver = init_driver(headless=headless, lean=lean, network_log=collection == "network")
+
+    try:
+        # Log in to LinkedIn
+        if own_driver:
+            login_mainpage(driver)
+
+        if collection == "scroll":
+            collect_job_ids_by_scrolling(driver, search_url, job_urls, stop_early, pages)
+        else:
+            from search_collector import collect_job_ids  # Imported here to avoid a circular import
+            collect_job_ids(driver, search_url, job_urls, source=collection, stop_early=stop_early, pages=pages)
+        collection_complete = True
     except Exception as e:
         print(f"Error collecting job URLs: {e}")
     finally:
         print(f"Collected {len(job_urls)} job IDs.")
 
+    collected_job_ids = list(dict.fromkeys(job_urls))
+
     try:
-        # Connect to the database to retrieve all existing job_ids
+        # Look the collected IDs up in the database instead of loading every existing job_id
         conn = sqlite3.connect('linkedin_jobs.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT job_id FROM job_ids')
-        existing_job_ids = {row[0] for row in cursor.fetchall()}
+        existing_job_ids = known_job_ids(conn, collected_job_ids)
         conn.close()
 
-        # Filter out existing job IDs from job_urls
-        original_job_count = len(job_urls)
-        job_urls = [job_id for job_id in job_urls if job_id not in existing_job_ids]
-        print(f"Filtered out {original_job_count - len(job_urls)} existing job IDs. Remaining: {len(job_urls)}")
+        # Filter out existing job IDs and queue the new ones in the frontier
+        frontier.add([job_id for job_id in collected_job_ids if job_id not in existing_job_ids], "new")
+        if collection_complete:
+            pages.clear()
+
+        # Claim the new jobs together with any left pending by an earlier run
+        job_urls = frontier.claim("new")
+        print(f"Filtered out {len(existing_job_ids)} existing job IDs. Remaining: {len(job_urls)}")
 
         # Go through each url and scrap data
-        get_job_details(driver, job_urls)
+        if use_http:
+            from http_fetcher import fetch_job_details_http  # Imported here to avoid a circular import
+            fetch_job_details_http(driver, job_urls, on_record=on_record)
+        elif workers > 1:
+            from scraper_pool import get_job_details_pool  # Imported here to avoid a circular import
+
+            # The pool logs in its own browsers, this one is no longer needed
+            if own_driver:
+                driver.quit()
+                driver = None
+            process_job = scrape_job_page
+            if on_record:
+                process_job = lambda pool_driver, job_id: on_record(scrape_job_page(pool_driver, job_id))
+            get_job_details_pool(
+                job_urls, workers=workers, requests_per_minute=requests_per_minute, headless=headless, lean=lean,
+                process_job=process_job,
+            )
+        else:
+            get_job_details(driver, job_urls, on_record)
+
+        # Only a completed run moves the watermark, so a failed one is repeated in full
+        if crawl and collection_complete:
+            crawl.finish(collected_job_ids)
 
     except Exception as e:
         print(f"Error processing ongoing jobs: {e}")
     finally:
-        driver.quit()
+        flush_writer()
+        frontier.report()
+        frontier.close()
+        if crawl:
+            crawl.close()
+        if driver and own_driver:
+            driver.quit()
 
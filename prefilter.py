@@ -0,0 +1,241 @@
+import math
+import re
+import sqlite3
+import time
+from datetime import datetime
+import numpy as np
+from chatgpt_analysis import cv_folder, db_path, get_most_recent_pdf, extract_text_from_pdf, ensure_analysis_table
+
+# BM25 settings
+K1 = 1.2                      # Term frequency saturation
+B = 0.75                      # Document length normalization
+KEYWORD_WEIGHT = 3.0          # Extra query weight of the keywords taken from the prompt
+MIN_SCORE = 0.0               # Jobs scoring at or below this share no relevant vocabulary with the CV
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+# Set once prefilter_pending_jobs has selected jobs in this process; only then does
+# fetch_pending_jobs leave out the jobs it skipped
+_selection_active = False
+
+STOP_WORDS = set("""
+a about above after again all also am an and any are as at be because been before being below between both but by
+can could did do does doing down during each etc few for from further had has have having he her here hers him his
+how i if in into is it its itself just me more most my no nor not of off on once only or other our ours out over own
+per same she should so some such than that the their theirs them then there these they this those through to too
+under until up very via was we were what when where which while who whom why will with would you your yours
+""".split())
+
+# Words of the scoring instructions that say nothing about the job itself
+PROMPT_WORDS = set("""
+please score scale format provide keep mind user users position positions fits fit well ideal would want
+utilise utilize skills skill good industry only him her them x 1 10
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall((text or "").lower()) if token not in STOP_WORDS]
+
+
+def keywords_from_prompt(prompt_suffix):
+    """
+    Takes the content words of the prompt suffix (e.g. 'python', 'sql', 'finance', 'fintech') as
+    keyword rules that weigh more than the rest of the CV.
+    """
+    return list(dict.fromkeys(token for token in tokenize(prompt_suffix) if token not in PROMPT_WORDS))
+
+
+def build_query(user_cv, keywords=()):
+    """
+    Turns the CV into BM25 query weights: 1 + log(count) per distinct CV term, plus
+    KEYWORD_WEIGHT for every keyword.
+
+    Returns:
+    - (vocabulary, weights): term -> column index, and a weight per column.
+    """
+    counts = {}
+    for token in tokenize(user_cv):
+        counts[token] = counts.get(token, 0) + 1
+
+    vocabulary = {term: index for index, term in enumerate(list(counts) + [k for k in keywords if k not in counts])}
+    weights = np.zeros(len(vocabulary))
+    for term, count in counts.items():
+        weights[vocabulary[term]] = 1 + math.log(count)
+    for keyword in keywords:
+        weights[vocabulary[keyword]] += KEYWORD_WEIGHT
+    return vocabulary, weights
+
+
+def term_matrix(documents, vocabulary):
+    """
+    Counts the query terms in every document as a sparse matrix in CSR form.
+
+    Returns:
+    - (indptr, indices, counts, lengths): row pointers, term columns and counts of the non-zero
+      entries, and the token count of each document.
+    """
+    indptr = np.zeros(len(documents) + 1, dtype=np.int64)
+    lengths = np.zeros(len(documents))
+    columns = []
+    findall = TOKEN_PATTERN.findall
+    for row, document in enumerate(documents):
+        # Stop words are never in the vocabulary, so they are only left out of the length
+        tokens = findall((document or "").lower())
+        lengths[row] = len(tokens)
+        matched = [vocabulary[token] for token in tokens if token in vocabulary]
+        columns.append(matched)
+        indptr[row + 1] = indptr[row] + len(matched)
+
+    indices = np.fromiter((column for matched in columns for column in matched), dtype=np.int64, count=indptr[-1])
+
+    # Collapse repeated terms within a row into (term, count) pairs
+    rows = np.repeat(np.arange(len(documents)), np.diff(indptr))
+    pairs, counts = np.unique(rows * len(vocabulary) + indices, return_counts=True)
+    rows, indices = np.divmod(pairs, len(vocabulary))
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(documents)))))
+    return indptr, indices, counts.astype(float), lengths
+
+
+def bm25_scores(documents, vocabulary, weights, k1=K1, b=B):
+    """
+    Scores every document against the weighted query terms in one vectorized pass.
+
+    Returns:
+    - (scores, indptr, indices): one BM25 score per document, and the sparse term matrix for
+      looking up which terms matched.
+    """
+    indptr, indices, counts, lengths = term_matrix(documents, vocabulary)
+    n_documents = len(documents)
+    if n_documents == 0:
+        return np.zeros(0), indptr, indices
+
+    document_frequency = np.bincount(indices, minlength=len(vocabulary))
+    idf = np.log(1 + (n_documents - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    rows = np.repeat(np.arange(n_documents), np.diff(indptr))
+    length_norm = k1 * (1 - b + b * lengths / max(lengths.mean(), 1.0))
+    term_scores = weights[indices] * idf[indices] * counts * (k1 + 1) / (counts + length_norm[rows])
+    return np.bincount(rows, weights=term_scores, minlength=n_documents), indptr, indices
+
+
+def ensure_prefilter_table(conn):
+    """
+    Keeps the last pre-score of every pending job and whether it was sent to ChatGPT, for auditing.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS prefilter_scores (
+            job_id TEXT PRIMARY KEY,
+            score REAL,
+            rank INTEGER,
+            selected INTEGER,
+            matched_keywords TEXT,
+            scored_at TEXT
+        )
+    ''')
+    conn.commit()
+
+
+def selection_active():
+    """
+    Whether the jobs prefilter_pending_jobs skipped are left out of the analysis. A selection
+    only holds for the run that made it, so runs without the pre-filter, or with other keywords
+    or another CV, see every pending job again.
+    """
+    return _selection_active
+
+
+def prefilter_pending_jobs(prompt_suffix, min_score=MIN_SCORE, top_n=None, keywords=None):
+    """
+    Pre-scores every job that has no ChatGPT analysis yet with BM25 against the CV, and marks
+    which ones go to ChatGPT: those scoring above min_score, and of those at most the top_n best.
+    For the rest of the run, fetch_pending_jobs leaves out the jobs that were not selected.
+
+    Parameters:
+    - prompt_suffix: The scoring prompt; its content words become keyword rules unless keywords is given.
+    - min_score: Jobs with a pre-score at or below this are skipped (None to keep all).
+    - top_n: Maximum number of jobs to send (None for no limit).
+    - keywords: Optional list of keywords that replaces the ones taken from the prompt.
+
+    Returns:
+    - Number of jobs selected.
+    """
+    global _selection_active
+
+    started = time.perf_counter()
+    user_cv = extract_text_from_pdf(get_most_recent_pdf(cv_folder))
+    keywords = keywords_from_prompt(prompt_suffix) if keywords is None else [k.lower() for k in keywords]
+
+    conn = sqlite3.connect(db_path)
+    ensure_analysis_table(conn)
+    ensure_prefilter_table(conn)
+    jobs = conn.execute('''
+        SELECT jd.job_id, COALESCE(jd.title_name, '') || ' ' || COALESCE(jd.job_description, '')
+        FROM job_description jd
+        WHERE NOT EXISTS (SELECT 1 FROM chatgpt_analysis a WHERE a.job_id = jd.job_id)
+    ''').fetchall()
+    if not jobs:
+        conn.close()
+        print("No pending jobs to pre-score.")
+        return 0
+
+    vocabulary, weights = build_query(user_cv, keywords)
+    scores, indptr, indices = bm25_scores([text for _, text in jobs], vocabulary, weights)
+
+    order = np.argsort(-scores, kind="stable")
+    ranks = np.empty(len(jobs), dtype=np.int64)
+    ranks[order] = np.arange(1, len(jobs) + 1)
+    selected = scores > min_score if min_score is not None else np.ones(len(jobs), dtype=bool)
+    if top_n is not None:
+        selected &= ranks <= top_n
+
+    # Which prompt keywords each job contains, for auditing
+    keyword_columns = {vocabulary[k]: k for k in keywords}
+    scored_at = datetime.now().strftime('%Y%m%d%H%M')
+    rows = []
+    for row, (job_id, _) in enumerate(jobs):
+        matched = [keyword_columns[c] for c in indices[indptr[row]:indptr[row + 1]] if c in keyword_columns]
+        rows.append((job_id, round(float(scores[row]), 4), int(ranks[row]), int(selected[row]), ",".join(matched), scored_at))
+
+    with conn:
+        # Only this run's scores are kept, so none are left over from other keywords or another CV
+        conn.execute("DELETE FROM prefilter_scores")
+        conn.executemany("INSERT INTO prefilter_scores VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.close()
+    _selection_active = True
+
+    print(f"Pre-scored {len(jobs)} pending jobs in {time.perf_counter() - started:.2f}s: "
+          f"{int(selected.sum())} go to ChatGPT, {len(jobs) - int(selected.sum())} skipped "
+          f"(keywords: {', '.join(keywords) or 'none'}).")
+    return int(selected.sum())
+
+
+def benchmark(n_documents=100000, words_per_document=300, seed=0):
+    """
+    Times bm25_scores on random documents drawn from a 20,000-word vocabulary.
+    """
+    rng = np.random.default_rng(seed)
+    words = np.array([f"term{i}" for i in range(20000)])
+    documents = [" ".join(rng.choice(words, words_per_document)) for _ in range(n_documents)]
+    vocabulary, weights = build_query(" ".join(rng.choice(words, 800)), ["term1", "term2"])
+
+    started = time.perf_counter()
+    bm25_scores(documents, vocabulary, weights)
+    print(f"Scored {n_documents} documents of {words_per_document} words in {time.perf_counter() - started:.2f}s.")
+
+
+if __name__ == "__main__":
+    import sys
+
+    # --benchmark [N] times N synthetic documents, otherwise the highest pre-scores are listed
+    if "--benchmark" in sys.argv:
+        arguments = sys.argv[sys.argv.index("--benchmark") + 1:]
+        benchmark(int(arguments[0]) if arguments else 100000)
+    else:
+        conn = sqlite3.connect(db_path)
+        for row in conn.execute('''
+            SELECT p.job_id, p.score, p.rank, p.selected, p.matched_keywords, jd.title_name, jd.company_name
+            FROM prefilter_scores p JOIN job_description jd ON jd.job_id = p.job_id
+            ORDER BY p.rank LIMIT 20
+        '''):
+            print(row)
+        conn.close()
@@ -0,0 +1,202 @@
+import hashlib
+import random
+import sqlite3
+import time
+import httpx
+from db_writer import get_writer, flush_writer
+from crawl_frontier import mark_done, mark_failed
+from page_scraper import JOB_VIEW_URL, extract_job_record, save_job_record, update_job_status
+from http_fetcher import MIN_DELAY_SECONDS, LayoutNotRecognized, http_client_from_driver, parse_job_page
+from waits import load_page
+
+DB_PATH = 'linkedin_jobs.db'
+
+# Revisit settings
+BASE_INTERVAL_HOURS = 24      # Wait before rechecking a job that just changed or was never checked
+INTERVAL_GROWTH = 2.0         # Each unchanged check multiplies the wait...
+MAX_INTERVAL_HOURS = 14 * 24  # ...up to this
+MAX_JOBS_PER_RUN = 200        # Default budget of rechecks per run
+
+# Fields of an ongoing job's record that are hashed to detect changes, in this order.
+# The posting date and the applicant count change every day and are left out.
+HASHED_FIELDS = ("title_name", "company_name", "job_description", "location", "work_model")
+
+
+def ensure_revisit_table(conn):
+    """
+    One row per rechecked job: when it was last checked, when it is due again, the hash of its
+    content at the last check and how many checks in a row found it unchanged.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS job_revisits (
+            job_id TEXT PRIMARY KEY,
+            last_checked_at REAL,
+            next_check_at REAL,
+            content_hash TEXT,
+            unchanged_checks INTEGER DEFAULT 0
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_job_revisits_next_check ON job_revisits (next_check_at)')
+    conn.commit()
+
+
+def content_fields(record):
+    """
+    The hashed fields of an ongoing job's record with runs of whitespace collapsed, so the
+    browser (innerText) and the HTTP parser (its approximation) give the same hash for the
+    same page.
+    """
+    return [" ".join((record.get(field) or "").split()) for field in HASHED_FIELDS]
+
+
+def content_hash(parts):
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def next_interval_hours(unchanged_checks):
+    return min(MAX_INTERVAL_HOURS, BASE_INTERVAL_HOURS * INTERVAL_GROWTH ** unchanged_checks)
+
+
+class RevisitScheduler:
+    """
+    Decides which ongoing jobs are due for a recheck and rechecks them cheaply.
+
+    A job is due when its recheck interval has passed since the last check. Jobs never checked
+    come first, then the oldest postings, which are the most likely to have closed. Every check
+    that finds a job unchanged doubles its interval (up to MAX_INTERVAL_HOURS), a change resets it.
+
+    A recheck reads the job's record (one execute_script call in the browser, one parse of the
+    fetched page over HTTP) and hashes its content fields the same way on both paths. The details
+    are written only when the hash differs from the last check.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.state = {}  # job_id -> (content_hash, unchanged_checks) of the jobs being rechecked
+        self.stats = {"unchanged": 0, "changed": 0, "closed": 0}
+
+    def due_jobs(self, limit=MAX_JOBS_PER_RUN):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            ensure_revisit_table(conn)
+            rows = conn.execute('''
+                SELECT ji.job_id
+                FROM job_ids ji
+                LEFT JOIN job_revisits r ON r.job_id = ji.job_id
+                WHERE ji.status = 'ongoing' AND (r.next_check_at IS NULL OR r.next_check_at <= ?)
+                ORDER BY r.last_checked_at IS NOT NULL, ji.timestamp_added
+                LIMIT ?
+            ''', (time.time(), -1 if limit is None else limit)).fetchall()
+        finally:
+            conn.close()
+        return [row[0] for row in rows]
+
+    def load(self, job_ids):
+        """
+        Loads the last content hash of the jobs about to be rechecked.
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for start in range(0, len(job_ids), 500):
+                chunk = job_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for job_id, previous_hash, unchanged_checks in conn.execute(
+                    f"SELECT job_id, content_hash, unchanged_checks FROM job_revisits WHERE job_id IN ({placeholders})", chunk
+                ):
+                    self.state[job_id] = (previous_hash, unchanged_checks or 0)
+        finally:
+            conn.close()
+
+    def _handle_record(self, record):
+        """
+        Stores the outcome of a recheck: the new status of a closed job, only the check time of
+        an unchanged one, and the full details of a changed one.
+        """
+        job_id = record["job_id"]
+        if record["status"] != "ongoing":
+            save_job_record(record)
+            self.stats["closed"] += 1
+            return
+
+        new_hash = content_hash(content_fields(record))
+        previous_hash, unchanged_checks = self.state.get(job_id, (None, 0))
+        if new_hash == previous_hash:
+            # Only the check time changes, the stored details are still current
+            update_job_status(job_id, "ongoing", JOB_VIEW_URL.format(job_id=job_id))
+            mark_done(job_id)
+            unchanged_checks += 1
+            self.stats["unchanged"] += 1
+        else:
+            save_job_record(record)
+            unchanged_checks = 0
+            self.stats["changed"] += 1
+
+        now = time.time()
+        get_writer().add_revisit(job_id, now, now + next_interval_hours(unchanged_checks) * 3600, new_hash, unchanged_checks)
+
+    def revisit_job(self, driver, job_id):
+        """
+        Rechecks one job in the browser. Used in place of scrape_job_page.
+        """
+        load_page(driver, JOB_VIEW_URL.format(job_id=job_id), "job")
+        try:
+            self._handle_record(extract_job_record(driver, job_id))
+        except Exception as e:
+            print(f"Error rechecking job ID {job_id}: {e}")
+            mark_failed(job_id, e)
+
+    def revisit_job_html(self, page_html, job_id):
+        """
+        Rechecks one job from a page fetched over HTTP.
+
+        Raises:
+        - LayoutNotRecognized: If the page has neither the status markers nor the job top card.
+        """
+        self._handle_record(parse_job_page(page_html, job_id))
+
+    def revisit_jobs(self, driver, job_urls, deadline=None):
+        """
+        Rechecks jobs one after another in the browser until done or the deadline passes.
+
+        Returns:
+        - Number of jobs rechecked.
+        """
+        for count, job_id in enumerate(job_urls):
+            if deadline and time.monotonic() >= deadline:
+                return count
+            self.revisit_job(driver, job_id)
+        return len(job_urls)
+
+    def revisit_jobs_http(self, driver, job_urls, deadline=None, min_delay=MIN_DELAY_SECONDS):
+        """
+        Rechecks jobs over HTTP with the browser's cookies, using the browser only for pages
+        the parser does not recognize.
+
+        Returns:
+        - Number of jobs rechecked.
+        """
+        with http_client_from_driver(driver) as client:
+            for count, job_id in enumerate(job_urls):
+                if deadline and time.monotonic() >= deadline:
+                    return count
+                start = time.monotonic()
+                try:
+                    response = client.get(JOB_VIEW_URL.format(job_id=job_id))
+                    response.raise_for_status()
+                    self.revisit_job_html(response.text, job_id)
+                except (LayoutNotRecognized, httpx.HTTPError) as e:
+                    print(f"Falling back to the browser for job ID {job_id}: {e}")
+                    self.revisit_job(driver, job_id)
+                except Exception as e:
+                    print(f"Error rechecking job ID {job_id}: {e}")
+                    mark_failed(job_id, e)
+
+                # Keep at least min_delay (plus jitter) between requests
+                elapsed = time.monotonic() - start
+                time.sleep(max(0.0, min_delay + random.uniform(0, min_delay / 2) - elapsed))
+        return len(job_urls)
+
+    def report(self):
+        flush_writer()
+        print(f"Rechecked {sum(self.stats.values())} jobs: {self.stats['closed']} closed, "
+              f"{self.stats['changed']} changed, {self.stats['unchanged']} unchanged.")
@@ -0,0 +1,140 @@
+import threading
+import time
+from queue import Queue, Empty
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from page_scraper import init_driver, scrape_job_page
+from browser_session import ensure_logged_in, get_chromedriver_path
+from crawl_frontier import mark_failed
+from db_writer import flush_writer
+from metrics import metrics
+
+# Default pool settings
+POOL_WORKERS = 3
+REQUESTS_PER_MINUTE = 30   # Overall budget shared by all workers
+LOGIN_STAGGER_SECONDS = 5  # Delay between worker logins so they do not all hit the login page at once
+
+
+class RateLimiter:
+    """
+    Spaces out calls so that at most one call starts every `interval` seconds.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next_time = time.monotonic()
+
+    def wait(self):
+        now = time.monotonic()
+        if now < self._next_time:
+            time.sleep(self._next_time - now)
+            metrics.observe("sleep", self._next_time - now, source="pool")
+            now = self._next_time
+        self._next_time = now + self.interval
+
+
+def _worker(worker_number, job_queue, interval, login, headless, lean, driver_path, stats, process_job, deadline):
+    """
+    Starts one browser, logs in and processes job IDs from the queue until it is empty or the
+    deadline has passed.
+    """
+    time.sleep(worker_number * LOGIN_STAGGER_SECONDS if login else 0)
+
+    driver = None
+    try:
+        driver = init_driver(headless=headless, driver_path=driver_path, lean=lean)
+        if login:
+            # Reuses the saved session cookies when they are still valid
+            ensure_logged_in(driver)
+
+        limiter = RateLimiter(interval)
+        while deadline is None or time.monotonic() < deadline:
+            try:
+                job_id = job_queue.get_nowait()
+            except Empty:
+                break
+
+            limiter.wait()
+            try:
+                process_job(driver, job_id)
+                stats[worker_number] += 1
+            except TimeoutException as e:
+                # A slow page fails only this job, the browser is still usable
+                print(f"Error processing job ID {job_id}: {e}")
+                mark_failed(job_id, e)
+            except WebDriverException:
+                # The browser is gone, hand the job back so another worker can pick it up
+                job_queue.put(job_id)
+                job_queue.task_done()
+                raise
+            except Exception as e:
+                # A broken job posting fails only this job, retried later through the crawl frontier
+                print(f"Error processing job ID {job_id}: {e}")
+                mark_failed(job_id, e)
+            job_queue.task_done()
+
+    except Exception as e:
+        print(f"Worker {worker_number} stopped: {e}")
+    finally:
+        if driver:
+            if getattr(driver, "page_metrics", None):
+                driver.page_metrics.report()
+            try:
+                driver.quit()
+            except Exception:
+                pass  # The browser may already be gone (e.g. after a failed login)
+
+
+def get_job_details_pool(job_urls, workers=POOL_WORKERS, requests_per_minute=None, login=True, headless=False, lean=False,
+                         process_job=scrape_job_page, deadline=None, driver_path=None):
+    """
+    Scrapes job details with several browsers working through a shared queue of job IDs.
+
+    Parameters:
+    - job_urls: List of job IDs to scrape.
+    - workers: Number of WebDriver workers to start.
+    - requests_per_minute: Page loads per minute across all workers. Each worker is limited
+      to requests_per_minute / workers so the total stays within the budget.
+    - login: Whether each worker logs in (or restores the saved session) before scraping.
+    - headless: Whether to start the browsers headless.
+    - lean: Whether to start the browsers with the lean profile (see lean_browser.py).
+    - process_job: Called with (driver, job_id) for every job, scrape_job_page by default.
+    - deadline: time.monotonic() value after which workers stop taking new jobs.
+    - driver_path: Path to chromedriver, the cached one from browser_session.py by default.
+
+    Returns:
+    - Number of jobs processed.
+    """
+    if not job_urls:
+        return 0
+
+    requests_per_minute = requests_per_minute or REQUESTS_PER_MINUTE
+    workers = max(1, min(workers, len(job_urls)))
+    interval = 60.0 * workers / requests_per_minute
+
+    # Look up chromedriver once instead of once per worker
+    driver_path = driver_path or get_chromedriver_path()
+
+    job_queue = Queue()
+    for job_id in job_urls:
+        job_queue.put(job_id)
+
+    print(f"Starting {workers} workers for {len(job_urls)} jobs ({requests_per_minute} requests per minute).")
+
+    stats = [0] * workers
+    threads = [
+        threading.Thread(
+            target=_worker, args=(n, job_queue, interval, login, headless, lean, driver_path, stats, process_job, deadline), daemon=True
+        )
+        for n in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    flush_writer()
+
+    processed = sum(stats)
+    remaining = job_queue.qsize()
+    print(f"Pool finished: {processed} jobs processed, {remaining} left unprocessed.")
+    return processed
@@ -0,0 +1,270 @@
+import json
+import math
+import os
+import re
+import time
+from urllib.parse import urlparse, parse_qs, quote
+import httpx
+from selenium.common.exceptions import WebDriverException
+from page_scraper import LINKEDIN_BASE_URL
+from waits import load_page, throttle
+from http_fetcher import HTTP_TIMEOUT_SECONDS, _session_settings
+from metrics import metrics
+
+# Search API settings
+PAGE_SIZE = 25
+MAX_RESULTS = 1000            # LinkedIn never returns results past start=1000
+RESPONSE_TIMEOUT = 15         # Seconds to wait for the search response to show up in the network log
+NETWORK_IDLE_SECONDS = 1.0    # The page's search responses are complete after this long without a new one
+FIXTURE_FOLDER = "./fixtures/search/"
+SEARCH_API_PATTERN = re.compile(r"/voyager/api/(voyagerJobsDashJobCards|search/hits|jobs/search)")
+SEARCH_API_URL = (
+    LINKEDIN_BASE_URL + "/voyager/api/voyagerJobsDashJobCards"
+    "?decorationId=com.linkedin.voyager.dash.deco.jobs.search.JobSearchCardsCollection-220"
+    "&count={count}&q=jobSearch&query={query}&start={start}"
+)
+
+# Job posting URNs as they appear in search responses
+JOB_URN_PATTERN = re.compile(r"urn:li:(?:fsd_jobPostingCard|fsd_jobPosting|jobPosting|fs_normalized_jobPosting):\(?(\d+)")
+
+
+def _find_total(payload):
+    """
+    Walks the response looking for paging.total.
+    """
+    if isinstance(payload, dict):
+        paging = payload.get("paging")
+        if isinstance(paging, dict) and isinstance(paging.get("total"), int):
+            return paging["total"]
+        values = payload.values()
+    elif isinstance(payload, list):
+        values = payload
+    else:
+        return None
+
+    for value in values:
+        total = _find_total(value)
+        if total is not None:
+            return total
+    return None
+
+
+def parse_search_response(payload):
+    """
+    Extracts the job IDs (in result order, without duplicates) and the total result count from a
+    search API response.
+
+    Parameters:
+    - payload: The response as text or already decoded JSON.
+
+    Returns:
+    - (job_ids, total) where total is None if the response has no paging information.
+    """
+    if isinstance(payload, (str, bytes)):
+        payload = json.loads(payload)
+
+    # Only the result elements decide the order; "included" repeats the same postings
+    elements = payload.get("data", payload).get("elements", []) if isinstance(payload, dict) else payload
+    job_ids = list(dict.fromkeys(JOB_URN_PATTERN.findall(json.dumps(elements))))
+    if not job_ids:
+        job_ids = list(dict.fromkeys(JOB_URN_PATTERN.findall(json.dumps(payload))))
+    return job_ids, _find_total(payload)
+
+
+def _response_start(url):
+    """
+    Returns the start parameter of a search API URL, or None if it has none.
+    """
+    start = parse_qs(urlparse(url).query).get("start")
+    return int(start[0]) if start and start[0].isdigit() else None
+
+
+def _read_search_responses(driver, start=None, timeout=RESPONSE_TIMEOUT, idle=NETWORK_IDLE_SECONDS):
+    """
+    Reads the performance log until the search API responses of the page have arrived and
+    returns their decoded bodies. The log is drained until no new search response has shown up
+    for `idle` seconds, so late responses are not left behind for the next page, and responses
+    whose start parameter is not `start` are left out.
+    """
+    bodies = []
+    deadline = time.monotonic() + timeout
+    last_response = None
+    while time.monotonic() < deadline:
+        for entry in driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            if message.get("method") != "Network.responseReceived":
+                continue
+            response = message["params"]["response"]
+            if not SEARCH_API_PATTERN.search(response["url"]) or response.get("status") != 200:
+                continue
+            response_start = _response_start(response["url"])
+            if start is not None and response_start is not None and response_start != start:
+                continue  # A response for another results page
+            try:
+                body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": message["params"]["requestId"]})
+                bodies.append(json.loads(body["body"]))
+                last_response = time.monotonic()
+            except (WebDriverException, json.JSONDecodeError):
+                pass  # The body may already be gone or not be JSON
+        if bodies and time.monotonic() - last_response >= idle:
+            return bodies
+        time.sleep(0.2)
+    return bodies
+
+
+def collect_from_network_log(driver, job_search_url_template, job_urls, stop_early=None, pages=None):
+    """
+    Opens each search results page and takes the job IDs and the total count from the search API
+    responses in the browser's performance log, instead of scrolling the results list.
+    Requires a driver started with init_driver(network_log=True).
+    Without paging.total in the responses, paging goes on until a page is short or has no new IDs.
+    """
+    driver.get_log("performance")  # Drop anything logged before the search
+    total = None
+    page_number = 0
+    seen = set(job_urls)
+
+    while True:
+        start = page_number * PAGE_SIZE
+        collected_page = pages.get(start) if pages else None
+        if collected_page:
+            page_ids, total = collected_page
+        else:
+            load_page(driver, f"{job_search_url_template}&start={start}", "search")
+            page_ids = []
+            for body in _read_search_responses(driver, start):
+                ids, page_total = parse_search_response(body)
+                page_ids.extend(job_id for job_id in ids if job_id not in page_ids)
+                total = page_total if page_total is not None else total
+            if pages and page_ids:
+                pages.put(start, page_ids, total)
+
+        if not page_ids:
+            if page_number == 0:
+                raise RuntimeError("No search API responses found in the network log")
+            break
+        new_ids = [job_id for job_id in page_ids if job_id not in seen]
+        seen.update(new_ids)
+        job_urls.extend(page_ids)
+
+        page_number += 1
+        last_page = math.ceil(min(total if total is not None else MAX_RESULTS, MAX_RESULTS) / PAGE_SIZE)
+        print(f"Search page {page_number}: {len(page_ids)} job IDs ({len(job_urls)} of {total}).")
+        if page_number >= last_page or (stop_early and stop_early(page_ids)):
+            break
+        if total is None and (not new_ids or len(page_ids) < PAGE_SIZE):
+            break
+
+
+def build_search_api_url(job_search_url_template, start, count=PAGE_SIZE):
+    """
+    Builds the search API URL for the keywords, geoId, sort order and time filter of a search URL.
+    """
+    params = parse_qs(urlparse(job_search_url_template).query)
+    query_parts = ["origin:JOB_SEARCH_PAGE_JOB_FILTER"]
+    if params.get("keywords"):
+        query_parts.append(f"keywords:{params['keywords'][0]}")
+    if params.get("geoId"):
+        query_parts.append(f"locationUnion:(geoId:{params['geoId'][0]})")
+    filters = [f"{name}:List({params[key][0]})" for key, name in (("sortBy", "sortBy"), ("f_TPR", "timePostedRange"))
+               if params.get(key)]
+    if filters:
+        query_parts.append(f"selectedFilters:({','.join(filters)})")
+    query = quote(f"({','.join(query_parts)})", safe="(),:")
+    return SEARCH_API_URL.format(count=count, query=query, start=start)
+
+
+def collect_from_api(driver, job_search_url_template, job_urls, stop_early=None, pages=None):
+    """
+    Calls the search API directly with the browser session's cookies and pages through the
+    results until the total reported by the API is reached.
+    """
+    cookies, headers = _session_settings(driver)
+    headers.update({
+        "Accept": "application/vnd.linkedin.normalized+json+2.1",
+        "csrf-token": (cookies.get("JSESSIONID") or "").strip('"'),
+        "x-restli-protocol-version": "2.0.0",
+    })
+
+    with httpx.Client(cookies=cookies, headers=headers, timeout=HTTP_TIMEOUT_SECONDS) as client:
+        start, total = 0, None
+        while start < min(total if total is not None else MAX_RESULTS, MAX_RESULTS):
+            collected_page = pages.get(start) if pages else None
+            if collected_page:
+                page_ids, total = collected_page
+            else:
+                throttle.pause("search_api")
+                started = time.monotonic()
+                response = client.get(build_search_api_url(job_search_url_template, start))
+                response.raise_for_status()
+                throttle.record("search_api", time.monotonic() - started)
+                metrics.observe("http_fetch", time.monotonic() - started, page_type="search_api")
+
+                page_ids, page_total = parse_search_response(response.json())
+                total = page_total if page_total is not None else total
+                if pages and page_ids:
+                    pages.put(start, page_ids, total)
+            if not page_ids:
+                break
+            job_urls.extend(page_ids)
+            start += PAGE_SIZE
+            print(f"Search API: {len(job_urls)} of {total} job IDs collected.")
+            if stop_early and stop_early(page_ids):
+                break
+
+
+def collect_job_ids(driver, job_search_url_template, job_urls, source="network", stop_early=None, pages=None):
+    """
+    Collects job IDs from search responses into job_urls. Falls back to scrolling the results
+    list if no search response could be read. stop_early and pages work as in
+    collect_job_ids_by_scrolling.
+    """
+    from page_scraper import collect_job_ids_by_scrolling
+
+    try:
+        if source == "api":
+            collect_from_api(driver, job_search_url_template, job_urls, stop_early, pages)
+        else:
+            collect_from_network_log(driver, job_search_url_template, job_urls, stop_early, pages)
+    except (RuntimeError, httpx.HTTPError, WebDriverException) as e:
+        if job_urls:
+            raise
+        print(f"Could not read search responses ({e}), falling back to scrolling the results.")
+        collect_job_ids_by_scrolling(driver, job_search_url_template, job_urls, stop_early, pages)
+
+
+def check_fixtures(fixture_folder=FIXTURE_FOLDER):
+    """
+    Parses the recorded search responses in the fixture folder and compares the job IDs and
+    totals with expected.json.
+
+    Returns:
+    - List of (file name, expected, actual) mismatches; empty when the parser is up to date.
+    """
+    with open(os.path.join(fixture_folder, "expected.json"), encoding="utf-8") as f:
+        expected = json.load(f)
+
+    mismatches = []
+    for name, expected_result in expected.items():
+        with open(os.path.join(fixture_folder, name), encoding="utf-8") as f:
+            job_ids, total = parse_search_response(f.read())
+        actual = {"total": total, "job_ids": job_ids}
+        if actual != expected_result:
+            mismatches.append((name, expected_result, actual))
+
+    for name, expected_result, actual in mismatches:
+        print(f"{name}: expected {expected_result}, got {actual}")
+    print(f"Checked {len(expected)} search responses, {len(mismatches)} mismatches.")
+    return mismatches
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Checks the recorded responses in fixtures/search/, or prints what is found in the given files
+    if len(sys.argv) == 1:
+        sys.exit(1 if check_fixtures() else 0)
+    for path in sys.argv[1:]:
+        with open(path, encoding="utf-8") as f:
+            ids, total = parse_search_response(f.read())
+        print(f"{path}: {len(ids)} job IDs, total {total}: {', '.join(ids)}")
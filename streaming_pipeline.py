@@ -0,0 +1,227 @@
+import asyncio
+import concurrent.futures
+import os
+import sqlite3
+import threading
+import time
+from openai import AsyncOpenAI
+from chatgpt_analysis import cv_folder, db_path, get_most_recent_pdf, extract_text_from_pdf, ensure_analysis_table, parse_score
+from async_analysis import CONCURRENCY, REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE, TokenBucket, _score_job, analyze_jobs_async
+from db_writer import get_writer, flush_writer
+from page_scraper import scrape_linkedin_jobs
+from near_duplicates import RunIndex, ensure_dedup_tables, minhash_signature, scored_duplicate
+
+QUEUE_SIZE = 32               # Scraped jobs waiting for ChatGPT; scraping pauses while the queue is full
+PUT_CHECK_SECONDS = 0.5       # How often a blocked producer checks whether the pipeline was stopped
+
+
+class PipelineStopped(Exception):
+    """
+    Raised in the scraping thread when the scoring side has shut down.
+    """
+
+
+class StageStats:
+    """
+    Counts and timings of one pipeline stage, for the throughput report.
+    """
+
+    def __init__(self, name, workers=1):
+        self.name = name
+        self.workers = workers
+        self.count = 0
+        self.waited = 0.0     # Seconds blocked on the other stage, summed over the workers
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.started = time.monotonic()
+
+    def finish(self):
+        self.finished = time.monotonic()
+
+    def add(self, count=1, waited=0.0):
+        with self._lock:
+            self.count += count
+            self.waited += waited
+
+    def report(self, waited_for):
+        elapsed = (self.finished or time.monotonic()) - (self.started or time.monotonic())
+        rate = self.count / elapsed * 60 if elapsed > 0 else 0
+        print(f"{self.name}: {self.count} jobs in {elapsed:.0f}s ({rate:.1f} jobs/min), "
+              f"{self.waited / self.workers:.0f}s waiting for {waited_for}.")
+
+
+async def _consume(queue, stats, client, semaphore, request_bucket, token_bucket, writer, user_cv, prompt_suffix, conn,
+                   run_index, analyses):
+    """
+    Scores jobs from the queue until it receives the end marker (None). A job that is a
+    near-duplicate of an analyzed job takes over its analysis instead (see near_duplicates.py),
+    as does a near-duplicate of a job scored earlier in this run, which may still be waiting for
+    its answer or for the writer to flush it.
+
+    run_index and analyses are shared by the consumers: the RunIndex of the jobs scored in this
+    run, and a future with the ChatGPT message (or None) of each of them.
+    """
+    while True:
+        waiting_since = time.monotonic()
+        record = await queue.get()
+        stats.add(0, time.monotonic() - waiting_since)
+        if record is None:
+            return
+
+        duplicate = scored_duplicate(conn, record["job_description"], record["job_id"])
+        if duplicate:
+            print(f"Job ID {record['job_id']} is a near-duplicate of job ID {duplicate[0]}, analysis taken over.")
+            writer.add_analysis(record["job_id"], duplicate[1], duplicate[2])
+            stats.add(1)
+            continue
+
+        signature = minhash_signature(record["job_description"])
+        in_run = run_index.find(signature) if signature is not None else None
+        if in_run:
+            chatgpt_message = await analyses[in_run[0]]
+            if chatgpt_message is not None:
+                print(f"Job ID {record['job_id']} is a near-duplicate of job ID {in_run[0]}, analysis taken over.")
+                writer.add_analysis(record["job_id"], chatgpt_message, parse_score(chatgpt_message))
+                stats.add(1)
+                continue
+
+        # Registered before the first await, so later duplicates wait for this answer
+        analysis = asyncio.get_running_loop().create_future()
+        if signature is not None and not in_run:
+            run_index.add(record["job_id"], signature)
+            analyses[record["job_id"]] = analysis
+        chatgpt_message = None
+        try:
+            chatgpt_message = await _score_job(
+                client, semaphore, request_bucket, token_bucket, writer, user_cv,
+                record["job_id"], record["job_description"], prompt_suffix
+            )
+        finally:
+            analysis.set_result(chatgpt_message)
+        stats.add(1 if chatgpt_message is not None else 0)
+
+
+async def run_streaming_pipeline(job_search_url_template, prompt_suffix, driver=None, queue_size=QUEUE_SIZE,
+                                 concurrency=CONCURRENCY, requests_per_minute=REQUESTS_PER_MINUTE,
+                                 tokens_per_minute=TOKENS_PER_MINUTE, base_url=None, **scrape_kwargs):
+    """
+    Scrapes new jobs and scores them with ChatGPT at the same time.
+
+    scrape_linkedin_jobs runs in a background thread and puts every new ongoing job into a bounded
+    queue as soon as it is stored. `concurrency` scoring tasks take jobs from the queue and write the
+    analysis through the shared writer as each response arrives. A full queue pauses the scraping
+    (backpressure), so the browser never gets more than queue_size jobs ahead of ChatGPT.
+
+    Jobs left unanalyzed by earlier runs are scored afterwards with analyze_jobs_async.
+
+    Parameters:
+    - job_search_url_template, driver and scrape_kwargs: As for scrape_linkedin_jobs.
+    - prompt_suffix, concurrency, requests_per_minute, tokens_per_minute, base_url: As for analyze_jobs_async.
+    - queue_size: Maximum number of scraped jobs waiting to be scored.
+
+    Returns:
+    - Number of jobs analyzed while scraping.
+    """
+    cv_path = get_most_recent_pdf(cv_folder)
+    print(f"Using CV file: {cv_path}")
+    user_cv = extract_text_from_pdf(cv_path)
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=queue_size)
+    stopped = threading.Event()
+    scraping_done = loop.create_future()
+    scrape_stats, score_stats = StageStats("Scraping"), StageStats("Scoring", concurrency)
+
+    def on_record(record):
+        # Called in the scraping thread for every stored job
+        if not record or record["status"] != "ongoing" or not record.get("job_description"):
+            return
+        waiting_since = time.monotonic()
+        if stopped.is_set() or loop.is_closed():
+            raise PipelineStopped("scoring has stopped")
+        future = asyncio.run_coroutine_threadsafe(queue.put(record), loop)
+        while True:
+            try:
+                future.result(timeout=PUT_CHECK_SECONDS)
+                break
+            except concurrent.futures.TimeoutError:
+                if stopped.is_set():
+                    future.cancel()
+                    raise PipelineStopped("scoring has stopped")
+            except concurrent.futures.CancelledError:
+                # The event loop shut down and cancelled the waiting put
+                raise PipelineStopped("scoring has stopped")
+        scrape_stats.add(1, time.monotonic() - waiting_since)
+
+    def produce():
+        scrape_stats.start()
+        try:
+            scrape_linkedin_jobs(job_search_url_template, driver=driver, on_record=on_record, **scrape_kwargs)
+        except PipelineStopped:
+            print("Scraping stopped because scoring has stopped.")
+        finally:
+            scrape_stats.finish()
+            loop.call_soon_threadsafe(lambda: scraping_done.done() or scraping_done.set_result(None))
+
+    client = AsyncOpenAI(
+        api_key=os.environ['OPENAI_API_KEY'],
+        base_url=base_url or os.getenv("OPENAI_BASE_URL"),
+        max_retries=0,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    request_bucket = TokenBucket(requests_per_minute)
+    token_bucket = TokenBucket(tokens_per_minute)
+    writer = get_writer()
+
+    # Read-only lookups of analyzed near-duplicates, plus the ones scored in this run
+    conn = sqlite3.connect(db_path)
+    ensure_analysis_table(conn)
+    ensure_dedup_tables(conn)
+    run_index, analyses = RunIndex(), {}
+
+    # Daemon thread, so an interrupted run does not wait for the browser to finish
+    producer = threading.Thread(target=produce, name="scraper", daemon=True)
+    score_stats.start()
+    consumers = [
+        asyncio.create_task(
+            _consume(queue, score_stats, client, semaphore, request_bucket, token_bucket, writer, user_cv, prompt_suffix, conn,
+                     run_index, analyses)
+        )
+        for _ in range(concurrency)
+    ]
+    producer.start()
+
+    try:
+        await scraping_done
+        for _ in consumers:
+            await queue.put(None)
+        await asyncio.gather(*consumers)
+    finally:
+        # Unblocks the scraping thread if scoring stopped early
+        stopped.set()
+        for consumer in consumers:
+            consumer.cancel()
+        score_stats.finish()
+        flush_writer()
+        await client.close()
+        conn.close()
+
+    scrape_stats.report("ChatGPT (queue full)")
+    score_stats.report("scraped jobs")
+
+    # Jobs scraped by earlier runs that were never scored
+    await analyze_jobs_async(
+        prompt_suffix, concurrency=concurrency, requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute, base_url=base_url,
+    )
+    return score_stats.count
+
+
+def run_streaming_pipeline_sync(job_search_url_template, prompt_suffix, **kwargs):
+    """
+    Synchronous entry point for run_streaming_pipeline.
+    """
+    return asyncio.run(run_streaming_pipeline(job_search_url_template, prompt_suffix, **kwargs))
@@ -0,0 +1,93 @@
+import os
+import sqlite3
+import sys
+import pytest
+
+# The modules live in the repository root, next to main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# chatgpt_analysis creates its OpenAI client at import time
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Runs the test in an empty directory, as the pipeline reads and writes relative paths
+    (linkedin_jobs.db, user_data/), with the process-wide writer, cache and memos reset.
+    """
+    import chatgpt_analysis
+    import crawl_frontier
+    import db_writer
+    import llm_cache
+    import prefilter
+    from metrics import metrics
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(db_writer, "_writer", None)
+    monkeypatch.setattr(llm_cache, "_cache", None)
+    monkeypatch.setattr(prefilter, "_selection_active", False)
+    monkeypatch.setattr(crawl_frontier, "_resumed_databases", set())
+    monkeypatch.setattr(chatgpt_analysis, "_recent_pdf_memo", {})
+    metrics.reset()
+    yield tmp_path
+
+    if db_writer._writer is not None:
+        db_writer._writer.close()
+    if llm_cache._cache is not None:
+        llm_cache._cache.close()
+
+
+@pytest.fixture
+def add_jobs(workdir):
+    """
+    Returns a function that stores ongoing jobs with the given descriptions, as the scraper
+    does, and returns their job IDs.
+    """
+    from page_scraper import setup_database, save_job_record
+    from chatgpt_analysis import ensure_analysis_table
+    from db_writer import flush_writer
+
+    setup_database()
+    conn = sqlite3.connect("linkedin_jobs.db")
+    ensure_analysis_table(conn)
+    conn.close()
+
+    def add(descriptions, first_job_id=4200000000):
+        job_ids = []
+        for number, description in enumerate(descriptions):
+            job_id = str(first_job_id + number)
+            save_job_record({
+                "job_id": job_id, "status": "ongoing", "company_name": "Acme", "title_name": "Data Analyst",
+                "job_description": description, "location": "Berlin, Germany", "posted_date": "2 days ago",
+                "num_applicants": "12 applicants", "work_model": "Hybrid",
+            })
+            job_ids.append(job_id)
+        flush_writer()
+        return job_ids
+
+    return add
+
+
+@pytest.fixture
+def cv_pdf(workdir):
+    """
+    Writes the CV the analysis stages read to user_data/cv.pdf.
+    """
+    from benchmark import write_cv_pdf
+
+    os.makedirs("user_data", exist_ok=True)
+    write_cv_pdf(os.path.join("user_data", "cv.pdf"))
+    return os.path.join("user_data", "cv.pdf")
+
+
+@pytest.fixture
+def distinct_descriptions():
+    """
+    Returns a function that builds job descriptions of equal length that share no shingles, so
+    none of them are near-duplicates.
+    """
+    def build(count, words=80):
+        return [" ".join(f"w{number:03d}x{word:03d}" for word in range(words)) for number in range(count)]
+
+    return build
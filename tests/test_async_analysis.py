@@ -0,0 +1,63 @@
+import asyncio
+import sqlite3
+import time
+import pytest
+from async_analysis import analyze_jobs_async, estimate_tokens
+from chatgpt_analysis import build_messages, extract_text_from_pdf
+from fake_openai import start_fake_openai
+from metrics import metrics
+
+PROMPT_SUFFIX = "Score with Python and SQL in mind."
+FORCED_429S = 3
+
+
+@pytest.fixture
+def fake_openai():
+    server = start_fake_openai(latency=0.05, retry_after=0, reply="Score: 8/10")
+
+    # The first requests are rate limited, every later one succeeds
+    rate_limited = []
+
+    def roll_failure():
+        if len(rate_limited) < FORCED_429S:
+            rate_limited.append(True)
+            return 429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}}
+        return None
+
+    server.roll_failure = roll_failure
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_scores_every_job_within_the_limits(add_jobs, cv_pdf, distinct_descriptions, fake_openai):
+    descriptions = distinct_descriptions(12)
+    job_ids = add_jobs(descriptions)
+
+    # A token budget just below what the run needs, so the last requests have to wait for it
+    requests = len(job_ids) + FORCED_429S
+    tokens = estimate_tokens(build_messages(extract_text_from_pdf(cv_pdf), descriptions[0], PROMPT_SUFFIX)) * requests
+    tokens_per_minute = int(tokens * 60 / 61.5)
+
+    started = time.monotonic()
+    analyzed = asyncio.run(analyze_jobs_async(
+        PROMPT_SUFFIX, concurrency=3, requests_per_minute=60000, tokens_per_minute=tokens_per_minute,
+        base_url=fake_openai.base_url,
+    ))
+    elapsed = time.monotonic() - started
+
+    # Every 429 was retried and no job was lost
+    assert analyzed == len(job_ids)
+    assert fake_openai.request_count == requests
+    assert metrics.total("api_errors") == FORCED_429S
+
+    conn = sqlite3.connect("linkedin_jobs.db")
+    rows = dict(conn.execute("SELECT job_id, score FROM chatgpt_analysis").fetchall())
+    conn.close()
+    assert rows == {job_id: 8 for job_id in job_ids}
+
+    # At most `concurrency` requests in flight, and no more tokens than the bucket allows:
+    # capacity plus the refill, so the run needs at least (tokens - capacity) / rate seconds
+    assert 1 <= fake_openai.max_in_flight <= 3
+    assert elapsed >= (tokens - tokens_per_minute) / (tokens_per_minute / 60) - 0.1
+
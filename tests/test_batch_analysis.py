@@ -0,0 +1,97 @@
+import json
+import sqlite3
+import time
+import pytest
+from openai import OpenAI
+import batch_analysis
+from batch_analysis import analyze_jobs_batch, ensure_batch_table, write_batch_files
+from chatgpt_analysis import MODEL, SYSTEM_PROMPT, extract_text_from_pdf
+from fake_openai import start_fake_openai
+from llm_cache import get_cache, cache_key
+
+PROMPT_SUFFIX = "Score with Python and SQL in mind."
+
+
+@pytest.fixture
+def fake_openai(workdir, monkeypatch):
+    server = start_fake_openai(reply="6")
+    monkeypatch.setattr(batch_analysis, "client", OpenAI(api_key="test", base_url=server.base_url))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def stored_scores():
+    conn = sqlite3.connect("linkedin_jobs.db")
+    rows = dict(conn.execute("SELECT job_id, score FROM chatgpt_analysis").fetchall())
+    conn.close()
+    return rows
+
+
+def test_failed_requests_are_requeued(add_jobs, cv_pdf, distinct_descriptions, fake_openai):
+    job_ids = add_jobs(distinct_descriptions(7))
+
+    # The first two answered requests fail, everything after them succeeds
+    failures = []
+
+    def roll_failure():
+        if len(failures) < 2:
+            failures.append(True)
+            return 500, {"error": {"message": "Internal server error", "type": "server_error"}}
+        return None
+
+    fake_openai.roll_failure = roll_failure
+
+    analyzed = analyze_jobs_batch(PROMPT_SUFFIX, poll_seconds=0, max_batch_requests=3)
+
+    assert analyzed == 7
+    assert stored_scores() == {job_id: 6 for job_id in job_ids}
+    # 7 jobs in files of at most 3 requests, then one more batch for the 2 failed requests
+    assert len(fake_openai.batches) == 4
+    conn = sqlite3.connect("linkedin_jobs.db")
+    assert conn.execute("SELECT COUNT(*) FROM openai_batches WHERE status = 'completed'").fetchone() == (4,)
+    conn.close()
+
+
+def test_resumes_an_unfinished_batch(add_jobs, cv_pdf, distinct_descriptions, fake_openai):
+    descriptions = distinct_descriptions(3)
+    job_ids = add_jobs(descriptions)
+    user_cv = extract_text_from_pdf(cv_pdf)
+
+    # An earlier run submitted the jobs and stopped before the batch finished
+    path = write_batch_files(zip(job_ids, descriptions), user_cv, PROMPT_SUFFIX, "earlier")[0]
+    client = batch_analysis.client
+    with open(path, "rb") as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(input_file_id=input_file.id, endpoint="/v1/chat/completions", completion_window="24h")
+    conn = sqlite3.connect("linkedin_jobs.db")
+    ensure_batch_table(conn)
+    with conn:
+        conn.execute(
+            "INSERT INTO openai_batches (batch_id, input_path, status, submitted_at) VALUES (?, ?, ?, ?)",
+            (batch.id, path, "in_progress", time.time()),
+        )
+
+    analyzed = analyze_jobs_batch(PROMPT_SUFFIX, poll_seconds=0)
+
+    assert analyzed == 3
+    assert stored_scores() == {job_id: 6 for job_id in job_ids}
+    assert len(fake_openai.batches) == 1  # Nothing was submitted again
+    assert conn.execute("SELECT status FROM openai_batches").fetchall() == [("completed",)]
+    conn.close()
+
+    # The resumed answers reach the cache like those of a new batch
+    for description in descriptions:
+        assert get_cache().get(cache_key(user_cv, description, PROMPT_SUFFIX, MODEL, SYSTEM_PROMPT)) == "6"
+
+
+def test_batch_files_stay_below_the_limits(tmp_path):
+    jobs = [(str(n), "x" * 200) for n in range(10)]
+
+    paths = write_batch_files(jobs, "cv", "suffix", str(tmp_path / "batch"), max_requests=4)
+    assert [sum(1 for _ in open(path)) for path in paths] == [4, 4, 2]
+
+    line_bytes = len(open(paths[0], "rb").readline())
+    paths = write_batch_files(jobs, "cv", "suffix", str(tmp_path / "small"), max_bytes=line_bytes * 3)
+    assert [sum(1 for _ in open(path)) for path in paths] == [3, 3, 3, 1]
+    assert [json.loads(line)["custom_id"] for path in paths for line in open(path)] == [job_id for job_id, _ in jobs]
@@ -0,0 +1,23 @@
+import json
+import os
+import subprocess
+import sys
+
+BENCHMARK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmark.py")
+
+
+def test_no_browser_run_writes_results_to_the_output_folder(tmp_path):
+    # A separate process, as the pipeline modules read the stand-in URLs at import time
+    output = tmp_path / "results"
+    completed = subprocess.run(
+        [sys.executable, BENCHMARK, "--no-browser", "--jobs", "10", "--delay", "0", "--page-latency", "0",
+         "--openai-latency", "0", "--rate-limit", "0", "--name", "smoke", "--output", str(output)],
+        cwd=tmp_path, capture_output=True, text=True, timeout=300,
+    )
+    assert completed.returncode == 0, completed.stdout + completed.stderr
+
+    with open(output / "smoke.json", encoding="utf-8") as f:
+        result = json.load(f)
+    stages = {stage["stage"]: stage for stage in result["stages"]}
+    assert 0 < stages["scrape"]["jobs"] <= 10
+    assert (output / "smoke.prom").exists()
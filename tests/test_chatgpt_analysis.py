@@ -0,0 +1,36 @@
+import os
+import pytest
+from chatgpt_analysis import get_most_recent_pdf, parse_score
+
+
+def touch(path, mtime):
+    with open(path, "ab"):
+        pass
+    os.utime(path, (mtime, mtime))
+
+
+def test_most_recent_pdf_follows_files_changed_in_place(workdir):
+    folder = str(workdir)
+    touch(os.path.join(folder, "old.pdf"), 1000)
+    touch(os.path.join(folder, "new.pdf"), 2000)
+    touch(os.path.join(folder, "notes.txt"), 3000)
+    folder_mtime = os.stat(folder).st_mtime_ns
+    assert get_most_recent_pdf(folder) == os.path.join(folder, "new.pdf")
+
+    # Overwriting a CV in place does not change the folder's mtime
+    touch(os.path.join(folder, "old.pdf"), 3000)
+    os.utime(folder, ns=(folder_mtime, folder_mtime))
+    assert get_most_recent_pdf(folder) == os.path.join(folder, "old.pdf")
+
+
+def test_no_pdf_raises(workdir):
+    with pytest.raises(FileNotFoundError):
+        get_most_recent_pdf(str(workdir))
+
+
+def test_parse_score():
+    assert parse_score("7") == 7
+    assert parse_score("Score: 8/10") == 8
+    assert parse_score("10") == 10
+    assert parse_score("no idea") is None
+    assert parse_score(None) is None
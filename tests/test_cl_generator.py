@@ -0,0 +1,40 @@
+import os
+import sqlite3
+import pytest
+from cl_generator import cover_letter_path, select_jobs
+
+
+@pytest.fixture
+def scored(add_jobs):
+    job_ids = add_jobs([f"Posting number {number} for a data engineer." for number in range(6)])
+    conn = sqlite3.connect("linkedin_jobs.db")
+    with conn:
+        # Job 0 scores best, job 5 worst
+        conn.executemany(
+            "INSERT INTO chatgpt_analysis (job_id, chatgpt_message, score) VALUES (?, 'Score', ?)",
+            [(job_id, 10 - number) for number, job_id in enumerate(job_ids)],
+        )
+        conn.execute("UPDATE job_ids SET status = 'closed' WHERE job_id = ?", (job_ids[1],))
+    yield conn, job_ids
+    conn.close()
+
+
+def test_only_jobs_with_the_status_are_picked(scored):
+    conn, job_ids = scored
+    jobs, skipped = select_jobs(conn, top_n=3)
+    assert [job_id for job_id, _ in jobs] == [job_ids[0], job_ids[2], job_ids[3]]
+    assert skipped == []
+
+    jobs, _ = select_jobs(conn, top_n=3, status=None)
+    assert [job_id for job_id, _ in jobs] == job_ids[:3]
+
+
+def test_existing_letters_do_not_shorten_the_selection(scored):
+    conn, job_ids = scored
+    os.makedirs(os.path.dirname(cover_letter_path(job_ids[0])), exist_ok=True)
+    for job_id in job_ids[:3]:
+        open(cover_letter_path(job_id), "w").close()
+
+    jobs, skipped = select_jobs(conn, top_n=2)
+    assert [job_id for job_id, _ in jobs] == [job_ids[3], job_ids[4]]
+    assert skipped == [job_ids[0], job_ids[2]]
@@ -0,0 +1,104 @@
+import sqlite3
+import time
+import crawl_frontier
+from crawl_frontier import Frontier, mark_done, mark_failed, BACKOFF_SECONDS, MAX_ATTEMPTS
+from db_writer import flush_writer
+
+
+def frontier_row(job_id):
+    conn = sqlite3.connect("linkedin_jobs.db")
+    row = conn.execute(
+        "SELECT state, attempts, next_attempt_at FROM crawl_frontier WHERE job_id = ?", (job_id,)
+    ).fetchone()
+    conn.close()
+    return row
+
+
+def test_claim_takes_pending_jobs_oldest_first(workdir):
+    with Frontier() as frontier:
+        assert frontier.add(["1", "2", "3"], "new") == 3
+        assert frontier.add(["2", "4"], "new") == 1  # Pending jobs are not added twice
+
+        assert frontier.claim("new", 2) == ["1", "2"]
+        assert frontier.claim("new") == ["3", "4"]
+        assert frontier.claim("new") == []
+        assert frontier_row("1")[:2] == ("in_progress", 1)
+
+
+def test_done_jobs_are_not_claimed_again(workdir):
+    with Frontier() as frontier:
+        frontier.add(["1", "2"], "new")
+        frontier.claim("new")
+        mark_done("1")
+        mark_done("2")
+        flush_writer()
+        assert frontier.counts() == {"new": {"done": 2}}
+
+        # A done job comes back only when it is added again
+        assert frontier.add(["1"], "recheck") == 1
+        assert frontier.claim("recheck") == ["1"]
+
+
+def test_release_returns_only_unprocessed_claims(workdir):
+    with Frontier() as frontier:
+        frontier.add(["1", "2", "3"], "recheck")
+        frontier.claim("recheck")
+        mark_done("1")
+
+        assert frontier.release("recheck") == 2
+        assert frontier_row("1")[:2] == ("done", 1)
+        # The attempt claim() counted is taken back, so budget cut-offs never use up retries
+        assert frontier_row("2")[:2] == ("pending", 0)
+        assert frontier.claim("recheck") == ["2", "3"]
+
+
+def test_release_leaves_other_instances_claims_alone(workdir):
+    first, second = Frontier(), Frontier()
+    first.add(["1", "2"], "new")
+    assert first.claim("new", 1) == ["1"]
+    assert second.claim("new") == ["2"]
+
+    assert first.release("new") == 1
+    assert frontier_row("2")[0] == "in_progress"
+    first.close()
+    second.close()
+
+
+def test_failures_back_off_until_max_attempts(workdir):
+    with Frontier() as frontier:
+        frontier.add(["1"], "new")
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            frontier.conn.execute("UPDATE crawl_frontier SET next_attempt_at = 0")
+            frontier.conn.commit()
+            assert frontier.claim("new") == ["1"]
+
+            failed_at = time.time()
+            mark_failed("1", "timeout")
+            flush_writer()
+            state, attempts, next_attempt_at = frontier_row("1")
+            assert attempts == attempt
+            if attempt < MAX_ATTEMPTS:
+                # Backoff doubles with every failure and the job waits for it
+                assert state == "pending"
+                assert abs(next_attempt_at - failed_at - BACKOFF_SECONDS * 2 ** (attempt - 1)) < 5
+                assert frontier.claim("new") == []
+            else:
+                assert state == "failed"
+
+        assert frontier.retry_failed() == 1
+        assert frontier.claim("new") == ["1"]
+
+
+def test_interrupted_jobs_are_resumed_by_the_next_process(workdir, monkeypatch):
+    with Frontier() as frontier:
+        frontier.add(["1", "2"], "new")
+        frontier.claim("new")
+
+    # Later instances in the same process leave the claims alone
+    with Frontier() as frontier:
+        assert frontier.claim("new") == []
+
+    # A new process resets what the killed run left in progress
+    monkeypatch.setattr(crawl_frontier, "_resumed_databases", set())
+    with Frontier() as frontier:
+        assert frontier.claim("new") == ["1", "2"]
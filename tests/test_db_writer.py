@@ -0,0 +1,91 @@
+import sqlite3
+import time
+import pytest
+from db_writer import DBWriter
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE job_ids (job_id TEXT PRIMARY KEY, status TEXT, timestamp_added TEXT, "
+                 "timestamp_updated TEXT, job_url TEXT)")
+    conn.close()
+    return path
+
+
+def stored(db_path):
+    conn = sqlite3.connect(db_path)
+    count = conn.execute("SELECT COUNT(*) FROM job_ids").fetchone()[0]
+    conn.close()
+    return count
+
+
+def add(writer, count, first=0):
+    for number in range(first, first + count):
+        writer.add_status(str(number), "ongoing", f"https://example.com/{number}", "2024-01-01 00:00:00")
+
+
+def test_flushes_at_flush_rows(db_path):
+    with DBWriter(db_path, flush_rows=5, flush_seconds=3600) as writer:
+        add(writer, 4)
+        assert stored(db_path) == 0
+        add(writer, 1, first=4)
+        assert stored(db_path) == 5
+
+
+def test_flushes_on_the_timer(db_path):
+    with DBWriter(db_path, flush_rows=1000, flush_seconds=0.1) as writer:
+        add(writer, 3)
+        deadline = time.monotonic() + 5
+        while stored(db_path) < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert stored(db_path) == 3
+
+
+def test_close_drains_the_buffers(db_path):
+    writer = DBWriter(db_path, flush_rows=1000, flush_seconds=3600)
+    add(writer, 7)
+    writer.close()
+    assert stored(db_path) == 7
+    assert writer._closed
+
+
+def test_atexit_drains_the_buffers(db_path, monkeypatch):
+    registered = []
+    monkeypatch.setattr("atexit.register", registered.append)
+    monkeypatch.setattr("atexit.unregister", lambda function: None)
+    writer = DBWriter(db_path, flush_rows=1000, flush_seconds=3600)
+    add(writer, 2)
+
+    # What the interpreter runs at exit
+    assert registered == [writer.close]
+    registered[0]()
+    assert stored(db_path) == 2
+
+
+def test_database_errors_keep_the_rows_and_the_timer(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    writer = DBWriter(path, flush_rows=2, flush_seconds=0.1)
+    try:
+        # No job_ids table yet: the size-triggered flush fails without raising from add_status
+        add(writer, 3)
+        time.sleep(0.3)
+        assert writer._timer.is_alive()
+        assert writer._pending() == 3
+        with pytest.raises(sqlite3.Error):
+            writer.flush()
+
+        # Once the table exists, the timer writes the rows it kept
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE job_ids (job_id TEXT PRIMARY KEY, status TEXT, timestamp_added TEXT, "
+                     "timestamp_updated TEXT, job_url TEXT)")
+        conn.commit()
+        conn.close()
+        deadline = time.monotonic() + 5
+        while writer._pending() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert stored(path) == 3
+        assert writer._timer.is_alive()
+    finally:
+        writer.close()
@@ -0,0 +1,27 @@
+import sqlite3
+import pytest
+from job_search import rebuild_search_index, search_jobs
+
+
+@pytest.fixture
+def conn(add_jobs):
+    add_jobs([
+        "Senior data engineer building Python and SQL pipelines for a fintech.",
+        "Frontend developer working with React and TypeScript.",
+    ])
+    conn = sqlite3.connect("linkedin_jobs.db")
+    with conn:
+        rebuild_search_index(conn)
+    yield conn
+    conn.close()
+
+
+def test_all_words_must_match(conn):
+    results = search_jobs("python fintech", conn=conn)
+    assert [result["job_id"] for result in results] == ["4200000000"]
+    assert search_jobs("python react", conn=conn) == []
+
+
+@pytest.mark.parametrize("query", ["", "   ", "\t\n"])
+def test_blank_query_returns_no_results(conn, query):
+    assert search_jobs(query, conn=conn) == []
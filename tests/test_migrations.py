@@ -0,0 +1,91 @@
+import sqlite3
+from datetime import datetime
+import pytest
+from migrations import SCHEMA_VERSION, TIMESTAMP_FORMAT, migrate, parse_applicants, parse_posted_date
+
+
+@pytest.fixture
+def baseline_db(workdir):
+    """
+    A database with the schema and data of the version before the migrations existed.
+    """
+    conn = sqlite3.connect("linkedin_jobs.db")
+    conn.executescript('''
+        CREATE TABLE job_ids (job_id TEXT PRIMARY KEY, status TEXT, timestamp_added TEXT, timestamp_updated TEXT,
+                              job_url TEXT);
+        CREATE TABLE job_description (job_id TEXT PRIMARY KEY, company_name TEXT, title_name TEXT,
+                                      job_description TEXT, location TEXT, posted_date TEXT, number_applicants TEXT,
+                                      work_model TEXT, FOREIGN KEY (job_id) REFERENCES job_ids (job_id));
+        CREATE TABLE chatgpt_analysis (job_id INTEGER PRIMARY KEY, chatgpt_message TEXT,
+                                       FOREIGN KEY (job_id) REFERENCES job_ids (job_id));
+    ''')
+    conn.executemany("INSERT INTO job_ids VALUES (?, ?, ?, ?, ?)", [
+        ("1", "ongoing", "202401010000", "202401150000", "https://example.com/1"),
+        ("2", "cancelled", "202401010000", "202401200000", "https://example.com/2"),
+        ("3", "cancelled", "202401010000", "202401010000", "https://example.com/3"),
+    ])
+    conn.executemany("INSERT INTO job_description VALUES (?, 'Acme', ?, ?, 'Berlin', ?, ?, 'Remote')", [
+        ("1", "Data Analyst", "Python and SQL reporting", "2 weeks ago", "Over 100 applicants"),
+        ("2", "Nurse", "Patient care", "3 days ago", "1,234 applicants"),
+        ("3", "Risk Analyst", "Credit risk models", "1 month ago", None),
+    ])
+    conn.executemany("INSERT INTO chatgpt_analysis VALUES (?, ?)", [(1, "Score: 8/10"), (2, "3"), (3, "no score")])
+    conn.commit()
+    return conn
+
+
+def scraped_at(timestamp):
+    return datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp()
+
+
+def test_migrates_a_baseline_database(baseline_db):
+    conn = baseline_db
+    assert migrate(conn) == SCHEMA_VERSION
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+
+    # 1 and 5: TEXT keys, and the scores of the copied analyses
+    columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(chatgpt_analysis)")}
+    assert columns == {"job_id": "TEXT", "chatgpt_message": "TEXT", "score": "INTEGER"}
+    assert conn.execute("SELECT job_id, typeof(job_id), score FROM chatgpt_analysis ORDER BY job_id").fetchall() == [
+        ("1", "text", 8), ("2", "text", 3), ("3", "text", None),
+    ]
+
+    # 2 and 3: indexes and the numeric columns
+    indexes = {row[1] for row in conn.execute("SELECT * FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_job_ids_status", "idx_job_ids_updated", "idx_job_description_posted_at"} <= indexes
+    rows = dict((row[0], row[1:]) for row in conn.execute(
+        "SELECT job_id, applicants_count, posted_at FROM job_description"
+    ))
+    assert rows["1"] == (100, scraped_at("202401150000") - 14 * 86400)
+    assert rows["2"] == (1234, None)   # Updated when it was closed, the posting date was read at an unknown time
+    assert rows["3"] == (None, scraped_at("202401010000") - 30 * 86400)
+
+    # 4: full-text search over the existing jobs
+    assert conn.execute("SELECT rowid FROM sqlite_master WHERE name = 'job_search'").fetchone()
+    assert migrate(conn) == SCHEMA_VERSION  # Nothing left to apply
+    conn.close()
+
+
+def test_scores_are_filled_when_the_keys_were_already_text(workdir):
+    conn = sqlite3.connect("linkedin_jobs.db")
+    conn.executescript('''
+        CREATE TABLE job_ids (job_id TEXT PRIMARY KEY, status TEXT, timestamp_added TEXT, timestamp_updated TEXT,
+                              job_url TEXT);
+        CREATE TABLE job_description (job_id TEXT PRIMARY KEY, company_name TEXT, title_name TEXT,
+                                      job_description TEXT, location TEXT, posted_date TEXT, number_applicants TEXT,
+                                      work_model TEXT);
+        CREATE TABLE chatgpt_analysis (job_id TEXT PRIMARY KEY, chatgpt_message TEXT, score INTEGER);
+        INSERT INTO chatgpt_analysis VALUES ('1', 'I would give this a 9', NULL);
+    ''')
+    conn.commit()
+    migrate(conn)
+    assert conn.execute("SELECT score FROM chatgpt_analysis").fetchall() == [(9,)]
+    conn.close()
+
+
+def test_parsers():
+    assert parse_applicants("Over 100 applicants") == 100
+    assert parse_applicants("1,234 applicants") == 1234
+    assert parse_applicants(None) is None
+    assert parse_posted_date("Reposted 2 weeks ago", 1000000.0) == 1000000.0 - 14 * 86400
+    assert parse_posted_date("Yesterday", 1000000.0) is None
@@ -0,0 +1,81 @@
+import sqlite3
+import numpy as np
+import near_duplicates
+from near_duplicates import RunIndex, inherit_analyses, inherit_new_analyses, minhash_signature, scored_duplicate
+
+POSTING = ("We are looking for a Data Analyst with experience in Python and SQL. You will build reporting for "
+           "our finance team, own the dashboards in Power BI and work with stakeholders across the company on "
+           "forecasting, planning and the monthly close. Responsibilities include cleaning and modelling data in "
+           "dbt, automating recurring reports, answering ad hoc questions from product and sales, and presenting "
+           "results to the leadership team every quarter. You bring three or more years in an analytics role, "
+           "strong statistics, curiosity and clear written communication. We offer flexible hours, a learning "
+           "budget, thirty days of holiday, a modern office and a friendly team that likes to share knowledge.")
+REPOST = POSTING.replace("a modern office", "a modern office in Berlin")  # A repost with the location added
+OTHER = ("Registered nurse wanted for our intensive care unit. Patient care, night shifts and close work with "
+         "doctors and families. Experience with ventilators and a valid license are required for this role.")
+
+
+def clusters():
+    conn = sqlite3.connect("linkedin_jobs.db")
+    rows = dict(conn.execute("SELECT job_id, cluster_id FROM dedup_signatures").fetchall())
+    conn.close()
+    return rows
+
+
+def test_reposts_share_a_cluster(add_jobs):
+    first, repost, other = add_jobs([POSTING, REPOST, OTHER])
+    assert clusters() == {first: first, repost: first, other: other}
+
+
+def test_signature_similarity_tracks_the_text():
+    same = np.mean(minhash_signature(POSTING) == minhash_signature(REPOST))
+    different = np.mean(minhash_signature(POSTING) == minhash_signature(OTHER))
+    assert same >= 0.8
+    assert different < 0.2
+    assert minhash_signature("") is None
+
+
+def test_inherit_analyses_copies_within_the_cluster(add_jobs):
+    first, repost, other = add_jobs([POSTING, REPOST, OTHER])
+    conn = sqlite3.connect("linkedin_jobs.db")
+    with conn:
+        conn.execute("INSERT INTO chatgpt_analysis (job_id, chatgpt_message, score) VALUES (?, 'Score: 8/10', 8)", (first,))
+
+    assert inherit_analyses(conn) == 1
+    assert conn.execute("SELECT job_id, score FROM chatgpt_analysis ORDER BY job_id").fetchall() == [(first, 8), (repost, 8)]
+    assert conn.execute("SELECT analysis_from FROM dedup_signatures WHERE job_id = ?", (repost,)).fetchone() == (first,)
+    assert inherit_analyses(conn) == 0  # Nothing left to copy
+
+    assert scored_duplicate(conn, REPOST + " Apply today.") == (first, "Score: 8/10", 8)
+    assert scored_duplicate(conn, OTHER) is None
+    conn.close()
+
+
+def test_run_index_matches_jobs_scored_in_the_same_run():
+    index = RunIndex()
+    index.add("1", minhash_signature(POSTING))
+    index.add("2", minhash_signature(OTHER))
+
+    job_id, similarity = index.find(minhash_signature(REPOST))
+    assert job_id == "1" and similarity >= 0.8
+    assert index.find(minhash_signature("Completely unrelated text about sailing boats and the open sea")) is None
+
+
+def test_inherit_runs_only_when_something_was_added(add_jobs, monkeypatch):
+    first, repost, other = add_jobs([POSTING, REPOST, OTHER])
+    conn = sqlite3.connect("linkedin_jobs.db")
+    assert inherit_new_analyses(conn) == 0
+
+    calls = []
+    monkeypatch.setattr(near_duplicates, "inherit_analyses", lambda conn: calls.append(conn) or inherit_analyses(conn))
+
+    # Nothing changed: the inherit query is skipped
+    assert inherit_new_analyses(conn) == 0
+    assert calls == []
+
+    with conn:
+        conn.execute("INSERT INTO chatgpt_analysis (job_id, chatgpt_message, score) VALUES (?, '6', 6)", (first,))
+    assert inherit_new_analyses(conn) == 1
+    assert len(calls) == 1
+    assert conn.execute("SELECT score FROM chatgpt_analysis WHERE job_id = ?", (repost,)).fetchone() == (6,)
+    conn.close()
@@ -0,0 +1,34 @@
+"""
+Checks the job page and search response parsers against the saved pages in fixtures/, so a
+change to either parser (or to a fixture) shows up as a failing test instead of drifting silently.
+"""
+import os
+import shutil
+import pytest
+import http_fetcher
+import search_collector
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+JOB_FIXTURES = os.path.join(FIXTURES, "jobs")
+SEARCH_FIXTURES = os.path.join(FIXTURES, "search")
+
+HAS_CHROME = any(shutil.which(name) for name in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser"))
+
+
+def test_http_parser_matches_fixtures():
+    assert http_fetcher.compare_with_fixtures(fixture_folder=JOB_FIXTURES) == []
+
+
+@pytest.mark.skipif(not HAS_CHROME, reason="Chrome is not installed")
+def test_browser_extractor_matches_fixtures():
+    from page_scraper import init_driver
+
+    driver = init_driver(headless=True)
+    try:
+        assert http_fetcher.compare_with_fixtures(driver, fixture_folder=JOB_FIXTURES) == []
+    finally:
+        driver.quit()
+
+
+def test_search_parser_matches_fixtures():
+    assert search_collector.check_fixtures(SEARCH_FIXTURES) == []
@@ -0,0 +1,79 @@
+import sqlite3
+import time
+import pytest
+from db_writer import flush_writer
+from revisit_scheduler import (
+    RevisitScheduler, next_interval_hours, BASE_INTERVAL_HOURS, MAX_INTERVAL_HOURS, content_fields, content_hash,
+)
+
+RECORD = {
+    "job_id": "4200000000", "status": "ongoing", "company_name": "Acme", "title_name": "Data Analyst",
+    "job_description": "Python and SQL", "location": "Berlin, Germany", "posted_date": "2 days ago",
+    "num_applicants": "12 applicants", "work_model": "Hybrid",
+}
+
+
+@pytest.fixture
+def jobs(add_jobs):
+    job_ids = add_jobs(["first", "second", "third", "fourth"])
+    conn = sqlite3.connect("linkedin_jobs.db")
+    with conn:
+        # Oldest posting last in job ID order, so the ordering is visible
+        for job_id, added in zip(job_ids, ["202403010000", "202402010000", "202401010000", "202312010000"]):
+            conn.execute("UPDATE job_ids SET timestamp_added = ? WHERE job_id = ?", (added, job_id))
+        conn.execute("UPDATE job_ids SET status = 'cancelled' WHERE job_id = ?", (job_ids[3],))
+    conn.close()
+    return job_ids
+
+
+def set_revisit(job_id, last_checked_at, next_check_at):
+    conn = sqlite3.connect("linkedin_jobs.db")
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO job_revisits (job_id, last_checked_at, next_check_at, content_hash, unchanged_checks) "
+            "VALUES (?, ?, ?, 'hash', 0)", (job_id, last_checked_at, next_check_at),
+        )
+    conn.close()
+
+
+def test_due_jobs_puts_never_checked_and_oldest_first(jobs):
+    scheduler = RevisitScheduler()
+    assert scheduler.due_jobs() == [jobs[2], jobs[1], jobs[0]]  # The cancelled job is never due
+
+    now = time.time()
+    set_revisit(jobs[2], now - 7200, now - 3600)   # Checked and due again
+    set_revisit(jobs[1], now - 3600, now + 3600)   # Checked and not due yet
+    assert scheduler.due_jobs() == [jobs[0], jobs[2]]
+    assert scheduler.due_jobs(limit=1) == [jobs[0]]
+
+
+def test_interval_grows_while_unchanged_and_resets_on_change(add_jobs):
+    add_jobs([])
+    scheduler = RevisitScheduler()
+    scheduler.due_jobs()  # Creates job_revisits
+
+    def check(record):
+        scheduler.state.clear()
+        scheduler.load([record["job_id"]])
+        checked_at = time.time()
+        scheduler._handle_record(record)
+        flush_writer()
+        conn = sqlite3.connect("linkedin_jobs.db")
+        next_check_at, unchanged_checks, stored_hash = conn.execute(
+            "SELECT next_check_at, unchanged_checks, content_hash FROM job_revisits WHERE job_id = ?", (record["job_id"],)
+        ).fetchone()
+        conn.close()
+        assert stored_hash == content_hash(content_fields(record))
+        return round((next_check_at - checked_at) / 3600), unchanged_checks
+
+    assert check(RECORD) == (BASE_INTERVAL_HOURS, 0)
+    assert check(RECORD) == (BASE_INTERVAL_HOURS * 2, 1)
+    # Whitespace and the daily-changing fields do not count as a change
+    assert check(dict(RECORD, job_description="Python  and\nSQL", num_applicants="40 applicants")) == (BASE_INTERVAL_HOURS * 4, 2)
+    assert check(dict(RECORD, job_description="Python, SQL and dbt")) == (BASE_INTERVAL_HOURS, 0)
+    assert scheduler.stats == {"unchanged": 2, "changed": 2, "closed": 0}
+
+
+def test_interval_is_capped():
+    assert next_interval_hours(0) == BASE_INTERVAL_HOURS
+    assert next_interval_hours(50) == MAX_INTERVAL_HOURS
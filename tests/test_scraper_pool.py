@@ -0,0 +1,55 @@
+import threading
+from selenium.common.exceptions import InvalidSessionIdException
+import scraper_pool
+
+
+class FakeDriver:
+    def quit(self):
+        pass
+
+
+def run_pool(monkeypatch, process_job, job_ids, workers=2):
+    failed = []
+    monkeypatch.setattr(scraper_pool, "init_driver", lambda **kwargs: FakeDriver())
+    monkeypatch.setattr(scraper_pool, "mark_failed", lambda job_id, error: failed.append(job_id))
+    monkeypatch.setattr(scraper_pool, "flush_writer", lambda: None)
+    monkeypatch.setattr(scraper_pool, "LOGIN_STAGGER_SECONDS", 0)
+    processed = scraper_pool.get_job_details_pool(
+        job_ids, workers=workers, requests_per_minute=60000, login=False, process_job=process_job, driver_path="chromedriver",
+    )
+    return processed, failed
+
+
+def test_broken_job_does_not_stop_the_workers(monkeypatch):
+    done = []
+    lock = threading.Lock()
+
+    def process_job(driver, job_id):
+        if job_id == "2":
+            raise ValueError("broken posting")
+        with lock:
+            done.append(job_id)
+
+    processed, failed = run_pool(monkeypatch, process_job, [str(n) for n in range(10)])
+    assert failed == ["2"]
+    assert sorted(done) == sorted(str(n) for n in range(10) if n != 2)
+    assert processed == 9
+
+
+def test_dead_browser_hands_the_job_back(monkeypatch):
+    done = []
+    lock = threading.Lock()
+    dead = []
+
+    def process_job(driver, job_id):
+        with lock:
+            if not dead:
+                dead.append(driver)
+        if driver is dead[0]:
+            raise InvalidSessionIdException("session gone")
+        with lock:
+            done.append(job_id)
+
+    processed, failed = run_pool(monkeypatch, process_job, [str(n) for n in range(6)])
+    assert failed == []
+    assert sorted(done) == [str(n) for n in range(6)]
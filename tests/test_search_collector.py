@@ -0,0 +1,41 @@
+import json
+from search_collector import _read_search_responses
+
+SEARCH_URL = "https://www.linkedin.com/voyager/api/voyagerJobsDashJobCards?count=25&q=jobSearch&start={start}"
+
+
+def response_entry(request_id, start):
+    message = {"message": {"method": "Network.responseReceived", "params": {
+        "requestId": request_id, "response": {"url": SEARCH_URL.format(start=start), "status": 200},
+    }}}
+    return {"message": json.dumps(message)}
+
+
+class FakeDriver:
+    """
+    Hands out the performance log in the given batches, one per get_log call.
+    """
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+
+    def get_log(self, log_type):
+        return self.batches.pop(0) if self.batches else []
+
+    def execute_cdp_cmd(self, command, params):
+        return {"body": json.dumps({"requestId": params["requestId"]})}
+
+
+def test_late_responses_of_the_page_are_drained():
+    driver = FakeDriver([
+        [response_entry("first", 25)],
+        [],
+        [response_entry("late", 25), response_entry("previous page", 0)],
+    ])
+    bodies = _read_search_responses(driver, start=25, timeout=5, idle=0.5)
+    assert [body["requestId"] for body in bodies] == ["first", "late"]
+    assert driver.batches == []
+
+
+def test_no_responses_until_the_timeout():
+    assert _read_search_responses(FakeDriver([]), start=0, timeout=0.3, idle=0.1) == []
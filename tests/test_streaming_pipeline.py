@@ -0,0 +1,105 @@
+import asyncio
+import sqlite3
+import threading
+import pytest
+import streaming_pipeline
+from fake_openai import start_fake_openai
+from page_scraper import save_job_record
+from streaming_pipeline import PipelineStopped, run_streaming_pipeline
+
+PROMPT_SUFFIX = "Score with Python and SQL in mind."
+
+
+@pytest.fixture
+def fake_openai():
+    server = start_fake_openai(latency=0.05, reply="7")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fake_scraper(monkeypatch, descriptions, observe=None):
+    """
+    Replaces scrape_linkedin_jobs with one that stores a record per description and hands it to
+    the pipeline. observe(number) is called before each record is handed over.
+
+    Returns:
+    - A dict that receives the exception the scraper ended with (None when it finished) under "error".
+    """
+    outcome = {"finished": threading.Event()}
+
+    def scrape_linkedin_jobs(job_search_url_template, driver=None, on_record=None, **kwargs):
+        outcome["error"] = None
+        try:
+            for number, description in enumerate(descriptions):
+                record = {
+                    "job_id": str(4200000000 + number), "status": "ongoing", "company_name": "Acme",
+                    "title_name": "Data Analyst", "job_description": description, "location": "Berlin, Germany",
+                    "posted_date": "2 days ago", "num_applicants": "12 applicants", "work_model": "Hybrid",
+                }
+                save_job_record(record)
+                if observe:
+                    observe(number)
+                on_record(record)
+        except Exception as e:
+            outcome["error"] = e
+            raise
+        finally:
+            outcome["finished"].set()
+
+    monkeypatch.setattr(streaming_pipeline, "scrape_linkedin_jobs", scrape_linkedin_jobs)
+    return outcome
+
+
+def test_full_queue_pauses_the_scraper(add_jobs, cv_pdf, distinct_descriptions, fake_openai, monkeypatch):
+    add_jobs([])
+    descriptions = distinct_descriptions(10)
+    ahead = []
+    fake_scraper(monkeypatch, descriptions, observe=lambda number: ahead.append(number - fake_openai.request_count))
+
+    scored = asyncio.run(run_streaming_pipeline(
+        "https://example.com/jobs/search/?keywords=x", PROMPT_SUFFIX, queue_size=2, concurrency=1,
+        base_url=fake_openai.base_url,
+    ))
+
+    assert scored == 10
+    # The scraper is never more than the queue plus the job being scored ahead of ChatGPT
+    assert max(ahead) <= 2 + 1
+    conn = sqlite3.connect("linkedin_jobs.db")
+    assert conn.execute("SELECT COUNT(*) FROM chatgpt_analysis WHERE score = 7").fetchone() == (10,)
+    conn.close()
+
+
+def test_reposts_in_the_same_run_share_one_request(add_jobs, cv_pdf, distinct_descriptions, fake_openai, monkeypatch):
+    add_jobs([])
+    description = distinct_descriptions(1)[0]
+    fake_scraper(monkeypatch, [description, description + " Apply today.", distinct_descriptions(2)[1]])
+
+    scored = asyncio.run(run_streaming_pipeline(
+        "https://example.com/jobs/search/?keywords=x", PROMPT_SUFFIX, concurrency=3, base_url=fake_openai.base_url,
+    ))
+
+    assert scored == 3
+    assert fake_openai.request_count == 2
+
+
+def test_stopped_scoring_stops_the_scraper(add_jobs, cv_pdf, distinct_descriptions, monkeypatch):
+    add_jobs([])
+    server = start_fake_openai(latency=2.0)
+    outcome = fake_scraper(monkeypatch, distinct_descriptions(20))
+
+    async def run():
+        await asyncio.wait_for(run_streaming_pipeline(
+            "https://example.com/jobs/search/?keywords=x", PROMPT_SUFFIX, queue_size=1, concurrency=1,
+            base_url=server.base_url,
+        ), timeout=1)
+
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(run())
+        # The scraper was blocked on the full queue and gives up instead of waiting forever
+        assert outcome["finished"].wait(5)
+        assert isinstance(outcome["error"], PipelineStopped)
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,32 @@
+import time
+from waits import AdaptiveThrottle
+
+
+def test_pause_counts_from_the_end_of_the_previous_load():
+    throttle = AdaptiveThrottle(min_delay=0.2, max_delay=1.0, jitter=0)
+    throttle.pause("job")  # First load: no pause
+
+    # A load slower than the delay still leaves the full delay before the next one
+    time.sleep(0.3)
+    throttle.record("job", 0.3)
+    started = time.monotonic()
+    throttle.pause("job")
+    assert time.monotonic() - started >= 0.29
+
+
+def test_time_since_the_load_counts_towards_the_delay():
+    throttle = AdaptiveThrottle(min_delay=0.2, max_delay=1.0, jitter=0)
+    throttle.record("job", 0.1)
+    time.sleep(0.25)
+    started = time.monotonic()
+    throttle.pause("job")
+    assert time.monotonic() - started < 0.05
+
+
+def test_delay_follows_the_latency_estimate():
+    throttle = AdaptiveThrottle(alpha=0.5, factor=2.0, min_delay=0.1, max_delay=3.0, jitter=0)
+    throttle.record("job", 1.0)
+    throttle.record("job", 2.0)
+    assert throttle.estimate("job") == 1.5
+    assert throttle.delay("job") == 3.0
+    assert throttle.delay("search") == 0.2  # No estimate yet: factor * min_delay
@@ -0,0 +1,168 @@
+import random
+import threading
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+from metrics import metrics
+
+# Wait settings
+DEFAULT_TIMEOUT = 20          # Seconds to wait for a page's key element
+LOGIN_TIMEOUT = 60            # Longer, so a security checkpoint can be solved by hand
+POLL_FREQUENCY = 0.1
+SCROLL_TIMEOUT = 2.0          # Upper bound on waiting for new result cards after a scroll step
+
+# Throttle settings: the politeness delay follows the observed page latency
+EWMA_ALPHA = 0.3              # Weight of the newest latency sample
+POLITENESS_FACTOR = 1.0       # Pause from the end of one page load to the start of the next = factor * estimated latency
+MIN_DELAY_SECONDS = 0.5
+MAX_DELAY_SECONDS = 8.0
+JITTER = 0.25                 # +/- fraction of random variation on every delay
+
+# Elements that show a page of each type is ready to be read
+PAGE_SELECTORS = {
+    "login": [(By.ID, "username")],
+    "logged_in": [(By.ID, "global-nav"), (By.CSS_SELECTOR, "header.global-nav")],
+    "search": [(By.XPATH, "//*[@id='main']/div/div[2]/div[1]/div"), (By.CSS_SELECTOR, "a[href*='/jobs/view/']")],
+    "job": [
+        (By.CLASS_NAME, "job-details-jobs-unified-top-card__company-name"),
+        (By.CSS_SELECTOR, "span.artdeco-inline-feedback__message"),
+        (By.CSS_SELECTOR, "p.jobs-box__body.jobs-no-job__error-msg"),
+    ],
+}
+
+
+class AdaptiveThrottle:
+    """
+    Keeps a running (exponentially weighted) latency estimate per page type and derives the
+    minimum politeness delay between page loads from it, instead of fixed random sleeps.
+
+    The delay is idle time: it is counted from the end of the thread's previous page load (the
+    last record() call), so a slow load never uses up the pause before the next one.
+    """
+
+    def __init__(self, alpha=EWMA_ALPHA, factor=POLITENESS_FACTOR, min_delay=MIN_DELAY_SECONDS,
+                 max_delay=MAX_DELAY_SECONDS, jitter=JITTER):
+        self.alpha = alpha
+        self.factor = factor
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self._latency = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()  # Last page load per thread, so pool workers pace themselves
+
+    def record(self, page_type, seconds):
+        """
+        Feeds the latency of a finished page load to the estimate and marks the end of this
+        thread's last request.
+        """
+        with self._lock:
+            previous = self._latency.get(page_type)
+            self._latency[page_type] = seconds if previous is None else self.alpha * seconds + (1 - self.alpha) * previous
+        self._local.last_request = time.monotonic()
+
+    def estimate(self, page_type, default=None):
+        with self._lock:
+            return self._latency.get(page_type, default)
+
+    def delay(self, page_type):
+        estimate = self.estimate(page_type, self.min_delay)
+        delay = min(self.max_delay, max(self.min_delay, self.factor * estimate))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def pause(self, page_type):
+        """
+        Sleeps only for the part of the politeness delay that has not already passed since this
+        thread's previous page load finished.
+        """
+        last = getattr(self._local, "last_request", None)
+        if last is not None:
+            remaining = self.delay(page_type) - (time.monotonic() - last)
+            if remaining > 0:
+                time.sleep(remaining)
+                metrics.observe("sleep", remaining, source="throttle", page_type=page_type)
+        # Replaced by record() when the load finishes; counts from the start if it never does
+        self._local.last_request = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._latency)
+
+
+# Shared by every scraping step
+throttle = AdaptiveThrottle()
+
+
+def wait_for_any(driver, locators, timeout=DEFAULT_TIMEOUT):
+    """
+    Waits until any of the locators is present and returns the first matching element.
+
+    Raises:
+    - TimeoutException: If none appears within the timeout.
+    """
+    return WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(
+        EC.any_of(*[EC.presence_of_element_located(locator) for locator in locators])
+    )
+
+
+def wait_for_page(driver, page_type, timeout=DEFAULT_TIMEOUT, started=None):
+    """
+    Waits for the key element of a page type and feeds the observed latency to the throttle.
+
+    Returns:
+    - The element, or None if it did not appear in time.
+    """
+    started = started or time.monotonic()
+    try:
+        element = wait_for_any(driver, PAGE_SELECTORS[page_type], timeout)
+    except TimeoutException:
+        print(f"Timed out after {timeout}s waiting for the {page_type} page.")
+        element = None
+    throttle.record(page_type, time.monotonic() - started)
+    return element
+
+
+def load_page(driver, url, page_type, timeout=DEFAULT_TIMEOUT):
+    """
+    Opens a URL after the politeness delay and waits until the page is ready to be read.
+
+    Returns:
+    - The key element of the page, or None if it did not appear in time.
+    """
+    throttle.pause(page_type)
+    started = time.monotonic()
+    driver.get(url)
+    element = wait_for_page(driver, page_type, timeout, started)
+    metrics.observe("page_load", time.monotonic() - started, page_type=page_type)
+
+    # Lean-profile drivers keep per-page load time and bytes transferred
+    page_metrics = getattr(driver, "page_metrics", None)
+    if page_metrics is not None:
+        page_metrics.record(driver, page_type)
+    return element
+
+
+def wait_for_more_cards(driver, container, previous_count, timeout=None):
+    """
+    After a scroll step, waits until more result cards are rendered than before, up to a
+    timeout based on how long cards usually take to appear.
+
+    Returns:
+    - The new number of cards.
+    """
+    if timeout is None:
+        timeout = min(SCROLL_TIMEOUT, max(0.3, 2 * throttle.estimate("scroll", SCROLL_TIMEOUT / 2)))
+
+    def card_count(_):
+        count = len(container.find_elements(By.CSS_SELECTOR, "a[href*='/jobs/view/']"))
+        return count if count > previous_count else False
+
+    started = time.monotonic()
+    try:
+        count = WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(card_count)
+        throttle.record("scroll", time.monotonic() - started)
+        return count
+    except TimeoutException:
+        return previous_count